@@ -2,6 +2,8 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.security import decode_access_token
 from app.core.database import get_database
+from app.core.user_cache import user_cache
+from app.services.batch_loader import BatchLoader
 from bson import ObjectId
 from typing import List
 
@@ -24,16 +26,22 @@ async def get_current_user(
         )
     
     user_id = payload.get("sub")
-    
-    try:
-        user = await db.users.find_one({"_id": ObjectId(user_id)})
-    except Exception as e:
-        print(f"Error finding user: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-    
+
+    user = await user_cache.get(str(user_id)) if user_id else None
+
+    if user is None:
+        try:
+            user = await db.users.find_one({"_id": ObjectId(user_id)})
+        except Exception as e:
+            print(f"Error finding user: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found"
+            )
+
+        if user is not None:
+            await user_cache.set(str(user_id), user)
+
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -48,6 +56,12 @@ async def get_current_user(
     
     return user
 
+# ============= PER-REQUEST HELPERS =============
+
+async def get_batch_loader(db = Depends(get_database)) -> BatchLoader:
+    """Batched, memoized user/team/... lookups shared by everything in one request"""
+    return BatchLoader(db)
+
 # ============= ROLE-BASED DEPENDENCIES =============
 
 async def get_current_super_admin(current_user: dict = Depends(get_current_user)):
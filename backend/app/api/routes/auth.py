@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from app.core.database import get_database
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.security import verify_password_async, create_access_token
 from app.schemas.user import UserLogin, UserResponse, Token
 from datetime import datetime
 
@@ -10,7 +10,7 @@ router = APIRouter()
 async def login(user_data: UserLogin, request: Request, db = Depends(get_database)):
     user = await db.users.find_one({"email": user_data.email})
     
-    if not user or not verify_password(user_data.password, user["hashed_password"]):
+    if not user or not await verify_password_async(user_data.password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
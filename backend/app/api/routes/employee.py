@@ -1,12 +1,20 @@
 # backend/app/api/routes/employee.py
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Header
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Header, Request
+from app.core.config import settings
 from app.core.database import get_database
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_current_hr
+from app.services.activity_tracker import get_session_applications
+from app.services.activity_rollup import ActivityRollupService
+from app.services.counter_service import CounterService
+from app.utils.helpers import app_field_key, extract_site_name
 from datetime import datetime, timedelta
 from bson import ObjectId
+from pymongo import ReturnDocument
 from typing import Optional
+import json
 import logging
+import zlib
 from datetime import datetime 
 
 # UNCOMMENT THIS LINE: if have a classifier
@@ -290,6 +298,296 @@ async def cleanup_stale_attendance(
     return {"message": "No stale records found"}
 
 
+# Upper bound on interval records accepted in one batch upload
+MAX_ACTIVITY_BATCH_RECORDS = 500
+# Upper bound on a batch body after gzip decompression (guards against gzip bombs)
+MAX_ACTIVITY_BATCH_BYTES = 8 * 1024 * 1024
+
+
+def _record_date(record: dict) -> str:
+    """
+    Day (YYYY-MM-DD) an interval record was captured: the agent's capture_date,
+    else the date of its timestamp, else today
+    """
+    today = datetime.now().strftime("%Y-%m-%d")
+    try:
+        if record.get("capture_date"):
+            day = datetime.strptime(str(record["capture_date"]), "%Y-%m-%d").strftime("%Y-%m-%d")
+        else:
+            day = datetime.fromisoformat(str(record["timestamp"])).strftime("%Y-%m-%d")
+    except (KeyError, ValueError):
+        return today
+    # Never file intervals under a day that hasn't started yet (agent clock ahead)
+    return min(day, today)
+
+
+def _normalize_applications(applications: list) -> list:
+    """Normalize per-application interval entries sent by the desktop agent"""
+    normalized_apps = []
+    for app in applications:
+        application = app.get("application", "Unknown")
+        url = app.get("url", "")
+        normalized_apps.append({
+            "application": application,
+            "window_title": app.get("window_title", ""),
+            "url": url,
+            # Site-grouped name used by the HR app breakdown
+            "display_name": extract_site_name(application, url),
+            "mouse_movements": int(app.get("mouse_movements", 0)),
+            "key_presses": int(app.get("key_presses", 0)),
+            "time_spent_seconds": int(app.get("time_spent_seconds", 0)),
+        })
+    return normalized_apps
+
+
+def _merge_applications(existing_apps: list, new_apps: list) -> list:
+    """Add interval app counters onto existing app totals (keyed by application name)"""
+    app_dict = {app["application"]: dict(app) for app in existing_apps}
+
+    for new_app in new_apps:
+        app_name = new_app["application"]
+        if app_name in app_dict:
+            # Add to existing app's totals
+            app_dict[app_name]["mouse_movements"] += new_app["mouse_movements"]
+            app_dict[app_name]["key_presses"] += new_app["key_presses"]
+            app_dict[app_name]["time_spent_seconds"] += new_app["time_spent_seconds"]
+            # Update window title/url to latest
+            app_dict[app_name]["window_title"] = new_app["window_title"]
+            app_dict[app_name]["url"] = new_app["url"]
+            app_dict[app_name]["display_name"] = new_app["display_name"]
+        else:
+            # New app - add it
+            app_dict[app_name] = dict(new_app)
+
+    return list(app_dict.values())
+
+
+async def _upsert_activity_counters(filter_query: dict, activity_data: dict, new_apps: list, db) -> dict:
+    """
+    Atomic storage mode: add interval app counters with $inc in a single upsert.
+
+    Per-app totals live in the `app_totals` map keyed by app_field_key(), so the
+    write never reads or rewrites the apps already stored for the session.
+    """
+    set_fields = {
+        key: value for key, value in activity_data.items()
+        if key not in ("applications", "applications_total_time_seconds", "app_totals", "_id")
+    }
+    inc_fields = {"applications_total_time_seconds": 0}
+    
+    for app in new_apps:
+        prefix = f"app_totals.{app_field_key(app['application'])}"
+        set_fields[f"{prefix}.application"] = app["application"]
+        set_fields[f"{prefix}.window_title"] = app["window_title"]
+        set_fields[f"{prefix}.url"] = app["url"]
+        set_fields[f"{prefix}.display_name"] = app["display_name"]
+        for counter in ("mouse_movements", "key_presses", "time_spent_seconds"):
+            inc_fields[f"{prefix}.{counter}"] = inc_fields.get(f"{prefix}.{counter}", 0) + app[counter]
+        inc_fields["applications_total_time_seconds"] += app["time_spent_seconds"]
+    
+    new_id = ObjectId()
+    previous = await db.activities.find_one_and_update(
+        filter_query,
+        {
+            "$set": set_fields,
+            "$inc": inc_fields,
+            "$setOnInsert": {"_id": new_id}
+        },
+        projection={"_id": 1},
+        upsert=True,
+        return_document=ReturnDocument.BEFORE
+    )
+    
+    if previous:
+        return {"id": str(previous["_id"]), "updated": True}
+    return {"id": str(new_id), "updated": False}
+
+
+async def _record_rollup(current_user: dict, day: str, new_apps: list, db):
+    """Keep the daily per-app rollup in step with ingest (never fails the ingest)"""
+    try:
+        await ActivityRollupService(db).record_interval(
+            user_id=str(current_user["_id"]),
+            employee_email=current_user["email"],
+            day=day,
+            applications=new_apps
+        )
+    except Exception as e:
+        logger.error(f"Error updating activity rollup: {str(e)}")
+
+
+async def _store_activity(activity_data: dict, current_user: dict, db) -> dict:
+    """
+    Upsert one activity snapshot into the session document for the day it was
+    captured (see _record_date), so intervals uploaded late from the agent's
+    spool never merge into a later day's session.
+    Shared by the single-interval and batch ingestion endpoints.
+    """
+    timestamp = datetime.now()
+    day = _record_date(activity_data)
+    
+    # Get session number from activity data
+    session_number = activity_data.get("session_number", 0)
+    session_filter = {
+        "user_id": str(current_user["_id"]),
+        "date": day,
+        "session_number": session_number
+    }
+    
+    # Add employee info
+    activity_data["employee_email"] = current_user["email"]
+    activity_data["employee_name"] = current_user.get("full_name", "")
+    activity_data["user_id"] = str(current_user["_id"])
+    activity_data["recorded_at"] = timestamp
+    activity_data["date"] = day
+    activity_data["source"] = activity_data.get("source", "desktop_agent")
+    
+    if "timestamp" not in activity_data:
+        activity_data["timestamp"] = timestamp.isoformat()
+    
+    # Calculate productivity score
+    session_active = int(activity_data.get("active_time", 0))
+    session_idle = int(activity_data.get("idle_time", 0))
+    session_total = session_active + session_idle
+    
+    if session_total > 0:
+        activity_data["productivity_score"] = min(100, int((session_active / session_total) * 100))
+    else:
+        activity_data["productivity_score"] = 0
+    
+    activity_data["session_time_seconds"] = session_total
+    activity_data["is_idle"] = bool(activity_data.get("is_idle", False))
+
+    # Normalize NEW applications from this interval
+    normalized_new_apps = _normalize_applications(activity_data.get("applications", []))
+    
+    summary = {
+        "active_time": session_active,
+        "idle_time": session_idle,
+        "active_time_seconds": activity_data.get("active_time_seconds", 0),
+        "idle_time_seconds": activity_data.get("idle_time_seconds", 0)
+    }
+
+    # ✅ ATOMIC MODE: $inc per-app counters in one upsert, no read round trip
+    if settings.ACTIVITY_STORAGE_MODE == "atomic":
+        result = await _upsert_activity_counters(session_filter, activity_data, normalized_new_apps, db)
+        print(f"✅ Activity UPSERTED for {current_user['email']} (Session {session_number})")
+        await _record_rollup(current_user, day, normalized_new_apps, db)
+        return {**result, "apps_tracked": len(normalized_new_apps), **summary}
+
+    # Find existing activity record for this session on that day
+    existing_activity = await db.activities.find_one(session_filter)
+
+    # ✅ MERGE applications if updating existing record
+    if existing_activity:
+        merged_apps = _merge_applications(existing_activity.get("applications", []), normalized_new_apps)
+        activity_data["applications"] = merged_apps
+    else:
+        # First time - use as is
+        activity_data["applications"] = normalized_new_apps
+    activity_data["applications_total_time_seconds"] = sum(
+        app["time_spent_seconds"] for app in activity_data["applications"]
+    )
+
+    # ✅ UPDATE or CREATE
+    if existing_activity:
+        result = await db.activities.update_one(
+            {"_id": existing_activity["_id"]},
+            {"$set": activity_data}
+        )
+        print(f"✅ Activity UPDATED for {current_user['email']} (Session {session_number})")
+        activity_id = str(existing_activity["_id"])
+        is_update = True
+    else:
+        result = await db.activities.insert_one(activity_data)
+        print(f"✅ Activity CREATED for {current_user['email']} (Session {session_number})")
+        activity_id = str(result.inserted_id)
+        is_update = False
+    
+    await _record_rollup(current_user, day, normalized_new_apps, db)
+    
+    return {
+        "id": activity_id,
+        "updated": is_update,
+        "apps_tracked": len(activity_data["applications"]),
+        **summary
+    }
+
+
+def _coalesce_interval_records(records: list) -> list:
+    """
+    Collapse a batch of interval records into one snapshot per (day, session).
+
+    Cumulative fields (lifetime/session totals) are taken from the latest record,
+    while per-interval application counters are summed across the batch.
+    Records are grouped by the day they were captured, so a batch spanning
+    midnight (or a drained offline spool) is never merged across days.
+    """
+    sessions = {}
+    for record in records:
+        session_key = (_record_date(record), record.get("session_number", 0))
+        apps = _normalize_applications(record.get("applications", []))
+        
+        if session_key in sessions:
+            previous = sessions[session_key]
+            sessions[session_key] = {
+                **record,
+                "applications": _merge_applications(previous["applications"], apps),
+                "session_completed": bool(
+                    record.get("session_completed") or previous.get("session_completed")
+                )
+            }
+        else:
+            sessions[session_key] = {**record, "applications": apps}
+    
+    return list(sessions.values())
+
+
+async def _decode_activity_batch(request: Request) -> list:
+    """Decode a gzip-compressed JSON or msgpack batch body into a list of records"""
+    body = await request.body()
+    
+    if "gzip" in request.headers.get("content-encoding", "").lower():
+        # Decompress at most one byte past the limit instead of the whole stream
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            body = decompressor.decompress(body, MAX_ACTIVITY_BATCH_BYTES + 1)
+        except zlib.error:
+            raise HTTPException(status_code=400, detail="Invalid gzip payload")
+        if len(body) <= MAX_ACTIVITY_BATCH_BYTES and not decompressor.eof:
+            raise HTTPException(status_code=400, detail="Invalid gzip payload")
+    
+    if len(body) > MAX_ACTIVITY_BATCH_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large (max {MAX_ACTIVITY_BATCH_BYTES // (1024 * 1024)} MB uncompressed)"
+        )
+    
+    content_type = request.headers.get("content-type", "").lower()
+    if "msgpack" in content_type:
+        try:
+            import msgpack
+        except ImportError:
+            raise HTTPException(status_code=415, detail="msgpack payloads are not supported on this server")
+        try:
+            payload = msgpack.unpackb(body, raw=False)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid msgpack payload")
+    else:
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid JSON payload")
+    
+    # Accept either a bare array or {"records": [...]}
+    records = payload.get("records") if isinstance(payload, dict) else payload
+    
+    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+        raise HTTPException(status_code=400, detail="Batch must be an array of activity records")
+    
+    return records
+
+
 @router.post("/activity")
 async def log_activity(
     activity_data: dict,
@@ -301,119 +599,51 @@ async def log_activity(
     Updates existing record and merges new applications
     """
     try:
-        timestamp = datetime.now()
-        today = timestamp.strftime("%Y-%m-%d")
-        
-        # Get session number from activity data
-        session_number = activity_data.get("session_number", 0)
-        
-        # Find existing activity record for this session TODAY
-        existing_activity = await db.activities.find_one({
-            "user_id": str(current_user["_id"]),
-            "date": today,
-            "session_number": session_number
-        })
-        
-        # Add employee info
-        activity_data["employee_email"] = current_user["email"]
-        activity_data["employee_name"] = current_user.get("full_name", "")
-        activity_data["user_id"] = str(current_user["_id"])
-        activity_data["recorded_at"] = timestamp
-        activity_data["date"] = today
-        activity_data["source"] = activity_data.get("source", "desktop_agent")
-        
-        if "timestamp" not in activity_data:
-            activity_data["timestamp"] = timestamp.isoformat()
-        
-        # Calculate productivity score
-        session_active = int(activity_data.get("active_time", 0))
-        session_idle = int(activity_data.get("idle_time", 0))
-        session_total = session_active + session_idle
-        
-        if session_total > 0:
-            activity_data["productivity_score"] = min(100, int((session_active / session_total) * 100))
-        else:
-            activity_data["productivity_score"] = 0
-        
-        activity_data["session_time_seconds"] = session_total
-        activity_data["is_idle"] = bool(activity_data.get("is_idle", False))
-
-        # Normalize NEW applications from this interval
-        new_applications = activity_data.get("applications", [])
-        normalized_new_apps = []
-        total_app_time = 0
-
-        for app in new_applications:
-            app_entry = {
-                "application": app.get("application", "Unknown"),
-                "window_title": app.get("window_title", ""),
-                "url": app.get("url", ""),
-                "mouse_movements": int(app.get("mouse_movements", 0)),
-                "key_presses": int(app.get("key_presses", 0)),
-                "time_spent_seconds": int(app.get("time_spent_seconds", 0)),
-            }
-            total_app_time += app_entry["time_spent_seconds"]
-            normalized_new_apps.append(app_entry)
+        result = await _store_activity(activity_data, current_user, db)
+        return {"message": "Activity logged successfully", **result}
+    
+    except Exception as e:
+        print(f"❌ Error logging activity: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # ✅ MERGE applications if updating existing record
-        if existing_activity:
-            existing_apps = existing_activity.get("applications", [])
-            
-            # Create a dict for easy lookup
-            app_dict = {app["application"]: app for app in existing_apps}
-            
-            # Merge or add new apps
-            for new_app in normalized_new_apps:
-                app_name = new_app["application"]
-                if app_name in app_dict:
-                    # Add to existing app's totals
-                    app_dict[app_name]["mouse_movements"] += new_app["mouse_movements"]
-                    app_dict[app_name]["key_presses"] += new_app["key_presses"]
-                    app_dict[app_name]["time_spent_seconds"] += new_app["time_spent_seconds"]
-                    # Update window title/url to latest
-                    app_dict[app_name]["window_title"] = new_app["window_title"]
-                    app_dict[app_name]["url"] = new_app["url"]
-                else:
-                    # New app - add it
-                    app_dict[app_name] = new_app
-            
-            # Convert back to list
-            merged_apps = list(app_dict.values())
-            activity_data["applications"] = merged_apps
-            activity_data["applications_total_time_seconds"] = sum(app["time_spent_seconds"] for app in merged_apps)
-        else:
-            # First time - use as is
-            activity_data["applications"] = normalized_new_apps
-            activity_data["applications_total_time_seconds"] = total_app_time
-
-        # ✅ UPDATE or CREATE
-        if existing_activity:
-            result = await db.activities.update_one(
-                {"_id": existing_activity["_id"]},
-                {"$set": activity_data}
-            )
-            print(f"✅ Activity UPDATED for {current_user['email']} (Session {session_number})")
-            activity_id = str(existing_activity["_id"])
-            is_update = True
-        else:
-            result = await db.activities.insert_one(activity_data)
-            print(f"✅ Activity CREATED for {current_user['email']} (Session {session_number})")
-            activity_id = str(result.inserted_id)
-            is_update = False
+
+@router.post("/activity/batch")
+async def log_activity_batch(
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+):
+    """
+    Log several activity intervals from the desktop agent in one request.
+    Body is an array of interval records (gzip JSON or msgpack); records of the
+    same session are merged in memory and written once.
+    """
+    records = await _decode_activity_batch(request)
+    
+    if not records:
+        return {"message": "Empty batch, nothing logged", "records_received": 0, "sessions": []}
+    
+    if len(records) > MAX_ACTIVITY_BATCH_RECORDS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large (max {MAX_ACTIVITY_BATCH_RECORDS} records)"
+        )
+    
+    try:
+        sessions = []
+        for snapshot in _coalesce_interval_records(records):
+            sessions.append(await _store_activity(snapshot, current_user, db))
         
         return {
-            "message": "Activity logged successfully",
-            "id": activity_id,
-            "updated": is_update,
-            "apps_tracked": len(activity_data["applications"]),
-            "active_time": session_active,
-            "idle_time": session_idle,
-            "active_time_seconds": activity_data.get("active_time_seconds", 0),
-            "idle_time_seconds": activity_data.get("idle_time_seconds", 0)
+            "message": "Activity batch logged successfully",
+            "records_received": len(records),
+            "sessions": sessions
         }
     
     except Exception as e:
-        print(f"❌ Error logging activity: {str(e)}")
+        print(f"❌ Error logging activity batch: {str(e)}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
@@ -618,20 +848,25 @@ async def get_productivity_insights(
 
 @router.post("/train-models")
 async def train_ml_models(
-    current_user: dict = Depends(get_current_user),
+    current_user: dict = Depends(get_current_hr),
     db = Depends(get_database)
 ):
     """
-    Manual endpoint to trigger ML model training
-    Can be called by employees or HR
+    Manual endpoint to trigger ML model training (HR only)
     """
     try:
-        success = await smart_classifier.train_models(db, min_samples=50)
+        success = await train_models_single_flight(db, min_samples=50)
         
-        if success:
+        if success is None:
+            return {
+                "success": False,
+                "message": "Training already in progress"
+            }
+        elif success:
             return {
                 "success": True,
-                "message": "ML models trained successfully"
+                "message": "ML models trained successfully",
+                "model": smart_classifier.model_stats()
             }
         else:
             return {
@@ -785,7 +1020,7 @@ async def get_employee_activity_breakdown(
             total_keys += activity.get("total_key_presses", 0)
             
             # Process each application in the activity
-            for app in activity.get("applications", []):
+            for app in get_session_applications(activity):
                 app_name = app["application"]
                 
                 if app_name not in app_stats:
@@ -948,16 +1183,35 @@ async def get_session_count(
         return {"session_count": 1, "total_sessions": 0, "has_active_session": False}
 
 # Background task to check and train models
+CLASSIFIED_ACTIVITY_COUNTER = "classified_activities"
+ML_TRAINING_LEASE = "ml_training"
+ML_TRAINING_LEASE_TTL = timedelta(minutes=30)
+
+async def train_models_single_flight(db, **kwargs) -> Optional[bool]:
+    """Run train_models unless another worker is already training (then returns None)"""
+    counters = CounterService(db)
+    token = await counters.acquire(ML_TRAINING_LEASE, ML_TRAINING_LEASE_TTL)
+    if token is None:
+        logger.info("ML training already in progress, skipping")
+        return None
+    try:
+        return await smart_classifier.train_models(db, **kwargs)
+    finally:
+        await counters.release(ML_TRAINING_LEASE, token)
+
 async def check_and_train(db):
-    """Background task to retrain models periodically"""
+    """Background task to retrain models every ML_RETRAIN_EVERY classified records"""
     try:
-        count = await db.activities.count_documents({
-            "classification": {"$exists": True}
-        })
+        # Pick up a model trained by another worker
+        await smart_classifier.refresh_model(db)
         
-        # Retrain every 500 new records
-        if count > 0 and count % 500 == 0:
+        counters = CounterService(db)
+        crossed = await counters.increment_and_check(
+            CLASSIFIED_ACTIVITY_COUNTER, settings.ML_RETRAIN_EVERY
+        )
+        if crossed:
+            count = await counters.get(CLASSIFIED_ACTIVITY_COUNTER)
             logger.info(f"Auto-training triggered at {count} samples")
-            await smart_classifier.train_models(db)
+            await train_models_single_flight(db)
     except Exception as e:
         logger.error(f"Background training error: {str(e)}")
\ No newline at end of file
@@ -1,11 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse
 from typing import List, Optional
 from app.core.database import get_database
 from app.api.deps import get_current_hr
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
+from app.core.user_cache import user_cache
+from app.core.config import settings
 from app.schemas.user import UserCreate, UserResponse
 from app.schemas.override_request import OverrideRequestCreate, OverrideRequestResponse
 from app.services.activity_tracker import ActivityTrackerService  
+from app.services.activity_rollup_jobs import activity_rollup_backfill_jobs, serialize_backfill_job
 from bson import ObjectId
 from datetime import datetime, timedelta, date  # <<< ADD 'date' to imports
 
@@ -70,7 +74,7 @@ async def create_user(
         "email": user_data.email,
         "full_name": user_data.full_name,
         "role": user_data.role,
-        "hashed_password": get_password_hash(user_data.password),
+        "hashed_password": await get_password_hash_async(user_data.password),
         "is_active": True,
         "created_by": str(current_user["_id"]),
         "created_at": datetime.now(),
@@ -98,31 +102,74 @@ async def get_employees(
     current_user: dict = Depends(get_current_hr),
     db = Depends(get_database)
 ):
-    employees = []
-    cursor = db.users.find({"role": {"$in": ["employee", "team_lead", "business_analyst"]}}) 
+    # Set-based: one query per collection for ALL employees, joined in memory
+    # (constant number of round trips regardless of headcount)
+    employee_docs = await db.users.find(
+        {"role": {"$in": ["employee", "team_lead", "business_analyst"]}}
+    ).to_list(length=None)
+    
+    if not employee_docs:
+        return []
+    
+    employee_ids = [str(employee["_id"]) for employee in employee_docs]
     
     today = datetime.now().strftime("%Y-%m-%d")
     week_ago = datetime.now() - timedelta(days=7)
     
-    async for employee in cursor:
+    # ========================================
+    # TODAY'S ATTENDANCE - ALL SESSIONS, ALL EMPLOYEES
+    # ========================================
+    today_sessions_by_user = {}
+    async for session in db.attendance.find({
+        "user_id": {"$in": employee_ids},
+        "date": today
+    }):
+        today_sessions_by_user.setdefault(session["user_id"], []).append(session)
+    
+    # ========================================
+    # WEEK HOURS (Last 7 days completed)
+    # ========================================
+    week_hours_by_user = {}
+    async for row in db.attendance.aggregate([
+        {"$match": {
+            "user_id": {"$in": employee_ids},
+            "login_time": {"$gte": week_ago},
+            "status": "completed"
+        }},
+        {"$group": {
+            "_id": "$user_id",
+            "week_hours": {"$sum": {"$ifNull": ["$total_hours", 0]}}
+        }}
+    ]):
+        week_hours_by_user[row["_id"]] = row["week_hours"]
+    
+    # ========================================
+    # PRODUCTIVITY SCORE (Latest per employee, same 7-day window as week hours)
+    # ========================================
+    # Bounded by recorded_at so only recent documents are read; the match and
+    # sort are served by the activities.user_recorded_at index (user_id, recorded_at desc)
+    productivity_by_user = {}
+    async for row in db.activities.aggregate([
+        {"$match": {"user_id": {"$in": employee_ids}, "recorded_at": {"$gte": week_ago}}},
+        {"$sort": {"user_id": 1, "recorded_at": -1}},
+        {"$project": {"_id": 0, "user_id": 1, "productivity_score": 1}},
+        {"$group": {
+            "_id": "$user_id",
+            "productivity_score": {"$first": "$productivity_score"}
+        }}
+    ], allowDiskUse=True):
+        productivity_by_user[row["_id"]] = row.get("productivity_score") or 0
+    
+    employees = []
+    for employee in employee_docs:
         employee_id = str(employee["_id"])
         
-        # ========================================
-        # TODAY'S ATTENDANCE - GET ALL SESSIONS
-        # ========================================
-        today_attendance_cursor = db.attendance.find({
-            "user_id": employee_id,
-            "date": today
-        })
-        
-        today_sessions = await today_attendance_cursor.to_list(length=None)
-        
         # Calculate total hours from ALL sessions today
         is_active = False
         today_hours = 0.0
         active_login_time = None
         
-        for session in today_sessions:
+        for session in today_sessions_by_user.get(employee_id, []):
             login_time = session.get("login_time")
             logout_time = session.get("logout_time")
             attendance_status = session.get("status")
@@ -145,34 +192,8 @@ async def get_employees(
                 session_hours = session.get("total_hours", 0) or 0
                 today_hours += session_hours
         
-        # ========================================
-        # WEEK HOURS (Last 7 days completed)
-        # ========================================
-        week_cursor = db.attendance.find({
-            "user_id": employee_id,
-            "login_time": {"$gte": week_ago},
-            "status": "completed"
-        })
-        
-        week_hours = 0.0
-        async for record in week_cursor:
-            hours = record.get("total_hours", 0) or 0
-            week_hours += hours
-        
         # Add today's hours to week total
-        week_hours += today_hours
-        
-        # ========================================
-        # PRODUCTIVITY SCORE (Latest)
-        # ========================================
-        latest_activity = await db.activities.find_one(
-            {"user_id": employee_id},
-            sort=[("recorded_at", -1)]
-        )
-        
-        productivity_score = 0
-        if latest_activity:
-            productivity_score = latest_activity.get("productivity_score", 0)
+        week_hours = week_hours_by_user.get(employee_id, 0.0) + today_hours
         
         # ========================================
         # BUILD EMPLOYEE OBJECT
@@ -188,7 +209,7 @@ async def get_employees(
             "week_hours": round(week_hours, 2),
             "login_time": active_login_time if is_active else None,
             "logout_time": None if is_active else None,
-            "productivity_score": productivity_score
+            "productivity_score": productivity_by_user.get(employee_id, 0)
         })
     
     return employees
@@ -369,6 +390,39 @@ async def get_employee_app_breakdown(
     }
 # <<<<<<< END OF NEW ENDPOINT >>>>>>>
 
+@router.post("/activity-rollups/backfill", status_code=status.HTTP_202_ACCEPTED)
+async def backfill_activity_rollups(
+    start_date: Optional[date] = Query(None, description="First day to rebuild (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Last day to rebuild (YYYY-MM-DD)"),
+    current_user: dict = Depends(get_current_hr),
+    db = Depends(get_database)
+):
+    """
+    Rebuild the daily per-app activity rollups from session activity documents.
+    Runs in the background one day at a time; poll GET /activity-rollups/backfill
+    for progress. Safe to re-run (an interrupted run of the same range resumes);
+    omit both dates to rebuild everything.
+    """
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="Start date must be before end date")
+    
+    job = await activity_rollup_backfill_jobs.start(
+        db, start_date, end_date, requested_by=str(current_user["_id"])
+    )
+    return serialize_backfill_job(job)
+
+@router.get("/activity-rollups/backfill")
+async def get_activity_rollup_backfill(
+    current_user: dict = Depends(get_current_hr),
+    db = Depends(get_database)
+):
+    """Progress of the latest activity rollup backfill"""
+    job = await activity_rollup_backfill_jobs.get(db)
+    if not job:
+        raise HTTPException(status_code=404, detail="No activity rollup backfill has been started")
+    
+    return serialize_backfill_job(job)
+
 @router.put("/settings")
 async def update_settings(
     settings: dict,
@@ -384,6 +438,7 @@ async def update_settings(
                 "required_hours": settings.get("required_hours", 8.0)
             }}
         )
+        await user_cache.invalidate(settings["employee_id"])
     else:
         # Update for all employees
         await db.users.update_many(
@@ -393,6 +448,7 @@ async def update_settings(
                 "required_hours": settings.get("required_hours", 8.0)
             }}
         )
+        await user_cache.clear()
     
     return {"message": "Settings updated successfully"}
 
@@ -405,74 +461,112 @@ async def get_employee_ai_productivity(
     db = Depends(get_database)
 ):
     """
-    HR endpoint to get AI productivity analysis for any employee
+    HR endpoint to get AI productivity analysis for any employee.
+    Runs through the analysis job queue, so concurrent requests for the same
+    employee and month share one LLM call.
     """
     print(f"\n🔍 HR AI ENDPOINT CALLED for employee: {employee_id}\n")
     
-    from datetime import date
-    from app.services.activity_tracker import ActivityTrackerService
-    from app.services.ai_productivity_service import ai_productivity_service
+    from app.services.ai_analysis_jobs import ai_analysis_jobs
     
     # Validate employee exists
     employee = await db.users.find_one({"_id": ObjectId(employee_id)})
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     
-    # Get current month range
-    today = date.today()
-    first_day_of_month = today.replace(day=1)
-    
-    # Get raw monthly app data
-    activity_service = ActivityTrackerService(db)
-    raw_apps = await activity_service.get_raw_monthly_app_data(
-        employee_email=employee["email"],
-        start_date=first_day_of_month,
-        end_date=today
+    job = await ai_analysis_jobs.submit(db, employee, requested_by=str(current_user["_id"]))
+    job_id = str(job["_id"])
+    job = await ai_analysis_jobs.wait(db, job_id, timeout=settings.AI_ANALYSIS_TIMEOUT_SECONDS)
+    
+    if job is None:
+        # Job document removed between submit and poll
+        raise HTTPException(status_code=503, detail=f"AI analysis job {job_id} is no longer available, please retry")
+    if job["status"] == "completed":
+        return job["result"]
+    if job["status"] == "failed":
+        raise HTTPException(status_code=502, detail=f"AI analysis failed: {job.get('error')}")
+    
+    # Still queued/running: hand back the job so the client can poll it
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"success": False, "message": "Analysis still running", "job_id": str(job["_id"])}
     )
+
+@router.post("/employee/{employee_id}/ai-productivity/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def queue_employee_ai_productivity(
+    employee_id: str,
+    current_user: dict = Depends(get_current_hr),
+    db = Depends(get_database)
+):
+    """Queue a background AI productivity analysis for one employee"""
+    from app.services.ai_analysis_jobs import ai_analysis_jobs, serialize_job
     
-    if not raw_apps:
-        return {
-            "success": False,
-            "message": "No activity data found for current month",
-            "month": today.strftime("%B %Y")
-        }
-    
-    # Get AI analysis
-    month_label = today.strftime("%B %Y")
-    employee_name = employee.get("full_name", employee["email"])
-    
-    ai_analysis = await ai_productivity_service.analyze_productivity(
-        raw_apps=raw_apps,
-        employee_name=employee_name,
-        month=month_label
-    )
+    employee = await db.users.find_one({"_id": ObjectId(employee_id)})
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
     
-    total_seconds = sum(app["total_time_spent_seconds"] for app in raw_apps)
-    total_hours = round(total_seconds / 3600, 2)
+    job = await ai_analysis_jobs.submit(db, employee, requested_by=str(current_user["_id"]))
+    return serialize_job(job)
+
+@router.post("/ai-productivity/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def queue_company_ai_productivity(
+    current_user: dict = Depends(get_current_hr),
+    db = Depends(get_database)
+):
+    """Queue monthly AI productivity analyses for every active employee"""
+    from app.services.ai_analysis_jobs import ai_analysis_jobs, serialize_job
+    
+    employees = await db.users.find(
+        {"role": "employee", "is_active": True},
+        projection={"email": 1, "full_name": 1}
+    ).to_list(length=None)
+    
+    jobs = []
+    for employee in employees:
+        job = await ai_analysis_jobs.submit(db, employee, requested_by=str(current_user["_id"]))
+        jobs.append(serialize_job(job))
     
     return {
-        "success": True,
-        "employee": {
-            "id": employee_id,
-            "name": employee_name,
-            "email": employee["email"]
-        },
-        "period": {
-            "month": month_label,
-            "start_date": first_day_of_month.isoformat(),
-            "end_date": today.isoformat()
-        },
-        "activity_summary": {
-            "total_hours": total_hours,
-            "total_apps": len(raw_apps)
-        },
-        "ai_analysis": ai_analysis,
-         "debug_data": {  # ✅ ADD THIS
-            "raw_apps": raw_apps,
-            "total_apps": len(raw_apps),
-            "total_hours": total_hours
-         }
+        "total": len(jobs),
+        "jobs": jobs
     }
+
+@router.get("/ai-productivity/cache")
+async def get_ai_productivity_cache_stats(
+    current_user: dict = Depends(get_current_hr),
+    db = Depends(get_database)
+):
+    """Entry count and hit/miss counters (this worker) of the AI analysis cache"""
+    from app.services.ai_productivity_service import ai_productivity_service
+    
+    return await ai_productivity_service.cache_stats(db)
+
+@router.delete("/ai-productivity/cache")
+async def invalidate_ai_productivity_cache(
+    employee_id: Optional[str] = None,
+    current_user: dict = Depends(get_current_hr),
+    db = Depends(get_database)
+):
+    """Drop cached AI analyses for one employee, or for everyone when no employee_id is given"""
+    from app.services.ai_productivity_service import ai_productivity_service
+    
+    deleted = await ai_productivity_service.invalidate_cached_analyses(db, employee_id)
+    return {"message": "AI analysis cache invalidated", "deleted": deleted}
+
+@router.get("/ai-productivity/jobs/{job_id}")
+async def get_ai_productivity_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_hr),
+    db = Depends(get_database)
+):
+    """Poll an AI productivity analysis job; `result` is set once status is completed"""
+    from app.services.ai_analysis_jobs import ai_analysis_jobs, serialize_job
+    
+    job = await ai_analysis_jobs.get(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return serialize_job(job)
     
 # ============= OVERRIDE REQUEST ENDPOINTS (NEW) =============
 
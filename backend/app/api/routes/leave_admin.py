@@ -8,7 +8,7 @@ from app.schemas.leave_type import (
 )
 from app.schemas.public_holiday import (
     PublicHolidayCreate, PublicHolidayUpdate, PublicHolidayBulkImport,
-    PublicHolidayResponse, PublicHolidayList
+    PublicHolidayMultiImport, PublicHolidayResponse, PublicHolidayList
 )
 from app.schemas.leave_policy import (
     LeavePolicyCreate, LeavePolicyUpdate, LeavePolicyResponse
@@ -232,6 +232,27 @@ async def import_holidays(
         "imported_count": imported_count
     }
 
+@router.post("/holidays/import/bulk")
+async def import_holidays_bulk(
+    import_data: PublicHolidayMultiImport,
+    current_user: dict = Depends(get_current_super_admin),
+    db = Depends(get_database)
+):
+    """Import public holidays for several countries/years in one call; returns what changed per country"""
+    leave_service = LeaveService(db)
+    
+    diff = await leave_service.import_holidays(
+        [(item.country, item.year) for item in import_data.imports],
+        admin_id=str(current_user["_id"])
+    )
+    
+    imported_count = sum(len(country_diff["added"]) for country_diff in diff.values())
+    return {
+        "message": f"Successfully imported {imported_count} holidays",
+        "imported_count": imported_count,
+        "countries": diff
+    }
+
 @router.get("/holidays", response_model=PublicHolidayList)
 async def get_holidays(
     year: int = Query(..., description="Year to fetch holidays"),
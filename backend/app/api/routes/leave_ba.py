@@ -78,7 +78,8 @@ async def apply_for_leave(
         cancelled_by=leave_request.get("cancelled_by"),
         cancelled_at=leave_request.get("cancelled_at"),
         cancelled_reason=leave_request.get("cancelled_reason"),
-        requested_at=leave_request["requested_at"]
+        requested_at=leave_request["requested_at"],
+        capacity_breach_dates=leave_request.get("capacity_breach_dates", [])
     )
 
 @router.get("/balance")
@@ -171,7 +172,8 @@ async def get_leave_history(
                 cancelled_by=req.get("cancelled_by"),
                 cancelled_at=req.get("cancelled_at"),
                 cancelled_reason=req.get("cancelled_reason"),
-                requested_at=req["requested_at"]
+                requested_at=req["requested_at"],
+                capacity_breach_dates=req.get("capacity_breach_dates", [])
             )
             for req in paginated_requests
         ]
@@ -85,7 +85,8 @@ async def apply_for_leave(
         cancelled_by=leave_request.get("cancelled_by"),
         cancelled_at=leave_request.get("cancelled_at"),
         cancelled_reason=leave_request.get("cancelled_reason"),
-        requested_at=leave_request["requested_at"]
+        requested_at=leave_request["requested_at"],
+        capacity_breach_dates=leave_request.get("capacity_breach_dates", [])
     )
 
 # ==================== LEAVE BALANCE ====================
@@ -185,7 +186,8 @@ async def get_my_leave_history(
                 cancelled_by=req.get("cancelled_by"),
                 cancelled_at=req.get("cancelled_at"),
                 cancelled_reason=req.get("cancelled_reason"),
-                requested_at=req["requested_at"]
+                requested_at=req["requested_at"],
+                capacity_breach_dates=req.get("capacity_breach_dates", [])
             )
             for req in paginated_requests
         ]
@@ -244,7 +246,8 @@ async def get_my_leave_request_details(
         cancelled_by=request.get("cancelled_by"),
         cancelled_at=request.get("cancelled_at"),
         cancelled_reason=request.get("cancelled_reason"),
-        requested_at=request["requested_at"]
+        requested_at=request["requested_at"],
+        capacity_breach_dates=request.get("capacity_breach_dates", [])
     )
 
 # ==================== CANCEL LEAVE ====================
@@ -300,9 +303,7 @@ async def get_team_leave_calendar(
             detail="Start date must be before end date"
         )
     
-    # Convert date to datetime for MongoDB query
-    start_datetime = datetime.combine(start_date, datetime.min.time())
-    end_datetime = datetime.combine(end_date, datetime.max.time())
+    leave_service = LeaveService(db)
     
     # Get employee's team_lead_id
     team_lead_id = current_user.get("reporting_to")
@@ -310,31 +311,10 @@ async def get_team_leave_calendar(
     
     calendar_events = []
     
-    # Build query to get relevant leaves
-    leave_query = {
-        "status": "approved",
-        "start_date": {"$lte": end_datetime},
-        "end_date": {"$gte": start_datetime}
-    }
-
-    # Include both team members' leaves AND user's own leaves
-    if team_lead_id:
-        # User has a team - show team members' leaves OR user's own leaves
-        leave_query["$or"] = [
-            {"team_lead_id": team_lead_id},
-            {"user_id": user_id}
-        ]
-    else:
-        # User has no team - show only their own leaves
-        leave_query["user_id"] = user_id
-
-    # 🔍 DEBUG: Print the query
-    print(f"🔍 DEBUG - User ID: {user_id}")
-    print(f"🔍 DEBUG - Team Lead ID: {team_lead_id}")
-    print(f"🔍 DEBUG - Leave Query: {leave_query}")
-
-    cursor = db.leave_requests.find(leave_query).sort("start_date", 1)
-    leaves = await cursor.to_list(length=None)
+    # Team members' leaves plus the user's own (only their own if they have no team)
+    leaves = await leave_service.get_approved_leaves_between(
+        start_date, end_date, team_lead_id=team_lead_id, user_id=user_id
+    )
 
     # 🔍 DEBUG: Print results
     print(f"🔍 DEBUG - Found {len(leaves)} leaves")
@@ -357,12 +337,7 @@ async def get_team_leave_calendar(
         })
     
     # Get public holidays in date range
-    holiday_cursor = db.public_holidays.find({
-        "date": {"$gte": start_datetime, "$lte": end_datetime},
-        "is_active": True
-    }).sort("date", 1)
-    
-    holidays = await holiday_cursor.to_list(length=None)
+    holidays = await leave_service.get_holidays_between(start_date, end_date)
     
     for holiday in holidays:
         calendar_events.append({
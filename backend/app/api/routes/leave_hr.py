@@ -1,14 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from typing import List, Optional
 from app.core.database import get_database
-from app.api.deps import get_current_hr
+from app.api.deps import get_current_hr, get_batch_loader
+from app.services.batch_loader import BatchLoader
 from app.schemas.leave_request import (
     LeaveRequestResponse, LeaveRequestList, LeaveRequestStats,
     LeaveRequestApprove, LeaveRequestReject
 )
-from app.schemas.leave_balance import LeaveBalanceResponse, LeaveBalanceSummary, LeaveAllocationRequest
+from app.schemas.leave_balance import LeaveBalanceResponse, LeaveBalanceSummary, LeaveAllocationRequest, LeaveRolloverRequest
 from app.schemas.leave_type import LeaveTypeResponse 
 from app.services.leave_service import LeaveService
+from app.services.leave_absence_index import LeaveAbsenceIndexService
+from app.services.leave_rollover import leave_rollover_jobs, serialize_rollover_job
+from app.services.team_capacity import TeamCapacityService, MAX_RANGE_DAYS
 from bson import ObjectId
 from datetime import datetime, date, time
 
@@ -21,7 +25,8 @@ async def get_pending_approvals(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     current_user: dict = Depends(get_current_hr),
-    db = Depends(get_database)
+    db = Depends(get_database),
+    loader: BatchLoader = Depends(get_batch_loader)
 ):
     """Get all pending leave requests for HR approval"""
     
@@ -35,17 +40,22 @@ async def get_pending_approvals(
     requests_cursor = db.leave_requests.find(filters).sort("requested_at", 1).skip(skip).limit(limit)
     raw_requests = await requests_cursor.to_list(length=None)
     
+    # Batch-load users, their team leads and leave types (one query each)
+    users = await loader.load_many("users", [req["user_id"] for req in raw_requests])
+    await loader.load_many("users", [u.get("team_lead_id") for u in users.values() if u])
+    await loader.load_many("leave_types", [req["leave_type_code"] for req in raw_requests], field="code")
+    
     # Enrich with user and leave type details
     enriched_requests = []
     for req in raw_requests:
         # Get user details
-        user = await db.users.find_one({"_id": ObjectId(req["user_id"])})
+        user = loader.get("users", req["user_id"])
         user_name = user["full_name"] if user else "Unknown User"
         user_email = user.get("email", "") if user else ""
         user_role = user.get("role", "") if user else ""
         
         # Get leave type details
-        leave_type = await db.leave_types.find_one({"code": req["leave_type_code"]})
+        leave_type = loader.get("leave_types", req["leave_type_code"], field="code")
         leave_type_name = leave_type["name"] if leave_type else req["leave_type_code"]
         leave_type_color = leave_type.get("color", "#3b82f6") if leave_type else "#3b82f6"
         
@@ -53,7 +63,7 @@ async def get_pending_approvals(
         team_lead_id = user.get("team_lead_id") if user else None
         team_lead_name = None
         if team_lead_id:
-            team_lead = await db.users.find_one({"_id": ObjectId(team_lead_id)})
+            team_lead = loader.get("users", team_lead_id)
             team_lead_name = team_lead["full_name"] if team_lead else None
         
         enriched_requests.append(
@@ -86,7 +96,8 @@ async def get_pending_approvals(
                 cancelled_by=req.get("cancelled_by"),
                 cancelled_at=req.get("cancelled_at"),
                 cancelled_reason=req.get("cancelled_reason"),
-                requested_at=req["requested_at"]
+                requested_at=req["requested_at"],
+                capacity_breach_dates=req.get("capacity_breach_dates", [])
             )
         )
     
@@ -151,7 +162,8 @@ async def approve_leave_request(
         cancelled_by=approved_request.get("cancelled_by"),
         cancelled_at=approved_request.get("cancelled_at"),
         cancelled_reason=approved_request.get("cancelled_reason"),
-        requested_at=approved_request["requested_at"]
+        requested_at=approved_request["requested_at"],
+        capacity_breach_dates=approved_request.get("capacity_breach_dates", [])
     )
 
 @router.post("/requests/{request_id}/reject", response_model=LeaveRequestResponse)
@@ -210,7 +222,8 @@ async def reject_leave_request(
         cancelled_by=rejected_request.get("cancelled_by"),
         cancelled_at=rejected_request.get("cancelled_at"),
         cancelled_reason=rejected_request.get("cancelled_reason"),
-        requested_at=rejected_request["requested_at"]
+        requested_at=rejected_request["requested_at"],
+        capacity_breach_dates=rejected_request.get("capacity_breach_dates", [])
     )
 
 # ==================== ALL LEAVE REQUESTS ====================
@@ -224,7 +237,8 @@ async def get_all_leave_requests(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     current_user: dict = Depends(get_current_hr),
-    db = Depends(get_database)
+    db = Depends(get_database),
+    loader: BatchLoader = Depends(get_batch_loader)
 ):
     """Get all leave requests with filters"""
     
@@ -249,17 +263,22 @@ async def get_all_leave_requests(
     requests_cursor = db.leave_requests.find(filters).sort("requested_at", -1).skip(skip).limit(limit)
     raw_requests = await requests_cursor.to_list(length=None)
     
+    # Batch-load users, their team leads and leave types (one query each)
+    users = await loader.load_many("users", [req["user_id"] for req in raw_requests])
+    await loader.load_many("users", [u.get("team_lead_id") for u in users.values() if u])
+    await loader.load_many("leave_types", [req["leave_type_code"] for req in raw_requests], field="code")
+    
     # Enrich with user and leave type details
     enriched_requests = []
     for req in raw_requests:
         # Get user details
-        user = await db.users.find_one({"_id": ObjectId(req["user_id"])})
+        user = loader.get("users", req["user_id"])
         user_name = user["full_name"] if user else "Unknown User"
         user_email = user.get("email", "") if user else ""
         user_role = user.get("role", "") if user else ""
         
         # Get leave type details
-        leave_type = await db.leave_types.find_one({"code": req["leave_type_code"]})
+        leave_type = loader.get("leave_types", req["leave_type_code"], field="code")
         leave_type_name = leave_type["name"] if leave_type else req["leave_type_code"]
         leave_type_color = leave_type.get("color", "#3b82f6") if leave_type else "#3b82f6"
         
@@ -267,7 +286,7 @@ async def get_all_leave_requests(
         team_lead_id = user.get("team_lead_id") if user else None
         team_lead_name = None
         if team_lead_id:
-            team_lead = await db.users.find_one({"_id": ObjectId(team_lead_id)})
+            team_lead = loader.get("users", team_lead_id)
             team_lead_name = team_lead["full_name"] if team_lead else None
         
         enriched_requests.append(
@@ -300,7 +319,8 @@ async def get_all_leave_requests(
                 cancelled_by=req.get("cancelled_by"),
                 cancelled_at=req.get("cancelled_at"),
                 cancelled_reason=req.get("cancelled_reason"),
-                requested_at=req["requested_at"]
+                requested_at=req["requested_at"],
+                capacity_breach_dates=req.get("capacity_breach_dates", [])
             )
         )
     
@@ -356,7 +376,8 @@ async def get_leave_request_details(
         cancelled_by=request.get("cancelled_by"),
         cancelled_at=request.get("cancelled_at"),
         cancelled_reason=request.get("cancelled_reason"),
-        requested_at=request["requested_at"]
+        requested_at=request["requested_at"],
+        capacity_breach_dates=request.get("capacity_breach_dates", [])
     )
 
 # ==================== LEAVE STATISTICS ====================
@@ -375,7 +396,9 @@ async def get_leave_statistics(
         pending_count=stats["pending_count"],
         approved_today_count=stats["approved_today_count"],
         on_leave_today_count=stats["on_leave_today_count"],
-        total_requests=stats["total_requests"]
+        total_requests=stats["total_requests"],
+        by_status=stats["by_status"],
+        by_type=stats["by_type"]
     )
 
 @router.get("/on-leave-today")
@@ -405,6 +428,27 @@ async def get_employees_on_leave_today(
         ]
     }
 
+@router.post("/absence-index/rebuild")
+async def rebuild_absence_index(
+    start_date: Optional[date] = Query(None, description="First day to rebuild (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Last day to rebuild (YYYY-MM-DD)"),
+    current_user: dict = Depends(get_current_hr),
+    db = Depends(get_database)
+):
+    """
+    Rebuild the per-day absence index from approved leave requests.
+    Safe to re-run; omit both dates to rebuild everything.
+    """
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="Start date must be before end date")
+    
+    stats = await LeaveAbsenceIndexService(db).rebuild(start_date=start_date, end_date=end_date)
+    
+    return {
+        "message": "Absence index rebuilt successfully",
+        **stats
+    }
+
 # ==================== LEAVE BALANCE MANAGEMENT ====================
 
 @router.post("/allocate-leaves")
@@ -473,6 +517,43 @@ async def allocate_leaves_to_employee(
         }
     }
 
+@router.post("/balances/rollover", status_code=status.HTTP_202_ACCEPTED)
+async def start_balance_rollover(
+    rollover_data: LeaveRolloverRequest,
+    current_user: dict = Depends(get_current_hr),
+    db = Depends(get_database)
+):
+    """
+    Allocate the year's leave balances to every active user from the policy
+    (carry-forward included). Runs in the background; safe to re-run, and
+    re-running a failed or interrupted year resumes where it stopped.
+    """
+    try:
+        job = await leave_rollover_jobs.start(db, rollover_data.year, requested_by=str(current_user["_id"]))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return serialize_rollover_job(job)
+
+@router.get("/balances/rollover/{year}")
+async def get_balance_rollover(
+    year: int,
+    current_user: dict = Depends(get_current_hr),
+    db = Depends(get_database)
+):
+    """Progress of a year's balance rollover"""
+    job = await leave_rollover_jobs.get(db, year)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No balance rollover found for {year}"
+        )
+    
+    return serialize_rollover_job(job)
+
 @router.get("/balances/{user_id}")
 async def get_employee_leave_balances(
     user_id: str,
@@ -545,18 +626,10 @@ async def get_company_leave_calendar(
             detail="Start date must be before end date"
         )
     
-    # Convert date to datetime for MongoDB compatibility
-    start_datetime = datetime.combine(start_date, time.min)
-    end_datetime = datetime.combine(end_date, time.max)
+    leave_service = LeaveService(db)
     
     # ==================== GET APPROVED LEAVES ====================
-    leaves_cursor = db.leave_requests.find({
-        "status": "approved",
-        "start_date": {"$lte": end_datetime},
-        "end_date": {"$gte": start_datetime}
-    }).sort("start_date", 1)
-    
-    leaves = await leaves_cursor.to_list(length=None)
+    leaves = await leave_service.get_approved_leaves_between(start_date, end_date)
     
     calendar_events = []
     
@@ -583,16 +656,7 @@ async def get_company_leave_calendar(
         })
     
     # ==================== GET PUBLIC HOLIDAYS ====================
-    # FIXED: Use datetime objects for MongoDB query
-    holidays_cursor = db.public_holidays.find({
-        "is_active": True,
-        "date": {
-            "$gte": start_datetime,  # ← Changed from start_date
-            "$lte": end_datetime      # ← Changed from end_date
-        }
-    }).sort("date", 1)
-    
-    holidays = await holidays_cursor.to_list(length=None)
+    holidays = await leave_service.get_holidays_between(start_date, end_date)
     
     # Add public holidays
     for holiday in holidays:
@@ -619,6 +683,51 @@ async def get_company_leave_calendar(
         "events": calendar_events
     }
     
+@router.get("/team-capacity")
+async def get_team_capacity(
+    start_date: date = Query(..., description="Start date"),
+    end_date: date = Query(..., description="End date"),
+    team_id: Optional[str] = Query(None, description="Single team (default: all active teams)"),
+    current_user: dict = Depends(get_current_hr),
+    db = Depends(get_database)
+):
+    """Per-day available headcount per team, with max concurrent absences and understaffed days"""
+    
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Start date must be before end date"
+        )
+    if (end_date - start_date).days + 1 > MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range cannot exceed {MAX_RANGE_DAYS} days"
+        )
+    
+    if team_id:
+        if not ObjectId.is_valid(team_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid team ID"
+            )
+        team = await db.teams.find_one({"_id": ObjectId(team_id)})
+        if not team:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Team not found"
+            )
+        teams = [team]
+    else:
+        teams = await db.teams.find({"is_active": {"$ne": False}}).to_list(length=None)
+    
+    capacity = await TeamCapacityService(db).teams_capacity(teams, start_date, end_date)
+    
+    return {
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "teams": capacity
+    }
+
 # ==================== LEAVE TYPES (READ-ONLY FOR HR) ====================
 
 @router.get("/leave-types", response_model=List[LeaveTypeResponse])
@@ -7,6 +7,7 @@ from app.schemas.leave_request import (
 )
 from app.schemas.leave_balance import LeaveBalanceResponse, LeaveBalanceSummary
 from app.services.leave_service import LeaveService
+from app.services.team_capacity import TeamCapacityService, MAX_RANGE_DAYS
 from bson import ObjectId
 from datetime import datetime, date
 
@@ -72,7 +73,8 @@ async def get_team_leave_requests(
                 cancelled_by=req.get("cancelled_by"),
                 cancelled_at=req.get("cancelled_at"),
                 cancelled_reason=req.get("cancelled_reason"),
-                requested_at=req["requested_at"]
+                requested_at=req["requested_at"],
+                capacity_breach_dates=req.get("capacity_breach_dates", [])
             )
             for req in paginated_requests
         ]
@@ -131,7 +133,8 @@ async def get_team_leave_request_details(
         cancelled_by=request.get("cancelled_by"),
         cancelled_at=request.get("cancelled_at"),
         cancelled_reason=request.get("cancelled_reason"),
-        requested_at=request["requested_at"]
+        requested_at=request["requested_at"],
+        capacity_breach_dates=request.get("capacity_breach_dates", [])
     )
 
 @router.get("/team-calendar")
@@ -149,27 +152,15 @@ async def get_team_leave_calendar(
             detail="Start date must be before end date"
         )
     
-    # Convert date to datetime for MongoDB query
-    start_datetime = datetime.combine(start_date, datetime.min.time())
-    end_datetime = datetime.combine(end_date, datetime.max.time())
-    
+    leave_service = LeaveService(db)
     team_lead_id = str(current_user["_id"])
     
     calendar_events = []
     
-    # Build query to get relevant leaves (team members + TL's own leaves)
-    leave_query = {
-        "status": "approved",
-        "start_date": {"$lte": end_datetime},
-        "end_date": {"$gte": start_datetime},
-        "$or": [
-            {"team_lead_id": team_lead_id},  # Team members' leaves
-            {"user_id": team_lead_id}         # TL's own leaves
-        ]
-    }
-    
-    cursor = db.leave_requests.find(leave_query).sort("start_date", 1)
-    leaves = await cursor.to_list(length=None)
+    # Relevant leaves: team members' + TL's own
+    leaves = await leave_service.get_approved_leaves_between(
+        start_date, end_date, team_lead_id=team_lead_id, user_id=team_lead_id
+    )
     
     for leave in leaves:
         is_own_leave = leave["user_id"] == team_lead_id
@@ -190,12 +181,7 @@ async def get_team_leave_calendar(
         })
     
     # Get public holidays in date range
-    holiday_cursor = db.public_holidays.find({
-        "date": {"$gte": start_datetime, "$lte": end_datetime},
-        "is_active": True
-    }).sort("date", 1)
-    
-    holidays = await holiday_cursor.to_list(length=None)
+    holidays = await leave_service.get_holidays_between(start_date, end_date)
     
     for holiday in holidays:
         calendar_events.append({
@@ -216,6 +202,35 @@ async def get_team_leave_calendar(
         "has_team": True
     }
 
+@router.get("/team-capacity")
+async def get_team_capacity(
+    start_date: date = Query(..., description="Start date"),
+    end_date: date = Query(..., description="End date"),
+    current_user: dict = Depends(get_current_team_lead),
+    db = Depends(get_database)
+):
+    """Per-day available headcount of the team lead's teams, with max concurrent absences and understaffed days"""
+    
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Start date must be before end date"
+        )
+    if (end_date - start_date).days + 1 > MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range cannot exceed {MAX_RANGE_DAYS} days"
+        )
+    
+    teams = await db.teams.find({"team_lead_id": str(current_user["_id"]), "is_active": {"$ne": False}}).to_list(length=None)
+    capacity = await TeamCapacityService(db).teams_capacity(teams, start_date, end_date)
+    
+    return {
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "teams": capacity
+    }
+
 @router.get("/team-members-balances")
 async def get_team_members_leave_balances(
     year: int = Query(..., description="Year"),
@@ -317,7 +332,8 @@ async def apply_for_leave(
         cancelled_by=leave_request.get("cancelled_by"),
         cancelled_at=leave_request.get("cancelled_at"),
         cancelled_reason=leave_request.get("cancelled_reason"),
-        requested_at=leave_request["requested_at"]
+        requested_at=leave_request["requested_at"],
+        capacity_breach_dates=leave_request.get("capacity_breach_dates", [])
     )
 
 @router.get("/my-leave/balance")
@@ -408,7 +424,8 @@ async def get_my_leave_history(
                 cancelled_by=req.get("cancelled_by"),
                 cancelled_at=req.get("cancelled_at"),
                 cancelled_reason=req.get("cancelled_reason"),
-                requested_at=req["requested_at"]
+                requested_at=req["requested_at"],
+                capacity_breach_dates=req.get("capacity_breach_dates", [])
             )
             for req in paginated_requests
         ]
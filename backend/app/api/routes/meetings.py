@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from app.api.deps import get_current_ba, get_current_user, get_database
+from app.api.deps import get_current_ba, get_current_user, get_database, get_batch_loader
+from app.services.batch_loader import BatchLoader
 from app.schemas.meeting import (
     MeetingCreate, MeetingUpdate, MeetingResponse, MeetingDetailResponse,
     MeetingNotesUpdate, MeetingAttendeeCreate, MeetingAttendeeResponse,
@@ -199,7 +200,8 @@ async def get_meetings(
     project_id: Optional[str] = None,
     upcoming_only: bool = False,
     current_user: dict = Depends(get_current_ba),
-    db = Depends(get_database)
+    db = Depends(get_database),
+    loader: BatchLoader = Depends(get_batch_loader)
 ):
     """Get all meetings scheduled by current BA"""
     
@@ -217,11 +219,15 @@ async def get_meetings(
     
     meetings = await db.meetings.find(query).sort("scheduled_at", 1).to_list(length=None)
     
+    # Batch-load projects and clients (one query per collection)
+    await loader.load_many("projects", [m["project_id"] for m in meetings])
+    await loader.load_many("clients", [m["client_id"] for m in meetings])
+    
     result = []
     for meeting in meetings:
         # Get project and client details
-        project = await get_project_details(meeting["project_id"], db)
-        client = await get_client_details(meeting["client_id"], db)
+        project = loader.get("projects", meeting["project_id"])
+        client = loader.get("clients", meeting["client_id"])
         
         # Get milestone name if exists
         milestone_name = None
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from app.core.database import get_database
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_batch_loader
+from app.services.batch_loader import BatchLoader
 from app.schemas.message import MessageCreate, MessageResponse
 from bson import ObjectId
 from datetime import datetime
@@ -10,19 +11,31 @@ router = APIRouter()
 @router.get("/my-messages")
 async def get_my_messages(
     current_user: dict = Depends(get_current_user),
-    db = Depends(get_database)
+    db = Depends(get_database),
+    loader: BatchLoader = Depends(get_batch_loader)
 ):
     """Get all messages for current user (both received and sent)"""
     messages = []
     
     # Get received messages
-    received_cursor = db.messages.find({
+    received = await db.messages.find({
         "to_user": str(current_user["_id"])
-    }).sort("created_at", -1)
+    }).sort("created_at", -1).to_list(length=None)
     
-    async for message in received_cursor:
+    # Get sent messages
+    sent = await db.messages.find({
+        "from_user": str(current_user["_id"])
+    }).sort("created_at", -1).to_list(length=None)
+    
+    # Batch-load senders and recipients in one query
+    await loader.load_many(
+        "users",
+        [m["from_user"] for m in received] + [m["to_user"] for m in sent]
+    )
+    
+    for message in received:
         # Get sender info
-        sender = await db.users.find_one({"_id": ObjectId(message["from_user"])})
+        sender = loader.get("users", message["from_user"])
         
         messages.append({
             "id": str(message["_id"]),
@@ -36,14 +49,9 @@ async def get_my_messages(
             "direction": "received"  # <<< THIS IS NEW
         })
     
-    # Get sent messages
-    sent_cursor = db.messages.find({
-        "from_user": str(current_user["_id"])
-    }).sort("created_at", -1)
-    
-    async for message in sent_cursor:
+    for message in sent:
         # Get recipient info
-        recipient = await db.users.find_one({"_id": ObjectId(message["to_user"])})
+        recipient = loader.get("users", message["to_user"])
         
         messages.append({
             "id": str(message["_id"]),
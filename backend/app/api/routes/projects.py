@@ -4,8 +4,10 @@ from app.api.deps import (
     get_current_team_lead_or_hr, 
     get_current_user, 
     get_database, 
+    get_batch_loader,
     verify_project_access
 )
+from app.services.batch_loader import BatchLoader
 from app.schemas.project import (
     ProjectCreate, ProjectUpdate, ProjectResponse, ProjectDetailResponse,
     ProjectStatusUpdate, ProjectProgressUpdate, ProjectDocumentUpload,
@@ -183,7 +185,8 @@ async def get_projects(
     status_filter: Optional[str] = None,
     team_id: Optional[str] = None,
     current_user: dict = Depends(get_current_user),
-    db = Depends(get_database)
+    db = Depends(get_database),
+    loader: BatchLoader = Depends(get_batch_loader)
 ):
     """
     Get projects based on user role:
@@ -215,16 +218,18 @@ async def get_projects(
     
     projects = await db.projects.find(query).sort("created_at", -1).to_list(length=None)
     
+    # Batch-load team leads, creators and teams (one query per collection)
+    await loader.load_many(
+        "users",
+        [p["assigned_to_team_lead"] for p in projects] + [p["created_by"] for p in projects]
+    )
+    await loader.load_many("teams", [p["team_id"] for p in projects])
+    
     result = []
     for project in projects:
-        # Get team lead details
-        team_lead = await get_user_details(project["assigned_to_team_lead"], db)
-        
-        # Get team details
-        team = await get_team_details(project["team_id"], db)
-        
-        # Get creator details
-        creator = await get_user_details(project["created_by"], db)
+        team_lead = loader.get("users", project["assigned_to_team_lead"])
+        team = loader.get("teams", project["team_id"])
+        creator = loader.get("users", project["created_by"])
         
         result.append(ProjectResponse(
             id=str(project["_id"]),
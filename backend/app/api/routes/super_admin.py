@@ -1,7 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from app.api.deps import get_current_super_admin, get_database
+from app.api.deps import get_current_super_admin, get_database, get_batch_loader
+from app.services.batch_loader import BatchLoader
 from app.schemas.user import UserCreate, UserResponse, UserUpdate
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async, cpu_executor
+from app.core.user_cache import user_cache
+from app.core.indexes import ensure_indexes, index_status, find_unused_indexes, explain_hot_queries
 from bson import ObjectId
 from typing import List, Optional
 from datetime import datetime
@@ -128,7 +131,7 @@ async def create_hr_account(
     new_user = {
         "email": user_data.email,
         "full_name": user_data.full_name,
-        "hashed_password": get_password_hash(user_data.password),
+        "hashed_password": await get_password_hash_async(user_data.password),
         "role": "hr",
         "is_active": True,
         "created_by": str(current_user["_id"]),
@@ -189,7 +192,7 @@ async def create_super_admin_account(
     new_user = {
         "email": user_data.email,
         "full_name": user_data.full_name,
-        "hashed_password": get_password_hash(user_data.password),
+        "hashed_password": await get_password_hash_async(user_data.password),
         "role": "super_admin",
         "is_active": True,
         "created_by": str(current_user["_id"]),
@@ -272,7 +275,7 @@ async def create_employee_account(
     new_user = {
         "email": user_data.email,
         "full_name": user_data.full_name,
-        "hashed_password": get_password_hash(user_data.password),
+        "hashed_password": await get_password_hash_async(user_data.password),
         "role": "employee",
         "is_active": True,
         "created_by": str(current_user["_id"]),
@@ -380,7 +383,7 @@ async def create_team_lead_account(
     new_user = {
         "email": user_data.email,
         "full_name": user_data.full_name,
-        "hashed_password": get_password_hash(user_data.password),
+        "hashed_password": await get_password_hash_async(user_data.password),
         "role": "team_lead",
         "is_active": True,
         "created_by": str(current_user["_id"]),
@@ -454,7 +457,7 @@ async def create_business_analyst_account(
     new_user = {
         "email": user_data.email,
         "full_name": user_data.full_name,
-        "hashed_password": get_password_hash(user_data.password),
+        "hashed_password": await get_password_hash_async(user_data.password),
         "role": "business_analyst",
         "is_active": True,
         "created_by": str(current_user["_id"]),
@@ -677,6 +680,7 @@ async def update_user(
             {"_id": ObjectId(user_id)},
             {"$set": update_data}
         )
+        await user_cache.invalidate(user_id)
         
         # Create audit log
         await create_audit_log(
@@ -729,11 +733,12 @@ async def reset_user_password(
         )
     
     # Update password
-    new_hashed_password = get_password_hash(reset_data.new_password)
+    new_hashed_password = await get_password_hash_async(reset_data.new_password)
     await db.users.update_one(
         {"_id": ObjectId(user_id)},
         {"$set": {"hashed_password": new_hashed_password}}
     )
+    await user_cache.invalidate(user_id)
     
     # Create audit log
     await create_audit_log(
@@ -788,6 +793,7 @@ async def delete_user(
     
     # Delete user
     await db.users.delete_one({"_id": ObjectId(user_id)})
+    await user_cache.invalidate(user_id)
     
     return {"message": "User deleted successfully"}
 
@@ -887,6 +893,7 @@ async def approve_override_request(
             {"_id": ObjectId(user_id)},
             {"$set": {"role": new_role}}
         )
+        await user_cache.invalidate(user_id)
         
         # Create audit log
         await create_audit_log(
@@ -971,7 +978,8 @@ async def get_audit_logs(
     user_id: Optional[str] = None,
     limit: int = 100,
     current_user: dict = Depends(get_current_super_admin),
-    db = Depends(get_database)
+    db = Depends(get_database),
+    loader: BatchLoader = Depends(get_batch_loader)
 ):
     """Get audit logs with optional filters"""
     
@@ -987,6 +995,12 @@ async def get_audit_logs(
     
     logs = await db.audit_logs.find(query).sort("timestamp", -1).limit(limit).to_list(length=None)
     
+    # Batch-load performers and target users in one query
+    await loader.load_many(
+        "users",
+        [log.get("performed_by") or log.get("user_id") for log in logs] + [log.get("target_user") for log in logs]
+    )
+    
     result = []
     for log in logs:
         # Handle both old and new field names
@@ -994,24 +1008,20 @@ async def get_audit_logs(
         performer_name = log.get("performer_name") or log.get("user_name") or "Unknown"
         user_role = log.get("user_role", "unknown")
         
-        # Try to fetch user details if we have an ID
-        if performer_id:
-            try:
-                performer = await db.users.find_one({"_id": ObjectId(performer_id)})
-                if performer:
-                    performer_name = performer["full_name"]
-                    user_role = performer["role"]
-            except:
-                pass
+        # Use user details if we have an ID
+        performer = loader.get("users", performer_id)
+        if performer:
+            performer_name = performer["full_name"]
+            user_role = performer["role"]
         
         # Get target user details if exists
         target_user_name = None
         target_user_id = log.get("target_user")
         if target_user_id:
-            try:
-                target = await db.users.find_one({"_id": ObjectId(target_user_id)})
+            if ObjectId.is_valid(str(target_user_id)):
+                target = loader.get("users", target_user_id)
                 target_user_name = target["full_name"] if target else "Deleted User"
-            except:
+            else:
                 target_user_name = "Unknown"
         
         result.append({
@@ -1090,4 +1100,41 @@ async def get_system_stats(
         "pending_override_requests": pending_requests,
         "todays_logins": recent_logins,
         "total_teams": total_teams
-    }
\ No newline at end of file
+    }
+@router.get("/stats/user-cache")
+async def get_user_cache_stats(
+    current_user: dict = Depends(get_current_super_admin)
+):
+    """Hit/miss counters of the authenticated-user cache (per worker process)"""
+    return user_cache.stats()
+
+@router.get("/stats/cpu-executor")
+async def get_cpu_executor_stats(
+    current_user: dict = Depends(get_current_super_admin)
+):
+    """Pool size, queue depth and rejections of the blocking-CPU executor (per worker process)"""
+    return cpu_executor.stats()
+
+@router.get("/stats/indexes")
+async def get_index_report(
+    current_user: dict = Depends(get_current_super_admin),
+    db = Depends(get_database)
+):
+    """Index registry status, unused indexes and COLLSCAN check for hot queries (read-only)"""
+    report = await index_status(db)
+    plans = await explain_hot_queries(db)
+    
+    return {
+        **report,
+        "unused": await find_unused_indexes(db),
+        "hot_queries": plans,
+        "collscans": [plan["name"] for plan in plans if plan["collscan"]]
+    }
+
+@router.post("/indexes/ensure")
+async def ensure_registry_indexes(
+    current_user: dict = Depends(get_current_super_admin),
+    db = Depends(get_database)
+):
+    """Create registry indexes that are missing (startup does the same); may start index builds"""
+    return await ensure_indexes(db)
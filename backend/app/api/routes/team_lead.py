@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from app.api.deps import get_current_team_lead, get_current_user, get_database
+from app.core.user_cache import user_cache
 from app.schemas.project import ProjectResponse, ProjectDetailResponse
 from bson import ObjectId
 from typing import List, Optional
@@ -1151,6 +1152,7 @@ async def add_member_to_team(
         {"_id": ObjectId(employee_id)},
         {"$set": {"team_id": team_id}}
     )
+    await user_cache.invalidate(employee_id)
     
     # Update team member count
     updated_team = await db.teams.find_one({"_id": ObjectId(team_id)})
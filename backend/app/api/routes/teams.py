@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from app.api.deps import get_current_hr, get_current_team_lead, get_current_user, get_database, verify_team_access, get_current_super_admin
+from app.api.deps import get_current_hr, get_current_team_lead, get_current_user, get_database, verify_team_access, get_current_super_admin, get_batch_loader
+from app.services.batch_loader import BatchLoader
+from app.core.user_cache import user_cache
 from app.schemas.team import (
     TeamCreate, TeamUpdate, TeamResponse, TeamDetailResponse,
     TeamMemberAdd, TeamMemberRemove, TeamMemberResponse
@@ -59,6 +61,7 @@ async def update_user_team(user_id: str, team_id: Optional[str], team_lead_id: O
         {"_id": ObjectId(user_id)},
         {"$set": update_data}
     )
+    await user_cache.invalidate(user_id)
 
 async def add_team_to_lead(team_lead_id: str, team_id: str, db):
     """Add team to team lead's managed_teams"""
@@ -66,6 +69,7 @@ async def add_team_to_lead(team_lead_id: str, team_id: str, db):
         {"_id": ObjectId(team_lead_id)},
         {"$addToSet": {"managed_teams": team_id}}
     )
+    await user_cache.invalidate(team_lead_id)
 
 async def remove_team_from_lead(team_lead_id: str, team_id: str, db):
     """Remove team from team lead's managed_teams"""
@@ -73,6 +77,7 @@ async def remove_team_from_lead(team_lead_id: str, team_id: str, db):
         {"_id": ObjectId(team_lead_id)},
         {"$pull": {"managed_teams": team_id}}
     )
+    await user_cache.invalidate(team_lead_id)
 
 # ============= TEAM CRUD ENDPOINTS =============
 
@@ -190,7 +195,8 @@ async def create_team(
 async def get_teams(
     is_active: Optional[bool] = None,
     current_user: dict = Depends(get_current_user),
-    db = Depends(get_database)
+    db = Depends(get_database),
+    loader: BatchLoader = Depends(get_batch_loader)
 ):
     """
     Get teams based on user role:
@@ -226,13 +232,13 @@ async def get_teams(
     
     teams = await db.teams.find(query).to_list(length=None)
     
+    # Batch-load team leads and creators in one query
+    await loader.load_many("users", [t["team_lead_id"] for t in teams] + [t["created_by"] for t in teams])
+    
     result = []
     for team in teams:
-        # Get team lead details
-        team_lead = await get_user_details(team["team_lead_id"], db)
-        
-        # Get creator details
-        creator = await get_user_details(team["created_by"], db)
+        team_lead = loader.get("users", team["team_lead_id"])
+        creator = loader.get("users", team["created_by"])
         
         result.append(TeamResponse(
             id=str(team["_id"]),
@@ -389,6 +395,7 @@ async def update_team(
                 {"_id": ObjectId(member_id)},
                 {"$set": {"reporting_to": team_data.team_lead_id}}
             )
+        await user_cache.invalidate(*team.get("members", []))
         
         update_data["team_lead_id"] = team_data.team_lead_id
     
@@ -486,6 +493,7 @@ async def delete_team(
             {"_id": ObjectId(member_id)},
             {"$set": {"team_id": None, "reporting_to": None}}
         )
+    await user_cache.invalidate(*team.get("members", []))
     
     # Create audit log
     await db.audit_logs.insert_one({
@@ -15,6 +15,76 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
     
     GROQ_API_KEY: str = os.getenv("GROQ_API_KEY", "")
+    GROQ_BASE_URL: str = ""  # e.g. http://127.0.0.1:8765 for benchmarks/stub_llm_server.py
+    
+    # AI productivity analysis jobs: concurrent LLM calls per worker process and
+    # per-call timeout
+    AI_ANALYSIS_CONCURRENCY: int = 4
+    AI_ANALYSIS_TIMEOUT_SECONDS: float = 60.0
+    # How long a cached analysis for identical input stays valid (0 disables the cache)
+    AI_ANALYSIS_CACHE_TTL_HOURS: int = 168
+    
+    # Prompt compaction: apps listed individually before the long tail is
+    # bucketed by category, and the estimated token ceiling for the prompt
+    AI_PROMPT_TOP_APPS: int = 25
+    AI_PROMPT_TOKEN_BUDGET: int = 1500
+    
+    # Retrain the activity classifier after this many new classified activities
+    ML_RETRAIN_EVERY: int = 500
+    
+    # Fallback activity model (used when no classifier rule matches)
+    ML_TRAINING_MAX_SAMPLES: int = 200000
+    ML_TRAINING_WORKERS: int = 2
+    ML_MIN_CONFIDENCE: float = 0.7
+    ML_INFERENCE_BUDGET_US: int = 200  # per record, per classify batch
+    ML_MODEL_REFRESH_SECONDS: int = 60  # how often workers look for a newer stored model
+    
+    # Activity session storage: "merge" (read-modify-write of the applications list)
+    # or "atomic" ($inc per-app counters in a single upsert)
+    ACTIVITY_STORAGE_MODE: str = "merge"
+    
+    # Serve app breakdown / AI productivity data from the daily `activity_rollups`
+    # collection (run POST /api/hr/activity-rollups/backfill once before enabling)
+    ACTIVITY_ROLLUPS_ENABLED: bool = False
+
+    # Cache of authenticated user documents used by get_current_user
+    # (TTL 0 disables it). Backend "memory" is per-process; "redis" is shared
+    # across workers and needs USER_CACHE_REDIS_URL
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 5000
+    USER_CACHE_BACKEND: str = "memory"
+    USER_CACHE_REDIS_URL: str = ""
+
+    # Create/verify the indexes declared in app/core/indexes.py at startup
+    ENSURE_INDEXES_ON_STARTUP: bool = True
+
+    # Thread pool for blocking CPU work (bcrypt hashing/verification) and the
+    # number of callers allowed to wait for it before requests get a 503
+    CPU_EXECUTOR_WORKERS: int = 4
+    CPU_EXECUTOR_MAX_QUEUE: int = 500
+
+    # How long a worker keeps leave reference data (leave types, policies,
+    # holidays) and the working-day calendars built from it; writes made
+    # through another worker show up after at most this long (0 disables)
+    LEAVE_CACHE_TTL_SECONDS: int = 60
+    # HR leave dashboard counts; also dropped on every request status change
+    LEAVE_STATS_CACHE_TTL_SECONDS: int = 30
+
+    # Serve leave calendars and "on leave today" from the per-day
+    # `leave_absence_days` index (run POST /api/hr/leave/absence-index/rebuild
+    # once before enabling; approvals and cancellations keep it current)
+    LEAVE_ABSENCE_INDEX_ENABLED: bool = False
+
+    # Users per bulk write when allocating a new year's leave balances
+    LEAVE_ROLLOVER_CHUNK_SIZE: int = 500
+
+    # Team capacity: a working day is understaffed when the share of members
+    # not on (approved or pending) leave drops below this; a team document's
+    # own `min_available_ratio` overrides it. New leave requests record the
+    # understaffed days they would cause in `capacity_breach_dates`
+    TEAM_MIN_AVAILABLE_RATIO: float = 0.5
+    # Run the capacity check when a leave request is submitted (flags only, never blocks)
+    TEAM_CAPACITY_CHECK_ENABLED: bool = True
 
     class Config:
         env_file = ".env"
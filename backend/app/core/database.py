@@ -1,5 +1,6 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from .config import settings
+from .indexes import ensure_indexes
 
 class Database:
     client: AsyncIOMotorClient = None
@@ -17,6 +18,23 @@ async def connect_to_mongo():
         print("Connection Unsuccessfull")
     
 
+async def verify_indexes():
+    """Create missing registry indexes and log anything that needs attention"""
+    try:
+        report = await ensure_indexes(await get_database())
+    except Exception as e:
+        print(f"⚠️ Index verification skipped: {e}")
+        return
+
+    print(f"🗂️ Indexes: {len(report['existing'])} present, {len(report['created'])} created")
+    for label in report["created"]:
+        print(f"   ➕ created {label}")
+    for failure in report["failed"]:
+        print(f"   ❌ {failure}")
+    for label in report["unregistered"]:
+        print(f"   ❔ not in registry: {label}")
+    
+
 async def close_mongo_connection():
     db.client.close()
     print("Closed MongoDB connection")
\ No newline at end of file
@@ -0,0 +1,284 @@
+# backend/app/core/indexes.py
+
+from datetime import datetime
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+
+# ==================== INDEX REGISTRY ====================
+# One entry per collection. Each index is declared with an explicit name so
+# startup can tell "already there" from "missing" and report indexes that exist
+# in the database but are not declared here.
+
+INDEX_REGISTRY: Dict[str, List[dict]] = {
+    "users": [
+        {"name": "email_unique", "keys": [("email", ASCENDING)], "unique": True},
+        {"name": "role_active", "keys": [("role", ASCENDING), ("is_active", ASCENDING)]},
+    ],
+    "activities": [
+        # One document per (user, day, session); legacy documents without a
+        # session_number are left out so they can't block the index build
+        {
+            "name": "user_date_session_unique",
+            "keys": [("user_id", ASCENDING), ("date", ASCENDING), ("session_number", ASCENDING)],
+            "unique": True,
+            "partialFilterExpression": {"session_number": {"$exists": True}},
+        },
+        {"name": "user_recorded_at", "keys": [("user_id", ASCENDING), ("recorded_at", DESCENDING)]},
+        {"name": "email_recorded_at", "keys": [("employee_email", ASCENDING), ("recorded_at", ASCENDING)]},
+        # Day-by-day scans (rollup backfill)
+        {"name": "date_user", "keys": [("date", ASCENDING), ("user_id", ASCENDING)]},
+        # Newest rule-labelled activities for classifier training
+        {
+            "name": "classification_method_id",
+            "keys": [("classification.method", ASCENDING), ("_id", DESCENDING)],
+            "partialFilterExpression": {"classification.method": {"$exists": True}},
+        },
+    ],
+    "activity_rollups": [
+        {"name": "user_date_unique", "keys": [("user_id", ASCENDING), ("date", ASCENDING)], "unique": True},
+        {"name": "email_date", "keys": [("employee_email", ASCENDING), ("date", ASCENDING)]},
+    ],
+    "attendance": [
+        {"name": "user_date_status", "keys": [("user_id", ASCENDING), ("date", ASCENDING), ("status", ASCENDING)]},
+        {"name": "user_login_time", "keys": [("user_id", ASCENDING), ("login_time", DESCENDING)]},
+    ],
+    "leave_requests": [
+        {"name": "status_dates", "keys": [("status", ASCENDING), ("start_date", ASCENDING), ("end_date", ASCENDING)]},
+        {"name": "status_requested_at", "keys": [("status", ASCENDING), ("requested_at", ASCENDING)]},
+        {"name": "user_start_date", "keys": [("user_id", ASCENDING), ("start_date", DESCENDING)]},
+        # Backstop for the counter-based numbering; reported as failed (not
+        # fatal) while duplicates issued by the old count-based scheme remain
+        {"name": "request_number_unique", "keys": [("request_number", ASCENDING)], "unique": True},
+    ],
+    "leave_balances": [
+        {
+            "name": "user_year_type_unique",
+            "keys": [("user_id", ASCENDING), ("year", ASCENDING), ("leave_type_code", ASCENDING)],
+            "unique": True,
+        },
+    ],
+    "public_holidays": [
+        {"name": "date_country", "keys": [("date", ASCENDING), ("country", ASCENDING)]},
+        # Makes the import upsert on (date, country) idempotent under concurrent
+        # imports; manually created holidays (imported: False) are left out, so
+        # legacy manual duplicates can't block the build. Keys are in the other
+        # order so it doesn't clash with date_country's key pattern
+        {
+            "name": "country_date_imported_unique",
+            "keys": [("country", ASCENDING), ("date", ASCENDING)],
+            "unique": True,
+            "partialFilterExpression": {"imported": True},
+        },
+    ],
+    "ai_analysis_jobs": [
+        # At most one queued/running job per employee-month (see AIAnalysisJobQueue.submit)
+        {
+            "name": "key_active_unique",
+            "keys": [("key", ASCENDING)],
+            "unique": True,
+            "partialFilterExpression": {"active": True},
+        },
+    ],
+    "ai_analysis_cache": [
+        # TTL monitor removes entries once expires_at has passed
+        {"name": "expires_at_ttl", "keys": [("expires_at", ASCENDING)], "expireAfterSeconds": 0},
+        {"name": "employee_id", "keys": [("employee_id", ASCENDING)]},
+    ],
+    "audit_logs": [
+        {"name": "action_timestamp", "keys": [("action_type", ASCENDING), ("timestamp", DESCENDING)]},
+        {"name": "timestamp", "keys": [("timestamp", DESCENDING)]},
+    ],
+}
+
+
+# ==================== HOT QUERIES ====================
+# Representative shapes of the most frequent queries. explain_hot_queries()
+# runs each one and flags any whose winning plan falls back to a COLLSCAN.
+
+SAMPLE_DATETIME = datetime(2024, 1, 1)
+
+HOT_QUERIES: List[dict] = [
+    {
+        "name": "activity session upsert",
+        "collection": "activities",
+        "filter": {"user_id": "000000000000000000000000", "date": "2024-01-01", "session_number": 1},
+    },
+    {
+        "name": "activities by employee and time range",
+        "collection": "activities",
+        "filter": {"employee_email": "x@example.com", "recorded_at": {"$gte": SAMPLE_DATETIME}},
+        "sort": [("recorded_at", ASCENDING)],
+    },
+    {
+        "name": "latest productivity per employee (HR employee list)",
+        "collection": "activities",
+        "filter": {"user_id": {"$in": ["000000000000000000000000"]}, "recorded_at": {"$gte": SAMPLE_DATETIME}},
+        "sort": [("user_id", ASCENDING), ("recorded_at", DESCENDING)],
+    },
+    {
+        "name": "latest activity per user",
+        "collection": "activities",
+        "filter": {"user_id": "000000000000000000000000", "recorded_at": {"$gte": SAMPLE_DATETIME}},
+        "sort": [("recorded_at", ASCENDING)],
+    },
+    {
+        "name": "active attendance today",
+        "collection": "attendance",
+        "filter": {"user_id": "000000000000000000000000", "date": "2024-01-01", "status": "active"},
+    },
+    {
+        "name": "attendance last 7 days",
+        "collection": "attendance",
+        "filter": {"user_id": "000000000000000000000000", "login_time": {"$gte": SAMPLE_DATETIME}},
+    },
+    {
+        "name": "employees on leave today",
+        "collection": "leave_requests",
+        "filter": {"status": "approved", "start_date": {"$lte": SAMPLE_DATETIME}, "end_date": {"$gte": SAMPLE_DATETIME}},
+    },
+    {
+        "name": "pending leave approvals",
+        "collection": "leave_requests",
+        "filter": {"status": "pending"},
+        "sort": [("requested_at", ASCENDING)],
+    },
+    {
+        "name": "audit logs by action",
+        "collection": "audit_logs",
+        "filter": {"action_type": "login", "timestamp": {"$gte": SAMPLE_DATETIME}},
+    },
+    {
+        "name": "user by email",
+        "collection": "users",
+        "filter": {"email": "x@example.com"},
+    },
+]
+
+
+def _index_options(spec: dict) -> dict:
+    return {key: value for key, value in spec.items() if key != "keys"}
+
+
+def _same_keys(existing: dict, spec: dict) -> bool:
+    return [(k, int(v)) for k, v in existing["key"]] == list(spec["keys"])
+
+
+async def index_status(db) -> dict:
+    """
+    Compare the indexes in the database with INDEX_REGISTRY without changing
+    anything (safe for reporting endpoints).
+
+    Returns {"existing": [...], "missing": [...], "mismatched": [...], "unregistered": [...]}
+    with entries formatted as "collection.index_name"; "mismatched" are
+    same-named indexes whose keys differ from the registry.
+    """
+    report = {"existing": [], "missing": [], "mismatched": [], "unregistered": []}
+
+    for collection_name, specs in INDEX_REGISTRY.items():
+        present = await db[collection_name].index_information()
+        declared = {spec["name"] for spec in specs}
+
+        for spec in specs:
+            label = f"{collection_name}.{spec['name']}"
+            existing = present.get(spec["name"])
+            if not existing:
+                report["missing"].append(label)
+            elif _same_keys(existing, spec):
+                report["existing"].append(label)
+            else:
+                report["mismatched"].append(label)
+
+        for name in present:
+            if name != "_id_" and name not in declared:
+                report["unregistered"].append(f"{collection_name}.{name}")
+
+    return report
+
+
+async def ensure_indexes(db) -> dict:
+    """
+    Create every index in INDEX_REGISTRY that is missing and report the state.
+
+    Returns {"created": [...], "existing": [...], "failed": [...], "unregistered": [...]}
+    with entries formatted as "collection.index_name". A failure (e.g. duplicates
+    blocking a unique index, or a same-named index with different keys) is
+    reported instead of raised so the API still starts.
+    """
+    report = {"created": [], "existing": [], "failed": [], "unregistered": []}
+
+    for collection_name, specs in INDEX_REGISTRY.items():
+        collection = db[collection_name]
+        present = await collection.index_information()
+        declared = {spec["name"] for spec in specs}
+
+        for spec in specs:
+            label = f"{collection_name}.{spec['name']}"
+            existing = present.get(spec["name"])
+            if existing and _same_keys(existing, spec):
+                report["existing"].append(label)
+                continue
+            try:
+                await collection.create_index(spec["keys"], **_index_options(spec))
+                report["created"].append(label)
+            except OperationFailure as e:
+                report["failed"].append(f"{label}: {e}")
+
+        for name in present:
+            if name != "_id_" and name not in declared:
+                report["unregistered"].append(f"{collection_name}.{name}")
+
+    return report
+
+
+async def find_unused_indexes(db) -> List[dict]:
+    """
+    Indexes that have served no operations since the server last restarted,
+    according to $indexStats (counters are per mongod, so check on the primary).
+    """
+    unused = []
+    for collection_name in INDEX_REGISTRY:
+        async for stats in db[collection_name].aggregate([{"$indexStats": {}}]):
+            if stats["name"] == "_id_":
+                continue
+            if stats.get("accesses", {}).get("ops", 0) == 0:
+                unused.append({
+                    "collection": collection_name,
+                    "name": stats["name"],
+                    "since": stats.get("accesses", {}).get("since"),
+                })
+    return unused
+
+
+def _plan_stages(plan) -> List[str]:
+    """All stage names in an explain plan tree"""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+async def explain_hot_queries(db) -> List[dict]:
+    """Explain every HOT_QUERIES entry and report its winning plan stages"""
+    results = []
+    for query in HOT_QUERIES:
+        cursor = db[query["collection"]].find(query["filter"])
+        if query.get("sort"):
+            cursor = cursor.sort(query["sort"])
+        explain = await cursor.explain()
+        stages = _plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+        results.append({
+            "name": query["name"],
+            "collection": query["collection"],
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages,
+        })
+    return results
@@ -1,4 +1,8 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import partial
+from fastapi import HTTPException, status
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from .config import settings
@@ -14,6 +18,80 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password, hashed_password):
+    """verify_password() on the CPU executor; use this from async handlers"""
+    return await cpu_executor.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    """get_password_hash() on the CPU executor; use this from async handlers"""
+    return await cpu_executor.run(get_password_hash, password)
+
+# ============= BLOCKING CPU WORK =============
+
+class CPUExecutor:
+    """
+    Bounded thread pool for blocking CPU work (bcrypt takes ~250 ms per call).
+
+    At most `max_workers` calls run at once; further callers wait on the event
+    loop without blocking it, and once `max_queue` callers are already waiting
+    new ones get a 503 instead of piling up behind a login storm.
+    """
+    
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cpu-worker")
+        self._slots = asyncio.Semaphore(max_workers)
+        self.running = 0
+        self.queued = 0
+        self.peak_queued = 0
+        self.completed = 0
+        self.rejected = 0
+    
+    async def run(self, func, *args, **kwargs):
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry",
+                headers={"Retry-After": "1"}
+            )
+        
+        self.queued += 1
+        self.peak_queued = max(self.peak_queued, self.queued)
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, partial(func, *args, **kwargs))
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._slots.release()
+    
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "queued": self.queued,
+            "peak_queued": self.peak_queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+    
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+cpu_executor = CPUExecutor(
+    max_workers=settings.CPU_EXECUTOR_WORKERS,
+    max_queue=settings.CPU_EXECUTOR_MAX_QUEUE
+)
+
 # ============= JWT FUNCTIONS =============
 
 def create_access_token(data: dict):
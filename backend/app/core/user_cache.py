@@ -0,0 +1,135 @@
+# backend/app/core/user_cache.py
+
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from bson import json_util
+
+from .config import settings
+
+
+class UserCache:
+    """
+    LRU + TTL cache of authenticated user documents, keyed by the JWT `sub`.
+
+    get_current_user() runs on every request (agents post every few seconds),
+    so the user lookup is served from here and only falls through to MongoDB
+    on a miss. Any route that writes to `users` must call invalidate() so a
+    role change, deactivation or deletion takes effect immediately.
+
+    Only found users are cached; misses always go to the database.
+
+    Backends:
+      - "memory": per-process OrderedDict (default)
+      - "redis":  shared across workers, needs the `redis` package and
+                  USER_CACHE_REDIS_URL
+    """
+
+    KEY_PREFIX = "user_cache:"
+
+    def __init__(self, ttl_seconds: int, max_size: int, backend: str = "memory", redis_url: str = ""):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._redis = None
+
+        if backend == "redis":
+            try:
+                import redis.asyncio as redis_asyncio
+                self._redis = redis_asyncio.from_url(redis_url)
+            except ImportError:
+                print("⚠️ redis package not installed, falling back to in-memory user cache")
+                self.backend = "memory"
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    async def get(self, user_id: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+
+        if self._redis is not None:
+            raw = await self._redis.get(self.KEY_PREFIX + user_id)
+            user = json_util.loads(raw) if raw else None
+        else:
+            user = None
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                expires_at, cached = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(user_id)
+                    user = cached
+                else:
+                    del self._entries[user_id]
+
+        if user is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        # Callers get their own copy so a route can't mutate the cached document
+        return dict(user)
+
+    async def set(self, user_id: str, user: dict):
+        if not self.enabled:
+            return
+
+        if self._redis is not None:
+            await self._redis.set(self.KEY_PREFIX + user_id, json_util.dumps(user), ex=self.ttl_seconds)
+            return
+
+        self._entries[user_id] = (time.monotonic() + self.ttl_seconds, dict(user))
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def invalidate(self, *user_ids):
+        """Drop cached documents for the given user IDs"""
+        keys = [str(user_id) for user_id in user_ids if user_id]
+        if not keys:
+            return
+
+        self.invalidations += len(keys)
+        if self._redis is not None:
+            await self._redis.delete(*[self.KEY_PREFIX + key for key in keys])
+        else:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    async def clear(self):
+        """Drop every cached user (bulk updates that touch many users)"""
+        self.invalidations += 1
+        if self._redis is not None:
+            async for key in self._redis.scan_iter(match=self.KEY_PREFIX + "*"):
+                await self._redis.delete(key)
+        else:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "enabled": self.enabled,
+            "size": len(self._entries) if self._redis is None else None,
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+# Global instance
+user_cache = UserCache(
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    backend=settings.USER_CACHE_BACKEND,
+    redis_url=settings.USER_CACHE_REDIS_URL,
+)
@@ -2,7 +2,10 @@ from os import error
 from exceptiongroup import catch
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.core.database import connect_to_mongo, close_mongo_connection
+from app.core.database import connect_to_mongo, close_mongo_connection, verify_indexes, get_database
+from app.services.smart_classifier import smart_classifier
+from app.core.config import settings
+from app.core.security import cpu_executor
 from app.api.routes import auth, hr, employee, tasks, messages, agent, notes
 from app.api.routes import super_admin, teams, projects, clients, ba_projects, team_lead, payments, meetings, ba_dashboard
 
@@ -36,10 +39,17 @@ except:
 @app.on_event("startup")
 async def startup_db_client():
     await connect_to_mongo()
+    if settings.ENSURE_INDEXES_ON_STARTUP:
+        await verify_indexes()
+    try:
+        await smart_classifier.refresh_model(await get_database(), force=True)
+    except Exception as e:
+        print(f"⚠️ Activity model not loaded: {e}")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
     await close_mongo_connection()
+    cpu_executor.shutdown()
 
 # Routes
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
@@ -33,4 +33,8 @@ class LeaveAllocationRequest(BaseModel):
     user_id: str
     year: int
     leave_type_code: str
-    days: float = Field(ge=0, description="Days to allocate")
\ No newline at end of file
+    days: float = Field(ge=0, description="Days to allocate")
+
+# Year-start allocation for every user from the year's policy
+class LeaveRolloverRequest(BaseModel):
+    year: int = Field(..., ge=2020, le=2100)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime, date
 
 # Request schemas
@@ -65,6 +65,7 @@ class LeaveRequestResponse(BaseModel):
     cancelled_at: Optional[datetime]
     cancelled_reason: Optional[str]
     requested_at: datetime
+    capacity_breach_dates: List[str] = []  # Understaffed team days flagged at submission
 
 class LeaveRequestList(BaseModel):
     total: int
@@ -74,4 +75,6 @@ class LeaveRequestStats(BaseModel):
     pending_count: int
     approved_today_count: int
     on_leave_today_count: int
-    total_requests: int
\ No newline at end of file
+    total_requests: int
+    by_status: Dict[str, int] = {}
+    by_type: Dict[str, int] = {}
\ No newline at end of file
@@ -22,6 +22,9 @@ class PublicHolidayBulkImport(BaseModel):
     country: str = Field(..., description="Country code (US, UK, etc.)")
     year: int = Field(..., ge=2020, le=2100)
 
+class PublicHolidayMultiImport(BaseModel):
+    imports: list[PublicHolidayBulkImport] = Field(..., min_length=1, max_length=200)
+
 # Response schemas
 class PublicHolidayResponse(BaseModel):
     id: str
@@ -0,0 +1,114 @@
+# backend/app/services/activity_model.py
+
+"""
+Lightweight learned classifier for activities the rules can't place.
+
+Features are hashed tokens of the app name, window title and URL; the model is
+a multinomial Naive Bayes over those sparse counts. Everything here is plain
+Python with no app imports, so the counting/fitting functions can run in a
+spawned process pool and the fitted parameters serialize to JSON.
+"""
+
+import json
+import math
+import re
+import zlib
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+N_FEATURES = 2 ** 18
+
+# Most frequent features kept per class; bounds model size (stored as one document)
+MAX_FEATURES_PER_CLASS = 20000
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]{2,}")
+
+
+def featurize(app_name: str, window_title: str = "", url: str = "") -> List[int]:
+    """Hashed feature indices for one activity (crc32, so stable across processes)"""
+    features = []
+    for prefix, text in (("a", app_name), ("t", window_title), ("u", url)):
+        for token in TOKEN_PATTERN.findall((text or "").lower()):
+            features.append(zlib.crc32(f"{prefix}:{token}".encode()) % N_FEATURES)
+    return features
+
+
+def count_batch(samples: List[Tuple[str, str, str, str]]) -> Tuple[Dict[str, int], Dict[str, Dict[int, int]]]:
+    """
+    Sufficient statistics for one batch of (app, title, url, label) samples:
+    documents per class and feature occurrences per class.
+    """
+    class_counts: Dict[str, int] = Counter()
+    feature_counts: Dict[str, Counter] = defaultdict(Counter)
+    for app_name, window_title, url, label in samples:
+        class_counts[label] += 1
+        feature_counts[label].update(featurize(app_name, window_title, url))
+    return dict(class_counts), {label: dict(counts) for label, counts in feature_counts.items()}
+
+
+def merge_counts(total: Tuple[Dict, Dict], partial: Tuple[Dict, Dict]):
+    """Add a count_batch() result into a running total (in place)"""
+    total_classes, total_features = total
+    partial_classes, partial_features = partial
+    for label, count in partial_classes.items():
+        total_classes[label] = total_classes.get(label, 0) + count
+    for label, counts in partial_features.items():
+        target = total_features.setdefault(label, {})
+        for index, count in counts.items():
+            target[index] = target.get(index, 0) + count
+
+
+def fit_from_counts(class_counts: Dict[str, int], feature_counts: Dict[str, Dict[int, int]], alpha: float = 1.0) -> Dict:
+    """Turn accumulated counts into Naive Bayes log-probabilities (JSON-friendly)"""
+    total_docs = sum(class_counts.values())
+    vocabulary = len({index for counts in feature_counts.values() for index in counts})
+    params = {"classes": {}, "vocabulary": vocabulary, "samples": total_docs}
+
+    for label, docs in class_counts.items():
+        counts = feature_counts.get(label, {})
+        if len(counts) > MAX_FEATURES_PER_CLASS:
+            counts = dict(Counter(counts).most_common(MAX_FEATURES_PER_CLASS))
+        denominator = sum(counts.values()) + alpha * (vocabulary + 1)
+        params["classes"][label] = {
+            "log_prior": math.log(docs / total_docs),
+            "unseen": math.log(alpha / denominator),
+            "features": {str(index): math.log((count + alpha) / denominator) for index, count in counts.items()}
+        }
+    return params
+
+
+class ActivityModel:
+    """Fitted model; immutable once built so it can be swapped in atomically"""
+
+    def __init__(self, params: Dict, version: Optional[str] = None):
+        self.version = version
+        self.samples = params.get("samples", 0)
+        self._classes = [
+            (label, data["log_prior"], data["unseen"], {int(k): v for k, v in data["features"].items()})
+            for label, data in params["classes"].items()
+        ]
+
+    def predict(self, app_name: str, window_title: str = "", url: str = "") -> Tuple[str, float]:
+        """(category, posterior probability) for one activity"""
+        features = featurize(app_name, window_title, url)
+        scores = []
+        for label, log_prior, unseen, feature_log_probs in self._classes:
+            score = log_prior
+            for index in features:
+                score += feature_log_probs.get(index, unseen)
+            scores.append((score, label))
+
+        best_score, best_label = max(scores)
+        normalizer = sum(math.exp(score - best_score) for score, _ in scores)
+        return best_label, 1.0 / normalizer
+
+    def predict_batch(self, items: Iterable[Tuple[str, str, str]]) -> List[Tuple[str, float]]:
+        return [self.predict(app_name, window_title, url) for app_name, window_title, url in items]
+
+    @staticmethod
+    def dumps(params: Dict) -> bytes:
+        return zlib.compress(json.dumps(params, separators=(",", ":")).encode())
+
+    @classmethod
+    def loads(cls, blob: bytes, version: Optional[str] = None) -> "ActivityModel":
+        return cls(json.loads(zlib.decompress(blob)), version=version)
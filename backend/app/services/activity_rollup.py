@@ -0,0 +1,159 @@
+# backend/app/services/activity_rollup.py
+
+from datetime import datetime, date
+from typing import List, Dict, Optional
+from pymongo import UpdateOne
+from app.utils.helpers import app_field_key, extract_site_name
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rollup documents written per bulk_write call during backfill
+BACKFILL_CHUNK_SIZE = 500
+
+
+class ActivityRollupService:
+    """
+    Pre-aggregated per-employee, per-day, per-app activity totals.
+
+    One document per (user_id, date) in `activity_rollups`, with an `apps` map
+    keyed by app_field_key(). Kept up to date incrementally on ingest, so monthly
+    views read ~30 small documents instead of every session document.
+    """
+    
+    def __init__(self, db):
+        self.db = db
+        self.rollups_collection = db["activity_rollups"]
+    
+    async def record_interval(
+        self,
+        user_id: str,
+        employee_email: str,
+        day: str,
+        applications: List[Dict]
+    ):
+        """Add one ingested interval's per-app counters to the day's rollup"""
+        if not applications:
+            return
+        
+        set_fields = {"employee_email": employee_email, "updated_at": datetime.now()}
+        inc_fields = {}
+        
+        for app in applications:
+            prefix = f"apps.{app_field_key(app['application'])}"
+            set_fields[f"{prefix}.application"] = app["application"]
+            set_fields[f"{prefix}.display_name"] = app.get("display_name") or extract_site_name(
+                app["application"], app.get("url", "")
+            )
+            if app.get("window_title"):
+                set_fields[f"{prefix}.window_title"] = app["window_title"]
+            if app.get("url"):
+                set_fields[f"{prefix}.url"] = app["url"]
+            for counter in ("mouse_movements", "key_presses", "time_spent_seconds"):
+                inc_fields[f"{prefix}.{counter}"] = inc_fields.get(f"{prefix}.{counter}", 0) + app.get(counter, 0)
+        
+        await self.rollups_collection.update_one(
+            {"user_id": user_id, "date": day},
+            {"$set": set_fields, "$inc": inc_fields},
+            upsert=True
+        )
+    
+    def app_entries_stages(
+        self,
+        employee_email: str,
+        start_date: date,
+        end_date: date
+    ) -> List[Dict]:
+        """
+        Leading pipeline stages yielding one `apps` array per day in range, oldest first.
+        Entries have the same shape as session `applications` entries.
+        """
+        return [
+            {"$match": {
+                "employee_email": employee_email,
+                "date": {"$gte": start_date.isoformat(), "$lte": end_date.isoformat()}
+            }},
+            {"$sort": {"date": 1}},
+            {"$project": {
+                "_id": 0,
+                "apps": {"$map": {"input": {"$objectToArray": "$apps"}, "in": "$$this.v"}}
+            }}
+        ]
+    
+    async def backfill_days(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> List[str]:
+        """Days (YYYY-MM-DD, oldest first) that have session activity in range; served by the date_user index"""
+        query = {"session_number": {"$exists": True}}
+        date_range = {}
+        if start_date:
+            date_range["$gte"] = start_date.isoformat()
+        if end_date:
+            date_range["$lte"] = end_date.isoformat()
+        if date_range:
+            query["date"] = date_range
+        
+        return sorted(day for day in await self.db.activities.distinct("date", query) if day)
+    
+    async def backfill_day(self, day: str) -> Dict:
+        """
+        Rebuild the rollups of one day from its session activity documents.
+
+        Idempotent: each (user_id, date) rollup is recomputed from scratch and
+        overwritten, so it can be re-run safely. Only one day's documents are
+        held in memory.
+        """
+        from app.services.activity_tracker import get_session_applications
+        
+        cursor = self.db.activities.find(
+            {"date": day, "session_number": {"$exists": True}},
+            projection={"user_id": 1, "employee_email": 1, "date": 1, "applications": 1, "app_totals": 1}
+        )
+        
+        day_rollups = {}
+        stats = {"activities_scanned": 0, "rollups_written": 0}
+        
+        async for activity in cursor:
+            stats["activities_scanned"] += 1
+            rollup = day_rollups.setdefault(activity.get("user_id"), {
+                "employee_email": activity.get("employee_email"),
+                "apps": {}
+            })
+            
+            for app in get_session_applications(activity):
+                name = app.get("application", "Unknown")
+                entry = rollup["apps"].setdefault(app_field_key(name), {
+                    "application": name,
+                    "window_title": "",
+                    "url": "",
+                    "mouse_movements": 0,
+                    "key_presses": 0,
+                    "time_spent_seconds": 0
+                })
+                entry["mouse_movements"] += app.get("mouse_movements", 0)
+                entry["key_presses"] += app.get("key_presses", 0)
+                entry["time_spent_seconds"] += app.get("time_spent_seconds", 0)
+                if app.get("window_title"):
+                    entry["window_title"] = app["window_title"]
+                if app.get("url"):
+                    entry["url"] = app["url"]
+                # Recomputed rather than copied, so a backfill also repairs names
+                # stored by older versions of extract_site_name
+                entry["display_name"] = extract_site_name(name, entry["url"])
+        
+        operations = [
+            UpdateOne(
+                {"user_id": user_id, "date": day},
+                {"$set": {**rollup, "updated_at": datetime.now()}},
+                upsert=True
+            )
+            for user_id, rollup in day_rollups.items()
+        ]
+        for offset in range(0, len(operations), BACKFILL_CHUNK_SIZE):
+            chunk = operations[offset:offset + BACKFILL_CHUNK_SIZE]
+            await self.rollups_collection.bulk_write(chunk, ordered=False)
+            stats["rollups_written"] += len(chunk)
+        
+        return stats
@@ -0,0 +1,150 @@
+# backend/app/services/activity_rollup_jobs.py
+
+import asyncio
+import logging
+from datetime import datetime, date, timedelta
+from typing import Optional, Set
+
+from pymongo.errors import DuplicateKeyError
+
+from app.services.activity_rollup import ActivityRollupService
+
+logger = logging.getLogger(__name__)
+
+# Only one backfill runs at a time
+JOB_ID = "activity_rollup_backfill"
+
+# A running job whose heartbeat is older than this is assumed lost (its worker
+# process died) and the next start resumes it from its checkpoint
+STALE_JOB_AFTER = timedelta(minutes=5)
+
+
+class ActivityRollupBackfillJobs:
+    """
+    Background rebuild of the daily per-app activity rollups.
+
+    - Days with session activity are listed once (distinct over the
+      date_user index), then rebuilt one day at a time, so memory stays
+      bounded by a single day's documents.
+    - Progress and a checkpoint (last finished day) are saved to
+      `activity_rollup_jobs` after every day; starting the same range again
+      after a failure or a dead worker resumes after the checkpoint.
+    """
+
+    def __init__(self):
+        self._background: Set[asyncio.Task] = set()
+
+    async def start(self, db, start_date: Optional[date], end_date: Optional[date], requested_by: str) -> dict:
+        """Start (or resume) a backfill over [start_date, end_date]; returns the job document"""
+        now = datetime.now()
+        requested_range = {
+            "start_date": start_date.isoformat() if start_date else None,
+            "end_date": end_date.isoformat() if end_date else None
+        }
+        job = await db.activity_rollup_jobs.find_one({"_id": JOB_ID})
+
+        if job and job["status"] == "running" and job["updated_at"] >= now - STALE_JOB_AFTER:
+            return job
+
+        same_range = job and all(job.get(key) == value for key, value in requested_range.items())
+        if job and job["status"] in ("running", "failed") and same_range:
+            update = {"status": "running", "resumed_at": now, "updated_at": now, "error": None}
+        else:
+            days = await ActivityRollupService(db).backfill_days(start_date, end_date)
+            update = {
+                **requested_range,
+                "status": "running",
+                "requested_by": requested_by,
+                "total_days": len(days),
+                "processed_days": 0,
+                "activities_scanned": 0,
+                "rollups_written": 0,
+                "last_date": None,
+                "started_at": now,
+                "resumed_at": None,
+                "finished_at": None,
+                "updated_at": now,
+                "error": None
+            }
+
+        # Claim the job only if nobody changed it since we read it, so two
+        # workers can't both run it
+        if job is None:
+            try:
+                await db.activity_rollup_jobs.insert_one({"_id": JOB_ID, **update})
+            except DuplicateKeyError:
+                return await self.get(db)
+        else:
+            result = await db.activity_rollup_jobs.update_one(
+                {"_id": JOB_ID, "updated_at": job["updated_at"]},
+                {"$set": update}
+            )
+            if result.modified_count == 0:
+                return await self.get(db)
+        job = await self.get(db)
+
+        task = asyncio.create_task(self._run(db))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return job
+
+    async def _run(self, db):
+        rollup_service = ActivityRollupService(db)
+        try:
+            job = await db.activity_rollup_jobs.find_one({"_id": JOB_ID})
+            start_date = date.fromisoformat(job["start_date"]) if job.get("start_date") else None
+            end_date = date.fromisoformat(job["end_date"]) if job.get("end_date") else None
+
+            days = await rollup_service.backfill_days(start_date, end_date)
+            if job.get("last_date"):
+                days = [day for day in days if day > job["last_date"]]
+
+            for day in days:
+                stats = await rollup_service.backfill_day(day)
+                # Checkpoint after each day, so a resume redoes at most one day
+                await db.activity_rollup_jobs.update_one(
+                    {"_id": JOB_ID},
+                    {
+                        "$inc": {"processed_days": 1, **stats},
+                        "$set": {"last_date": day, "updated_at": datetime.now()}
+                    }
+                )
+
+            await db.activity_rollup_jobs.update_one(
+                {"_id": JOB_ID},
+                {"$set": {"status": "completed", "finished_at": datetime.now(), "updated_at": datetime.now()}}
+            )
+            logger.info("✅ Activity rollup backfill completed")
+        except Exception as e:
+            logger.error(f"❌ Activity rollup backfill failed: {e}")
+            await db.activity_rollup_jobs.update_one(
+                {"_id": JOB_ID},
+                {"$set": {"status": "failed", "error": str(e), "updated_at": datetime.now()}}
+            )
+
+    async def get(self, db) -> Optional[dict]:
+        return await db.activity_rollup_jobs.find_one({"_id": JOB_ID})
+
+
+def serialize_backfill_job(job: dict) -> dict:
+    """API shape of a rollup backfill job document"""
+    total = job.get("total_days") or 0
+    return {
+        "status": job["status"],
+        "start_date": job.get("start_date"),
+        "end_date": job.get("end_date"),
+        "total_days": total,
+        "processed_days": job["processed_days"],
+        "progress_percent": round(min(job["processed_days"] / total, 1.0) * 100, 1) if total else 100.0,
+        "last_date": job.get("last_date"),
+        "activities_scanned": job["activities_scanned"],
+        "rollups_written": job["rollups_written"],
+        "started_at": job["started_at"],
+        "resumed_at": job.get("resumed_at"),
+        "finished_at": job.get("finished_at"),
+        "error": job.get("error")
+    }
+
+
+# Global instance
+activity_rollup_backfill_jobs = ActivityRollupBackfillJobs()
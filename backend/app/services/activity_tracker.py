@@ -1,78 +1,96 @@
 from datetime import datetime, date
 from typing import List, Dict
-from bson import ObjectId
-import re
+from app.core.config import settings
+from app.services.activity_rollup import ActivityRollupService
+from app.utils.helpers import extract_site_name
+
+
+def get_session_applications(activity: Dict) -> List[Dict]:
+    """
+    Per-application totals of a session activity document.
+
+    Documents written in "merge" storage mode keep an `applications` list, while
+    "atomic" mode keeps an `app_totals` map; a session that switched modes has both.
+    """
+    return list(activity.get("applications", [])) + list(activity.get("app_totals", {}).values())
+
+
+# Pipeline stage turning a session document into an `apps` array, mirroring
+# get_session_applications() server-side
+SESSION_APPS_STAGE = {
+    "$project": {
+        "_id": 0,
+        "apps": {
+            "$concatArrays": [
+                {"$ifNull": ["$applications", []]},
+                {"$map": {
+                    "input": {"$objectToArray": {"$ifNull": ["$app_totals", {}]}},
+                    "in": "$$this.v"
+                }}
+            ]
+        }
+    }
+}
+
 
 class ActivityTrackerService:
     def __init__(self, db):
         self.db = db
     
-    def _extract_site_name(self, application: str, url: str) -> str:
+    def _app_entries_source(
+        self,
+        employee_email: str,
+        start_date: date,
+        end_date: date
+    ):
         """
-        Extracts a meaningful site name from browser applications.
-        For non-browser apps, returns the application name.
-        
-        Args:
-            application: e.g., "chrome.exe (google.com)" or "Code.exe"
-            url: e.g., "Browser: facebook.com" or ""
-            
-        Returns:
-            Cleaned name like "Chrome - google.com" or "VS Code"
+        Collection and leading pipeline stages yielding one `apps` array per document,
+        oldest first. Uses the daily rollups when enabled, otherwise session documents.
         """
-        # List of browser identifiers
-        browsers = ["chrome", "edge", "firefox", "safari", "opera", "brave", "msedge"]
-        
-        # Check if it's a browser
-        is_browser = any(browser in application.lower() for browser in browsers)
-        
-        if is_browser:
-            # Try to extract domain from the application field first
-            # e.g., "chrome.exe (google.com)" -> "google.com"
-            match = re.search(r'$([^)]+)$', application)
-            if match:
-                site = match.group(1)
-                # Clean up "Browser: " prefix if present
-                site = site.replace("Browser: ", "").strip()
-                
-                # Get browser name
-                browser_name = "Browser"
-                if "chrome" in application.lower():
-                    browser_name = "Chrome"
-                elif "edge" in application.lower() or "msedge" in application.lower():
-                    browser_name = "Edge"
-                elif "firefox" in application.lower():
-                    browser_name = "Firefox"
-                elif "safari" in application.lower():
-                    browser_name = "Safari"
-                
-                return f"{browser_name} - {site}"
-            
-            # If no match in application, try URL field
-            if url and url.strip():
-                site = url.replace("Browser: ", "").strip()
-                return f"Browser - {site}"
-            
-            # Fallback
-            return "Browser - Unknown Site"
-        
-        # For non-browser apps, clean up the application name
-        # e.g., "Code.exe" -> "VS Code"
-        app_name = application.split(".exe")[0].strip()
-        
-        # Friendly names mapping
-        friendly_names = {
-            "Code": "VS Code",
-            "WINWORD": "Microsoft Word",
-            "EXCEL": "Microsoft Excel",
-            "POWERPNT": "Microsoft PowerPoint",
-            "Spotify": "Spotify",
-            "slack": "Slack",
-            "Teams": "Microsoft Teams",
-            "WhatsApp": "WhatsApp",
-            "Telegram": "Telegram"
-        }
+        if settings.ACTIVITY_ROLLUPS_ENABLED:
+            rollup_service = ActivityRollupService(self.db)
+            return rollup_service.rollups_collection, rollup_service.app_entries_stages(
+                employee_email, start_date, end_date
+            )
+        
+        # Convert dates to datetime for MongoDB query
+        start_datetime = datetime.combine(start_date, datetime.min.time())
+        end_datetime = datetime.combine(end_date, datetime.max.time())
         
-        return friendly_names.get(app_name, app_name)
+        return self.db.activities, [
+            {"$match": {
+                "employee_email": employee_email,
+                "recorded_at": {
+                    "$gte": start_datetime,
+                    "$lte": end_datetime
+                }
+            }},
+            {"$sort": {"recorded_at": 1}},
+            SESSION_APPS_STAGE
+        ]
+    
+    async def _aggregate_apps(
+        self,
+        employee_email: str,
+        start_date: date,
+        end_date: date,
+        group_id
+    ) -> List[Dict]:
+        """$unwind the per-app entries in range and $group their counters by group_id"""
+        collection, pipeline = self._app_entries_source(employee_email, start_date, end_date)
+        pipeline = pipeline + [
+            {"$unwind": "$apps"},
+            {"$group": {
+                "_id": group_id,
+                "mouse_movements": {"$sum": "$apps.mouse_movements"},
+                "key_presses": {"$sum": "$apps.key_presses"},
+                "time_spent_seconds": {"$sum": "$apps.time_spent_seconds"},
+                "last_window_title": {"$last": "$apps.window_title"},
+                "last_url": {"$last": "$apps.url"}
+            }},
+            {"$sort": {"time_spent_seconds": -1}}
+        ]
+        return await collection.aggregate(pipeline, allowDiskUse=True).to_list(length=None)
     
     async def get_app_activity_breakdown(
         self, 
@@ -93,43 +111,32 @@ class ActivityTrackerService:
             List of dictionaries with app_name, total_duration_minutes, and percentage
         """
         
-        # Convert dates to datetime for MongoDB query
-        start_datetime = datetime.combine(start_date, datetime.min.time())
-        end_datetime = datetime.combine(end_date, datetime.max.time())
-        
-        # Fetch all matching activities
-        cursor = self.db.activities.find({
-            "employee_email": employee_email,
-            "recorded_at": {
-                "$gte": start_datetime,
-                "$lte": end_datetime
+        # Group server-side by the stored display_name; entries ingested before
+        # display_name existed are grouped by (application, url) and named here
+        has_display_name = {"$ifNull": ["$apps.display_name", False]}
+        groups = await self._aggregate_apps(
+            employee_email,
+            start_date,
+            end_date,
+            group_id={
+                "display_name": "$apps.display_name",
+                "application": {"$cond": [has_display_name, None, "$apps.application"]},
+                "url": {"$cond": [has_display_name, None, "$apps.url"]}
             }
-        })
-        
-        activities = await cursor.to_list(length=None)
+        )
         
-        if not activities:
+        if not groups:
             return []
         
-        # Manual aggregation with site grouping
+        # Merge legacy groups into their site names
         app_time_map = {}
         
-        for activity in activities:
-            applications = activity.get("applications", [])
-            
-            for app in applications:
-                application_name = app.get("application", "Unknown")
-                url = app.get("url", "")
-                time_spent = app.get("time_spent_seconds", 0)
-                
-                # Extract meaningful name (with site for browsers)
-                display_name = self._extract_site_name(application_name, url)
-                
-                # Accumulate time
-                if display_name in app_time_map:
-                    app_time_map[display_name] += time_spent
-                else:
-                    app_time_map[display_name] = time_spent
+        for group in groups:
+            display_name = group["_id"].get("display_name") or extract_site_name(
+                group["_id"].get("application") or "Unknown",
+                group["_id"].get("url") or ""
+            )
+            app_time_map[display_name] = app_time_map.get(display_name, 0) + group["time_spent_seconds"]
         
         if not app_time_map:
             return []
@@ -178,65 +185,29 @@ class ActivityTrackerService:
         print(f"\n📊 Fetching raw app data for {employee_email}")
         print(f"Date range: {start_date} to {end_date}\n")
         
-        start_datetime = datetime.combine(start_date, datetime.min.time())
-        end_datetime = datetime.combine(end_date, datetime.max.time())
-        
-        # Fetch all activities
-        cursor = self.db.activities.find({
-            "employee_email": employee_email,
-            "recorded_at": {
-                "$gte": start_datetime,
-                "$lte": end_datetime
+        # Aggregate by application name (pre-sorted by time spent, descending)
+        groups = await self._aggregate_apps(
+            employee_email,
+            start_date,
+            end_date,
+            group_id={"$ifNull": ["$apps.application", "Unknown"]}
+        )
+        
+        result = [
+            {
+                "application": group["_id"],
+                "total_mouse_movements": group["mouse_movements"],
+                "total_key_presses": group["key_presses"],
+                "total_time_spent_seconds": group["time_spent_seconds"],
+                "last_window_title": group.get("last_window_title") or "",
+                "last_url": group.get("last_url") or ""
             }
-        })
-        
-        activities = await cursor.to_list(length=None)
+            for group in groups
+        ]
         
-        if not activities:
+        if not result:
             return []
         
-        # Aggregate by application name
-        app_stats = {}
-        
-        for activity in activities:
-            applications = activity.get("applications", [])
-            
-            for app in applications:
-                app_name = app.get("application", "Unknown")
-                mouse_movements = app.get("mouse_movements", 0)
-                key_presses = app.get("key_presses", 0)
-                time_spent = app.get("time_spent_seconds", 0)
-                window_title = app.get("window_title", "")
-                url = app.get("url", "")
-                
-                # Initialize if first time seeing this app
-                if app_name not in app_stats:
-                    app_stats[app_name] = {
-                        "application": app_name,
-                        "total_mouse_movements": 0,
-                        "total_key_presses": 0,
-                        "total_time_spent_seconds": 0,
-                        "last_window_title": "",
-                        "last_url": ""
-                    }
-                
-                # Accumulate totals
-                app_stats[app_name]["total_mouse_movements"] += mouse_movements
-                app_stats[app_name]["total_key_presses"] += key_presses
-                app_stats[app_name]["total_time_spent_seconds"] += time_spent
-                
-                # Keep latest window title and URL
-                if window_title:
-                    app_stats[app_name]["last_window_title"] = window_title
-                if url:
-                    app_stats[app_name]["last_url"] = url
-        
-        # Convert to list
-        result = list(app_stats.values())
-        
-        # Sort by time spent (descending)
-        result.sort(key=lambda x: x["total_time_spent_seconds"], reverse=True)
-        
         # ✅ ADD THIS
         print(f"\n✅ Found {len(result)} apps with data")
         if result:
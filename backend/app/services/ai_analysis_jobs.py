@@ -0,0 +1,245 @@
+# backend/app/services/ai_analysis_jobs.py
+
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Set
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import settings
+from app.services.activity_tracker import ActivityTrackerService
+from app.services.ai_productivity_service import ai_productivity_service
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ["queued", "running"]
+
+# The process that owns a queued/running job refreshes its heartbeat_at this
+# often, including while the job waits for a free slot
+HEARTBEAT_INTERVAL_SECONDS = 60
+
+# A queued/running job whose heartbeat is older than this is assumed lost (its
+# worker process died) and no longer coalesces new requests
+STALE_JOB_AFTER = timedelta(minutes=5)
+
+
+async def build_productivity_report(db, employee: dict, start_date: date, end_date: date) -> dict:
+    """Collect an employee's app usage for the period and run the AI analysis on it"""
+    employee_id = str(employee["_id"])
+    month_label = start_date.strftime("%B %Y")
+
+    activity_service = ActivityTrackerService(db)
+    raw_apps = await activity_service.get_raw_monthly_app_data(
+        employee_email=employee["email"],
+        start_date=start_date,
+        end_date=end_date
+    )
+
+    if not raw_apps:
+        return {
+            "success": False,
+            "message": "No activity data found for current month",
+            "month": month_label
+        }
+
+    employee_name = employee.get("full_name", employee["email"])
+
+    ai_analysis = await ai_productivity_service.analyze_productivity(
+        raw_apps=raw_apps,
+        employee_name=employee_name,
+        month=month_label,
+        db=db,
+        employee_id=employee_id
+    )
+
+    total_seconds = sum(app["total_time_spent_seconds"] for app in raw_apps)
+    total_hours = round(total_seconds / 3600, 2)
+
+    return {
+        "success": True,
+        "employee": {
+            "id": employee_id,
+            "name": employee_name,
+            "email": employee["email"]
+        },
+        "period": {
+            "month": month_label,
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat()
+        },
+        "activity_summary": {
+            "total_hours": total_hours,
+            "total_apps": len(raw_apps)
+        },
+        "ai_analysis": ai_analysis,
+        "debug_data": {
+            "raw_apps": raw_apps,
+            "total_apps": len(raw_apps),
+            "total_hours": total_hours
+        }
+    }
+
+
+class AIAnalysisJobQueue:
+    """
+    Background queue for monthly AI productivity analyses.
+
+    - Jobs are documents in `ai_analysis_jobs`, so any worker can answer a poll.
+    - At most AI_ANALYSIS_CONCURRENCY analyses run at once per process; the
+      rest wait as queued tasks.
+    - Requests for the same employee and month coalesce onto the job already
+      queued or running instead of calling the LLM again. Queued/running jobs
+      carry `active: True`, which a unique partial index on `key` makes
+      exclusive, so concurrent submits can't both create a job.
+    """
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._background: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def job_key(employee_id: str, start_date: date) -> str:
+        return f"{employee_id}:{start_date.strftime('%Y-%m')}"
+
+    def _slots(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    async def submit(self, db, employee: dict, requested_by: str, end_date: Optional[date] = None) -> dict:
+        """Queue an analysis of the employee's month to date; returns the (possibly existing) job"""
+        end_date = end_date or date.today()
+        start_date = end_date.replace(day=1)
+        employee_id = str(employee["_id"])
+        key = self.job_key(employee_id, start_date)
+
+        job = None
+        while job is None:
+            existing = await db.ai_analysis_jobs.find_one({"key": key, "active": True})
+            if existing and existing["heartbeat_at"] >= datetime.now() - STALE_JOB_AFTER:
+                return existing
+            if existing:
+                # Owner is gone: retire the job (unless its heartbeat just moved) so a new one can take the key
+                await db.ai_analysis_jobs.update_one(
+                    {"_id": existing["_id"], "heartbeat_at": existing["heartbeat_at"]},
+                    {
+                        "$set": {"status": "failed", "error": "Job lost (worker stopped)", "finished_at": datetime.now()},
+                        "$unset": {"active": ""}
+                    }
+                )
+                continue
+
+            now = datetime.now()
+            candidate = {
+                "key": key,
+                "active": True,
+                "employee_id": employee_id,
+                "month": start_date.strftime("%Y-%m"),
+                "status": "queued",
+                "requested_by": requested_by,
+                "created_at": now,
+                "heartbeat_at": now,
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None
+            }
+            try:
+                result = await db.ai_analysis_jobs.insert_one(candidate)
+            except DuplicateKeyError:
+                # Another request created the job first; coalesce onto it
+                continue
+            candidate["_id"] = result.inserted_id
+            job = candidate
+        job_id = str(job["_id"])
+
+        task = asyncio.create_task(self._run(db, job_id, employee, start_date, end_date))
+        self._tasks[job_id] = task
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+        return job
+
+    async def _run(self, db, job_id: str, employee: dict, start_date: date, end_date: date):
+        heartbeat = asyncio.create_task(self._heartbeat(db, job_id))
+        try:
+            async with self._slots():
+                await db.ai_analysis_jobs.update_one(
+                    {"_id": ObjectId(job_id)},
+                    {"$set": {"status": "running", "started_at": datetime.now()}}
+                )
+                try:
+                    report = await build_productivity_report(db, employee, start_date, end_date)
+                    update = {"status": "completed", "result": report}
+                except Exception as e:
+                    logger.error(f"❌ AI analysis job {job_id} failed: {e}")
+                    update = {"status": "failed", "error": str(e)}
+
+                update["finished_at"] = datetime.now()
+                await db.ai_analysis_jobs.update_one(
+                    {"_id": ObjectId(job_id)},
+                    {"$set": update, "$unset": {"active": ""}}
+                )
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, db, job_id: str):
+        """Keep heartbeat_at fresh while this process owns the job (queued or running)"""
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL_SECONDS)
+            await db.ai_analysis_jobs.update_one(
+                {"_id": ObjectId(job_id), "active": True},
+                {"$set": {"heartbeat_at": datetime.now()}}
+            )
+
+    async def get(self, db, job_id: str) -> Optional[dict]:
+        if not ObjectId.is_valid(job_id):
+            return None
+        return await db.ai_analysis_jobs.find_one({"_id": ObjectId(job_id)})
+
+    async def wait(self, db, job_id: str, timeout: float, poll_interval: float = 1.0) -> Optional[dict]:
+        """
+        Wait for a job to finish and return its document (None if it doesn't exist).
+        Jobs owned by this process are awaited directly; others are polled.
+        """
+        task = self._tasks.get(job_id)
+        if task is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(task), timeout)
+            except asyncio.TimeoutError:
+                pass
+            return await self.get(db, job_id)
+
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            job = await self.get(db, job_id)
+            if job is None or job["status"] not in ACTIVE_STATUSES:
+                return job
+            if asyncio.get_running_loop().time() >= deadline:
+                return job
+            await asyncio.sleep(poll_interval)
+
+
+def serialize_job(job: dict) -> dict:
+    """API shape of a job document"""
+    return {
+        "job_id": str(job["_id"]),
+        "employee_id": job["employee_id"],
+        "month": job["month"],
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+        "result": job.get("result"),
+        "error": job.get("error")
+    }
+
+
+# Global instance
+ai_analysis_jobs = AIAnalysisJobQueue(concurrency=settings.AI_ANALYSIS_CONCURRENCY)
@@ -1,49 +1,180 @@
 # backend/app/services/ai_productivity_service.py
 
-from groq import Groq
+from groq import AsyncGroq
 from app.core.config import settings
-from datetime import datetime
+from app.services.smart_classifier import smart_classifier
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import hashlib
 import json
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever the system message or response handling changes so cached
+# analyses stop matching (the rendered prompt itself is part of the cache key)
+PROMPT_VERSION = "2"
+
+# Rough chars-per-token ratio for English/Latin prompts, used for budgeting only
+CHARS_PER_TOKEN = 4
+
+BROWSER_PROCESSES = ("chrome", "msedge", "edge", "firefox", "safari", "opera", "brave")
+
+# Agent app keys for browsers look like "chrome.exe (github.com)" or, when no
+# site could be recognised, "chrome.exe (Browser: <window title>)"
+BROWSER_APP_PATTERN = re.compile(r"^(?P<process>[^(]+?)\s*\((?P<site>.*)\)\s*$")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _usage_group(application: str) -> str:
+    """Name an app is grouped under: browser + site, with unrecognised pages pooled"""
+    match = BROWSER_APP_PATTERN.match(application)
+    if match and any(browser in match.group("process").lower() for browser in BROWSER_PROCESSES):
+        site = match.group("site").strip()
+        if site.startswith("Browser:"):
+            site = "other pages"
+        return f"{match.group('process')} ({site})"
+    return application
+
+
+def _empty_usage(name: str, category: str) -> Dict:
+    return {"name": name, "category": category, "entries": 0, "time_seconds": 0, "mouse": 0, "keys": 0}
+
+
+def group_app_usage(raw_apps: List[Dict], categories: Dict[str, str]) -> List[Dict]:
+    """
+    Merge raw app entries by (classifier category, app/site), largest first.
+    `categories` maps application -> category; unmapped apps count as "other".
+    """
+    groups: Dict[tuple, Dict] = {}
+    for app in raw_apps:
+        category = categories.get(app["application"], "other")
+        key = (category, _usage_group(app["application"]))
+        group = groups.setdefault(key, _empty_usage(key[1], category))
+        group["entries"] += 1
+        group["time_seconds"] += app["total_time_spent_seconds"]
+        group["mouse"] += app["total_mouse_movements"]
+        group["keys"] += app["total_key_presses"]
+
+    return sorted(groups.values(), key=lambda group: group["time_seconds"], reverse=True)
+
+
+def bucket_long_tail(groups: List[Dict], top_k: int) -> List[Dict]:
+    """Keep the top_k groups and fold the rest into one "Other ..." bucket per category"""
+    buckets: Dict[str, Dict] = {}
+    for group in groups[top_k:]:
+        category = group["category"]
+        name = "Other apps" if category == "other" else f"Other {category} apps"
+        bucket = buckets.setdefault(category, _empty_usage(name, category))
+        bucket["entries"] += group["entries"]
+        bucket["time_seconds"] += group["time_seconds"]
+        bucket["mouse"] += group["mouse"]
+        bucket["keys"] += group["keys"]
+
+    tail = sorted(buckets.values(), key=lambda bucket: bucket["time_seconds"], reverse=True)
+    return groups[:top_k] + tail
+
 class AIProductivityService:
     def __init__(self):
-        self.client = Groq(api_key=settings.GROQ_API_KEY)
+        # Async client so an LLM round trip never blocks the event loop.
+        # GROQ_BASE_URL can point at a local stub server for offline runs.
+        self.client = AsyncGroq(
+            api_key=settings.GROQ_API_KEY,
+            base_url=settings.GROQ_BASE_URL or None,
+            timeout=settings.AI_ANALYSIS_TIMEOUT_SECONDS
+        )
         self.model = "llama-3.3-70b-versatile"
+        self.cache_hits = 0
+        self.cache_misses = 0
     
-    def format_raw_app_data_for_llm(self, raw_apps: list, employee_name: str, month: str) -> str:
-        """Format raw application data into a structured prompt for LLM"""
-        
-         # ✅ ADD THIS
-        print("\n" + "="*80)
-        print(f"📊 FORMATTING DATA FOR LLM")
-        print(f"Employee: {employee_name}")
-        print(f"Month: {month}")
-        print(f"Total Apps: {len(raw_apps)}")
-        print("="*80 + "\n")
-        
-        total_seconds = sum(app["total_time_spent_seconds"] for app in raw_apps)
-        total_hours = round(total_seconds / 3600, 2)
-        total_minutes = round(total_seconds / 60, 2)
-        
-        total_mouse = sum(app["total_mouse_movements"] for app in raw_apps)
-        total_keys = sum(app["total_key_presses"] for app in raw_apps)
-        
-        # Build detailed app list with all metrics
-        app_details = []
-        # for i, app in enumerate(raw_apps[:20], 1):  # Top 20 apps
-        for i, app in enumerate(raw_apps, 1):  # ALL apps
-            time_minutes = round(app["total_time_spent_seconds"] / 60, 2)
-            percentage = round((app["total_time_spent_seconds"] / total_seconds * 100), 1) if total_seconds > 0 else 0
-            
-            app_details.append(
-                f"{i}. {app['application']}: {time_minutes} min ({percentage}%) | "
-                f"Mouse: {app['total_mouse_movements']:,} | Keys: {app['total_key_presses']:,}"
-            )
+    # ==================== RESULT CACHE ====================
+    
+    def analysis_cache_key(self, prompt: str) -> str:
+        """
+        Content hash of the exact LLM input: the final compacted prompt, model
+        and prompt version (system message/template). Hashing the rendered prompt
+        means any change to the compaction settings (token budget, top-app
+        count) or to the app categories also changes the key.
+        """
+        payload = json.dumps([PROMPT_VERSION, self.model, prompt], separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    async def get_cached_analysis(self, db, cache_key: str) -> Optional[dict]:
+        cached = await db.ai_analysis_cache.find_one({
+            "_id": cache_key,
+            "expires_at": {"$gt": datetime.now()}
+        })
+        if cached:
+            self.cache_hits += 1
+            await db.ai_analysis_cache.update_one({"_id": cache_key}, {"$inc": {"hits": 1}})
+            return cached["result"]
         
-        prompt = f"""Analyze this employee's computer activity for {month} and provide a productivity assessment.
+        self.cache_misses += 1
+        return None
+    
+    async def store_cached_analysis(self, db, cache_key: str, result: dict, employee_id: Optional[str]):
+        now = datetime.now()
+        await db.ai_analysis_cache.update_one(
+            {"_id": cache_key},
+            {"$set": {
+                "result": result,
+                "employee_id": employee_id,
+                "model": self.model,
+                "prompt_version": PROMPT_VERSION,
+                "created_at": now,
+                "expires_at": now + timedelta(hours=settings.AI_ANALYSIS_CACHE_TTL_HOURS),
+                "hits": 0
+            }},
+            upsert=True
+        )
+    
+    async def invalidate_cached_analyses(self, db, employee_id: Optional[str] = None) -> int:
+        """Drop cached analyses for one employee, or all of them"""
+        query = {"employee_id": employee_id} if employee_id else {}
+        result = await db.ai_analysis_cache.delete_many(query)
+        return result.deleted_count
+    
+    async def cache_stats(self, db) -> dict:
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "entries": await db.ai_analysis_cache.count_documents({"expires_at": {"$gt": datetime.now()}}),
+            "ttl_hours": settings.AI_ANALYSIS_CACHE_TTL_HOURS,
+            "prompt_version": PROMPT_VERSION,
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": round(self.cache_hits / lookups, 4) if lookups else 0.0
+        }
+    
+    async def categorize_apps(self, raw_apps: list) -> Dict[str, str]:
+        """application -> classifier category, used to group the prompt's long tail"""
+        classifications = await smart_classifier.classify_batch([
+            {
+                "app_name": app["application"],
+                "window_title": app.get("last_window_title"),
+                "url": app.get("last_url")
+            }
+            for app in raw_apps
+        ])
+        return {
+            app["application"]: classification["category"]
+            for app, classification in zip(raw_apps, classifications)
+        }
+    
+    def _render_prompt(
+        self,
+        employee_name: str,
+        month: str,
+        total_hours: float,
+        total_mouse: int,
+        total_keys: int,
+        app_count: int,
+        lines: List[str]
+    ) -> str:
+        return f"""Analyze this employee's computer activity for {month} and provide a productivity assessment.
 
 **Employee:** {employee_name}
 **Period:** {month}
@@ -52,11 +183,11 @@ class AIProductivityService:
 **Keystrokes:** {total_keys:,}
 
 
-**All Applications Used ({len(raw_apps)} total):**
-{chr(10).join(app_details)}
+**Applications Used ({app_count} total; largest by time, long tail grouped by category):**
+{chr(10).join(lines)}
 
 **Task:**
-1. Assign a productivity score (0-100) based on ALL {len(raw_apps)} applications:
+1. Assign a productivity score (0-100) based on ALL {app_count} applications:
    - Time on productive apps (IDEs, work tools) vs entertainment/social media
    - Activity intensity (mouse/keyboard usage)
    - Work tool variety
@@ -73,11 +204,75 @@ class AIProductivityService:
 }}
 
 Return ONLY the JSON, no extra text."""
-
+    
+    def format_raw_app_data_for_llm(
+        self,
+        raw_apps: list,
+        employee_name: str,
+        month: str,
+        categories: Optional[Dict[str, str]] = None
+    ) -> str:
+        """
+        Format raw application data into a structured prompt for LLM.
+        Apps are grouped by category (application -> category map) and site and
+        compacted to stay within AI_PROMPT_TOKEN_BUDGET however many apps there are.
+        """
+        
+         # ✅ ADD THIS
+        print("\n" + "="*80)
+        print(f"📊 FORMATTING DATA FOR LLM")
+        print(f"Employee: {employee_name}")
+        print(f"Month: {month}")
+        print(f"Total Apps: {len(raw_apps)}")
+        print("="*80 + "\n")
+        
+        total_seconds = sum(app["total_time_spent_seconds"] for app in raw_apps)
+        total_hours = round(total_seconds / 3600, 2)
+        total_minutes = round(total_seconds / 60, 2)
+        
+        total_mouse = sum(app["total_mouse_movements"] for app in raw_apps)
+        total_keys = sum(app["total_key_presses"] for app in raw_apps)
+        
+        groups = group_app_usage(raw_apps, categories or {})
+        
+        # Show the top-K groups individually and bucket the rest by category,
+        # shrinking K until the prompt fits the token budget
+        top_k = min(settings.AI_PROMPT_TOP_APPS, len(groups))
+        while True:
+            lines = []
+            for i, group in enumerate(bucket_long_tail(groups, top_k), 1):
+                time_minutes = round(group["time_seconds"] / 60, 2)
+                percentage = round((group["time_seconds"] / total_seconds * 100), 1) if total_seconds > 0 else 0
+                merged = f", {group['entries']} apps" if group["entries"] > 1 else ""
+                lines.append(
+                    f"{i}. {group['name']} [{group['category']}{merged}]: {time_minutes} min ({percentage}%) | "
+                    f"Mouse: {group['mouse']:,} | Keys: {group['keys']:,}"
+                )
+            
+            prompt = self._render_prompt(
+                employee_name, month, total_hours, total_mouse, total_keys, len(raw_apps), lines
+            )
+            if top_k == 0 or estimate_tokens(prompt) <= settings.AI_PROMPT_TOKEN_BUDGET:
+                break
+            top_k = max(0, top_k - max(1, top_k // 4))
+        
+        print(f"📝 Prompt: {len(lines)} lines from {len(raw_apps)} apps, ~{estimate_tokens(prompt)} tokens")
+        
         return prompt
     
-    async def analyze_productivity(self, raw_apps: list, employee_name: str, month: str) -> dict:
-        """Send raw app data to Groq AI and get productivity analysis"""
+    async def analyze_productivity(
+        self,
+        raw_apps: list,
+        employee_name: str,
+        month: str,
+        db=None,
+        employee_id: Optional[str] = None
+    ) -> dict:
+        """
+        Send raw app data to Groq AI and get productivity analysis.
+        With `db`, results are cached by a hash of the final prompt and reused
+        until they expire.
+        """
         
         if not raw_apps:
             return {
@@ -87,7 +282,16 @@ Return ONLY the JSON, no extra text."""
             }
         
         try:
-            prompt = self.format_raw_app_data_for_llm(raw_apps, employee_name, month)
+            categories = await self.categorize_apps(raw_apps)
+            prompt = self.format_raw_app_data_for_llm(raw_apps, employee_name, month, categories)
+            
+            cache_key = None
+            if db is not None and settings.AI_ANALYSIS_CACHE_TTL_HOURS > 0:
+                cache_key = self.analysis_cache_key(prompt)
+                cached = await self.get_cached_analysis(db, cache_key)
+                if cached is not None:
+                    logger.info(f"✅ AI analysis served from cache")
+                    return {**cached, "cached": True}
             
             # ✅ ADD THESE PRINT STATEMENTS
             print("\n" + "="*80)
@@ -98,7 +302,7 @@ Return ONLY the JSON, no extra text."""
             
             logger.info(f"🤖 Sending raw app data to Groq AI for analysis...")
             
-            completion = self.client.chat.completions.create(
+            completion = await self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {
@@ -125,6 +329,9 @@ Return ONLY the JSON, no extra text."""
             ai_analysis["model_used"] = self.model
             ai_analysis["total_apps_analyzed"] = len(raw_apps)
             
+            if cache_key:
+                await self.store_cached_analysis(db, cache_key, ai_analysis, employee_id)
+            
             return ai_analysis
             
         except json.JSONDecodeError as e:
@@ -0,0 +1,57 @@
+# backend/app/services/batch_loader.py
+
+from typing import Dict, Iterable, Optional
+from bson import ObjectId
+
+
+class BatchLoader:
+    """
+    Per-request batched document loader (DataLoader-style).
+
+    Collect the IDs a list endpoint needs, fetch them with one `$in` query per
+    collection via load_many(), then read them back with get(). Results (including
+    misses) are memoized for the lifetime of the loader, i.e. one request.
+    """
+    
+    def __init__(self, db):
+        self.db = db
+        self._cache: Dict[tuple, Dict[str, Optional[dict]]] = {}
+    
+    async def load_many(
+        self,
+        collection: str,
+        ids: Iterable,
+        field: str = "_id"
+    ) -> Dict[str, Optional[dict]]:
+        """Fetch all not-yet-cached documents whose `field` is in ids (one query)"""
+        keys = {str(key) for key in ids if key}
+        cache = self._cache.setdefault((collection, field), {})
+        missing = [key for key in keys if key not in cache]
+        
+        if missing:
+            for key in missing:
+                cache[key] = None
+            
+            if field == "_id":
+                # Invalid ObjectIds can never match; they stay cached as misses
+                values = [ObjectId(key) for key in missing if ObjectId.is_valid(key)]
+            else:
+                values = missing
+            
+            if values:
+                async for doc in self.db[collection].find({field: {"$in": values}}):
+                    cache[str(doc[field])] = doc
+        
+        return {key: cache[key] for key in keys}
+    
+    async def load(self, collection: str, key, field: str = "_id") -> Optional[dict]:
+        """Fetch a single document through the cache"""
+        if not key:
+            return None
+        return (await self.load_many(collection, [key], field)).get(str(key))
+    
+    def get(self, collection: str, key, field: str = "_id") -> Optional[dict]:
+        """Read a document loaded earlier by load_many(); None if missing or not loaded"""
+        if not key:
+            return None
+        return self._cache.get((collection, field), {}).get(str(key))
@@ -0,0 +1,97 @@
+# backend/app/services/counter_service.py
+
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+from uuid import uuid4
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+
+class CounterService:
+    """
+    Named counters and leases stored in the `counters` collection.
+
+    - increment(): atomic $inc, returns the new value
+    - next_sequence(): gap-tolerant sequence for human-readable IDs, seeded
+      once from existing data so numbering continues where it left off
+    - increment_and_check(): also reports whether this increment crossed a
+      multiple of `every`, so exactly one caller sees each threshold even when
+      increments race
+    - acquire()/release(): a lease giving single-flight execution across
+      worker processes; it expires on its own if the holder dies
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.counters_collection = db["counters"]
+
+    async def increment(self, name: str, amount: int = 1) -> int:
+        doc = await self.counters_collection.find_one_and_update(
+            {"_id": name},
+            {"$inc": {"value": amount}, "$set": {"updated_at": datetime.now()}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc["value"]
+
+    async def increment_and_check(self, name: str, every: int, amount: int = 1) -> bool:
+        """Increment and return True if the counter passed a multiple of `every`"""
+        value = await self.increment(name, amount)
+        return value // every > (value - amount) // every
+
+    async def next_sequence(self, name: str, seed: Optional[Callable[[], Awaitable[int]]] = None) -> int:
+        """
+        Next value of the sequence `name`; unique even under concurrent callers.
+
+        The first call for a sequence that doesn't exist yet awaits `seed()`
+        for the last value already handed out (e.g. the highest existing
+        document number) and the sequence continues from there.
+        """
+        doc = await self.counters_collection.find_one_and_update(
+            {"_id": name},
+            {"$inc": {"value": 1}, "$set": {"updated_at": datetime.now()}},
+            return_document=ReturnDocument.AFTER
+        )
+        if doc is not None:
+            return doc["value"]
+
+        start = await seed() if seed else 0
+        try:
+            await self.counters_collection.insert_one({"_id": name, "value": start, "updated_at": datetime.now()})
+        except DuplicateKeyError:
+            # A concurrent caller seeded it first; its value is just as good
+            pass
+        return await self.increment(name)
+
+    async def get(self, name: str) -> int:
+        doc = await self.counters_collection.find_one({"_id": name})
+        return doc["value"] if doc else 0
+
+    # ==================== LEASES (SINGLE-FLIGHT) ====================
+
+    async def acquire(self, name: str, ttl: timedelta) -> Optional[str]:
+        """
+        Take the lease `name` if nobody holds it (or the holder's lease expired).
+        Returns a token for release(), or None if someone else holds it.
+        """
+        now = datetime.now()
+        token = uuid4().hex
+        try:
+            await self.counters_collection.find_one_and_update(
+                {
+                    "_id": f"lease:{name}",
+                    "$or": [{"expires_at": {"$lte": now}}, {"expires_at": None}]
+                },
+                {"$set": {"token": token, "acquired_at": now, "expires_at": now + ttl}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # The lease document exists and is still held, so the upsert tried to insert
+            return None
+        return token
+
+    async def release(self, name: str, token: str):
+        await self.counters_collection.update_one(
+            {"_id": f"lease:{name}", "token": token},
+            {"$set": {"expires_at": None, "token": None}}
+        )
@@ -0,0 +1,149 @@
+# backend/app/services/leave_absence_index.py
+
+from datetime import datetime, date, timedelta
+from typing import Dict, List, Optional
+from pymongo import ReplaceOne, UpdateOne
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Day documents written per bulk_write call during rebuild
+REBUILD_CHUNK_SIZE = 500
+
+
+def _as_date(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _day_keys(start_date: date, end_date: date) -> List[str]:
+    days = (end_date - start_date).days
+    return [(start_date + timedelta(days=offset)).isoformat() for offset in range(days + 1)]
+
+
+class LeaveAbsenceIndexService:
+    """
+    Materialized per-day index of approved leave.
+
+    One document per calendar day in `leave_absence_days`, keyed by the ISO
+    date, with one small entry per approved request covering that day
+    (request, user, team lead, leave type). Maintained when a request is
+    approved or cancelled, so calendar, "on leave today" and capacity views
+    read one document per day in range instead of range-scanning every
+    overlapping request.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.days_collection = db["leave_absence_days"]
+
+    @staticmethod
+    def entry(leave_request: dict) -> dict:
+        return {
+            "request_id": str(leave_request["_id"]),
+            "user_id": leave_request["user_id"],
+            "team_lead_id": leave_request.get("team_lead_id"),
+            "leave_type_code": leave_request["leave_type_code"],
+            "is_half_day": leave_request.get("is_half_day", False)
+        }
+
+    async def add_request(self, leave_request: dict):
+        """Record an approved request on every day it covers (idempotent)"""
+        entry = self.entry(leave_request)
+        operations = []
+        for day in _day_keys(_as_date(leave_request["start_date"]), _as_date(leave_request["end_date"])):
+            # Pull first so re-adding the same request never duplicates it
+            operations.append(UpdateOne({"_id": day}, {"$pull": {"absences": {"request_id": entry["request_id"]}}}))
+            operations.append(UpdateOne({"_id": day}, {"$push": {"absences": entry}}, upsert=True))
+        await self.days_collection.bulk_write(operations, ordered=True)
+
+    async def remove_request(self, leave_request: dict):
+        """Drop a request from the days it covered"""
+        await self.days_collection.update_many(
+            {"_id": {
+                "$gte": _as_date(leave_request["start_date"]).isoformat(),
+                "$lte": _as_date(leave_request["end_date"]).isoformat()
+            }},
+            {"$pull": {"absences": {"request_id": str(leave_request["_id"])}}}
+        )
+
+    async def absences_between(
+        self,
+        start_date: date,
+        end_date: date,
+        team_lead_id: Optional[str] = None,
+        user_id: Optional[str] = None
+    ) -> Dict[str, List[dict]]:
+        """
+        Absence entries per ISO day in [start_date, end_date]. With team_lead_id
+        and/or user_id, only entries of that team or that user are kept.
+        """
+        cursor = self.days_collection.find(
+            {"_id": {"$gte": start_date.isoformat(), "$lte": end_date.isoformat()}}
+        ).sort("_id", 1)
+
+        days = {}
+        async for day in cursor:
+            absences = day.get("absences", [])
+            if team_lead_id or user_id:
+                absences = [
+                    a for a in absences
+                    if (team_lead_id and a.get("team_lead_id") == team_lead_id) or (user_id and a["user_id"] == user_id)
+                ]
+            if absences:
+                days[day["_id"]] = absences
+        return days
+
+    async def rebuild(self, start_date: Optional[date] = None, end_date: Optional[date] = None) -> Dict:
+        """
+        Rebuild the index from approved leave requests.
+
+        Idempotent: day documents in range are recomputed from scratch and
+        replaced. Requests crossing the range edges are clipped to it.
+        """
+        query = {"status": "approved"}
+        if start_date:
+            query["end_date"] = {"$gte": datetime.combine(start_date, datetime.min.time())}
+        if end_date:
+            query["start_date"] = {"$lte": datetime.combine(end_date, datetime.max.time())}
+
+        cursor = self.db.leave_requests.find(
+            query,
+            projection={"user_id": 1, "team_lead_id": 1, "leave_type_code": 1, "is_half_day": 1, "start_date": 1, "end_date": 1}
+        )
+
+        days: Dict[str, List[dict]] = {}
+        stats = {"requests_scanned": 0, "days_written": 0, "days_removed": 0}
+        async for leave_request in cursor:
+            stats["requests_scanned"] += 1
+            first = _as_date(leave_request["start_date"])
+            last = _as_date(leave_request["end_date"])
+            if start_date:
+                first = max(first, start_date)
+            if end_date:
+                last = min(last, end_date)
+            entry = self.entry(leave_request)
+            for day in _day_keys(first, last):
+                days.setdefault(day, []).append(entry)
+
+        operations = []
+        for day in sorted(days):
+            operations.append(ReplaceOne({"_id": day}, {"absences": days[day]}, upsert=True))
+            if len(operations) >= REBUILD_CHUNK_SIZE:
+                await self.days_collection.bulk_write(operations, ordered=False)
+                stats["days_written"] += len(operations)
+                operations = []
+        if operations:
+            await self.days_collection.bulk_write(operations, ordered=False)
+            stats["days_written"] += len(operations)
+
+        # Days in range that no longer have any approved leave
+        day_filter = {"$nin": list(days)}
+        if start_date:
+            day_filter["$gte"] = start_date.isoformat()
+        if end_date:
+            day_filter["$lte"] = end_date.isoformat()
+        result = await self.days_collection.delete_many({"_id": day_filter})
+        stats["days_removed"] = result.deleted_count
+
+        logger.info(f"Leave absence index rebuild complete: {stats}")
+        return stats
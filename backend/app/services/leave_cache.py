@@ -0,0 +1,55 @@
+# backend/app/services/leave_cache.py
+
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from app.core.config import settings
+
+# Sentinel for "not cached", since an empty holiday list is a valid cached value
+MISSING = object()
+
+
+class LeaveReferenceCache:
+    """
+    Per-process read-through cache for leave reference data that changes
+    rarely but is read on every leave application: leave types, yearly
+    policies and holiday lists.
+
+    Keys are (kind, identifier) tuples, e.g. ("policy", 2025). LeaveService
+    fills it on reads and invalidates the affected kind on every write;
+    entries also expire after `ttl_seconds` so writes made through another
+    worker process show up.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Tuple[str, Hashable], Tuple[float, Any]] = {}
+
+    def get(self, kind: str, identifier: Hashable = None) -> Any:
+        """Cached value, or MISSING"""
+        if self.ttl_seconds <= 0:
+            return MISSING
+        entry = self._entries.get((kind, identifier))
+        if entry is None or entry[0] <= time.monotonic():
+            self._entries.pop((kind, identifier), None)
+            return MISSING
+        return entry[1]
+
+    def set(self, kind: str, identifier: Hashable, value: Any, ttl_seconds: Optional[int] = None):
+        """Store a value; `ttl_seconds` overrides the default for this entry"""
+        ttl_seconds = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl_seconds <= 0:
+            return
+        self._entries[(kind, identifier)] = (time.monotonic() + ttl_seconds, value)
+
+    def invalidate(self, kind: str, identifier: Optional[Hashable] = MISSING):
+        """Drop one entry, or every entry of a kind if no identifier is given"""
+        if identifier is not MISSING:
+            self._entries.pop((kind, identifier), None)
+            return
+        for key in [key for key in self._entries if key[0] == kind]:
+            del self._entries[key]
+
+
+# Global instance
+leave_reference_cache = LeaveReferenceCache(ttl_seconds=settings.LEAVE_CACHE_TTL_SECONDS)
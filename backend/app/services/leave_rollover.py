@@ -0,0 +1,182 @@
+# backend/app/services/leave_rollover.py
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, Set
+
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import settings
+from app.services.leave_service import LeaveService
+
+logger = logging.getLogger(__name__)
+
+# A running job whose heartbeat is older than this is assumed lost (its worker
+# process died) and the next start resumes it from its checkpoint
+STALE_JOB_AFTER = timedelta(minutes=5)
+
+
+class LeaveRolloverJobs:
+    """
+    Year-start leave balance allocation for every active user.
+
+    - Users are processed in _id order, in chunks of LEAVE_ROLLOVER_CHUNK_SIZE:
+      one query for the chunk's previous-year balances, balances computed in
+      memory (carry-forward included), one unordered bulk_write per chunk.
+    - Writes are insert-only upserts on (user, year, leave type), so
+      re-running a year never changes balances that already exist.
+    - Progress and a checkpoint (last user _id) are saved to
+      `leave_rollover_jobs` after every chunk; starting a year whose job
+      failed or whose worker died resumes after the checkpoint.
+    """
+
+    def __init__(self, chunk_size: int):
+        self.chunk_size = chunk_size
+        self._background: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def job_id(year: int) -> str:
+        return f"rollover:{year}"
+
+    async def start(self, db, year: int, requested_by: str) -> dict:
+        """Start (or resume) the rollover for `year`; returns the job document"""
+        policy = await LeaveService(db).get_policy_by_year(year)
+        if not policy:
+            raise ValueError(f"No leave policy found for year {year}")
+
+        job_id = self.job_id(year)
+        now = datetime.now()
+        job = await db.leave_rollover_jobs.find_one({"_id": job_id})
+
+        if job and job["status"] == "running" and job["updated_at"] >= now - STALE_JOB_AFTER:
+            return job
+
+        if job and job["status"] in ("running", "failed"):
+            update = {"status": "running", "resumed_at": now, "updated_at": now, "error": None}
+        else:
+            # First run, or a re-run after completion (picks up users added since)
+            roles = [ra["role"] for ra in policy.get("role_allocations", [])]
+            update = {
+                "year": year,
+                "status": "running",
+                "requested_by": requested_by,
+                "total_users": await db.users.count_documents(self._users_query(roles)),
+                "processed_users": 0,
+                "balances_created": 0,
+                "balances_existing": 0,
+                "last_user_id": None,
+                "started_at": now,
+                "resumed_at": None,
+                "finished_at": None,
+                "updated_at": now,
+                "error": None
+            }
+
+        # Claim the job only if nobody changed it since we read it, so two
+        # workers starting the same year can't both run it
+        if job is None:
+            try:
+                await db.leave_rollover_jobs.insert_one({"_id": job_id, **update})
+            except DuplicateKeyError:
+                return await self.get(db, year)
+        else:
+            result = await db.leave_rollover_jobs.update_one(
+                {"_id": job_id, "updated_at": job["updated_at"]},
+                {"$set": update}
+            )
+            if result.modified_count == 0:
+                return await self.get(db, year)
+        job = await self.get(db, year)
+
+        task = asyncio.create_task(self._run(db, year))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return job
+
+    @staticmethod
+    def _users_query(roles: list) -> dict:
+        return {"role": {"$in": roles}, "is_active": {"$ne": False}}
+
+    async def _run(self, db, year: int):
+        job_id = self.job_id(year)
+        leave_service = LeaveService(db)
+        try:
+            policy = await leave_service.get_policy_by_year(year)
+            leave_types = {lt["code"]: lt for lt in await leave_service.get_leave_types(active_only=False)}
+            roles = [ra["role"] for ra in policy.get("role_allocations", [])]
+
+            job = await db.leave_rollover_jobs.find_one({"_id": job_id})
+            query = self._users_query(roles)
+            if job.get("last_user_id") is not None:
+                query["_id"] = {"$gt": job["last_user_id"]}
+
+            cursor = db.users.find(query, projection={"role": 1}).sort("_id", 1).batch_size(self.chunk_size)
+            chunk = []
+            async for user in cursor:
+                chunk.append(user)
+                if len(chunk) >= self.chunk_size:
+                    await self._process_chunk(db, leave_service, year, policy, leave_types, chunk)
+                    chunk = []
+            if chunk:
+                await self._process_chunk(db, leave_service, year, policy, leave_types, chunk)
+
+            await db.leave_rollover_jobs.update_one(
+                {"_id": job_id},
+                {"$set": {"status": "completed", "finished_at": datetime.now(), "updated_at": datetime.now()}}
+            )
+            logger.info(f"✅ Leave rollover for {year} completed")
+        except Exception as e:
+            logger.error(f"❌ Leave rollover for {year} failed: {e}")
+            await db.leave_rollover_jobs.update_one(
+                {"_id": job_id},
+                {"$set": {"status": "failed", "error": str(e), "updated_at": datetime.now()}}
+            )
+
+    async def _process_chunk(self, db, leave_service: LeaveService, year: int, policy: dict, leave_types: dict, users: list):
+        user_ids = [str(user["_id"]) for user in users]
+        previous_cursor = db.leave_balances.find({"user_id": {"$in": user_ids}, "year": year - 1})
+        previous_by_user = {}
+        async for balance in previous_cursor:
+            previous_by_user.setdefault(balance["user_id"], []).append(balance)
+
+        balances = []
+        for user, user_id in zip(users, user_ids):
+            balances.extend(leave_service.build_year_balances(
+                user_id, user["role"], year, policy, leave_types, previous_by_user.get(user_id, [])
+            ))
+        created, existing = await leave_service.write_new_balances(balances)
+
+        # Checkpoint only after the chunk is written, so a resume redoes at most one chunk
+        await db.leave_rollover_jobs.update_one(
+            {"_id": self.job_id(year)},
+            {
+                "$inc": {"processed_users": len(users), "balances_created": created, "balances_existing": existing},
+                "$set": {"last_user_id": users[-1]["_id"], "updated_at": datetime.now()}
+            }
+        )
+
+    async def get(self, db, year: int) -> Optional[dict]:
+        return await db.leave_rollover_jobs.find_one({"_id": self.job_id(year)})
+
+
+def serialize_rollover_job(job: dict) -> dict:
+    """API shape of a rollover job document"""
+    total = job.get("total_users") or 0
+    return {
+        "year": job["year"],
+        "status": job["status"],
+        "total_users": total,
+        "processed_users": job["processed_users"],
+        "progress_percent": round(min(job["processed_users"] / total, 1.0) * 100, 1) if total else 100.0,
+        "balances_created": job["balances_created"],
+        "balances_existing": job["balances_existing"],
+        "started_at": job["started_at"],
+        "resumed_at": job.get("resumed_at"),
+        "finished_at": job.get("finished_at"),
+        "error": job.get("error")
+    }
+
+
+# Global instance
+leave_rollover_jobs = LeaveRolloverJobs(chunk_size=settings.LEAVE_ROLLOVER_CHUNK_SIZE)
@@ -1,8 +1,19 @@
+from calendar import monthrange
 from datetime import datetime, date, timedelta
 from typing import List, Dict, Optional, Tuple
 from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 import holidays  # pip install holidays
 
+from app.core.config import settings
+from app.core.security import cpu_executor
+from app.core.user_cache import user_cache
+from app.services.counter_service import CounterService
+from app.services.leave_absence_index import LeaveAbsenceIndexService
+from app.services.leave_cache import MISSING, leave_reference_cache
+from app.services.working_days import WorkingDayCalendar, weekend_weekdays, working_day_calendars
+
 class LeaveService:
     
     def __init__(self, db):
@@ -15,6 +26,27 @@ class LeaveService:
         self.users_collection = db["users"]
         self.teams_collection = db["teams"]
     
+    # Leave types, policies, holidays and dashboard stats are read through
+    # leave_reference_cache; every write below must call one of these so the
+    # next read sees it
+    
+    def _leave_types_changed(self):
+        leave_reference_cache.invalidate("leave_types")
+    
+    def _holidays_changed(self, year: Optional[int] = None):
+        if year is None:
+            leave_reference_cache.invalidate("holidays")
+        else:
+            leave_reference_cache.invalidate("holidays", year)
+        working_day_calendars.invalidate(year)
+    
+    def _policy_changed(self, year: int):
+        leave_reference_cache.invalidate("policy", year)
+        working_day_calendars.invalidate(year)
+    
+    def _requests_changed(self):
+        leave_reference_cache.invalidate("leave_stats")
+    
     # ==================== LEAVE TYPE OPERATIONS ====================
     
     async def create_leave_type(self, leave_type_data: dict, admin_id: str) -> dict:
@@ -25,17 +57,26 @@ class LeaveService:
         
         result = await self.leave_types_collection.insert_one(leave_type_data)
         leave_type_data["_id"] = result.inserted_id
+        self._leave_types_changed()
         return leave_type_data
     
     async def get_leave_types(self, active_only: bool = True) -> List[dict]:
-        """Get all leave types"""
-        query = {"is_active": True} if active_only else {}
-        cursor = self.leave_types_collection.find(query)
-        return await cursor.to_list(length=None)
+        """Get all leave types (cached)"""
+        leave_types = leave_reference_cache.get("leave_types", active_only)
+        if leave_types is MISSING:
+            query = {"is_active": True} if active_only else {}
+            cursor = self.leave_types_collection.find(query)
+            leave_types = await cursor.to_list(length=None)
+            leave_reference_cache.set("leave_types", active_only, leave_types)
+        # Copies, so callers can't modify the cached documents
+        return [dict(leave_type) for leave_type in leave_types]
     
     async def get_leave_type_by_code(self, code: str) -> Optional[dict]:
-        """Get leave type by code"""
-        return await self.leave_types_collection.find_one({"code": code, "is_active": True})
+        """Get active leave type by code (served from the cached leave type list)"""
+        for leave_type in await self.get_leave_types(active_only=True):
+            if leave_type.get("code") == code:
+                return leave_type
+        return None
     
     async def update_leave_type(self, leave_type_id: str, update_data: dict) -> bool:
         """Update leave type"""
@@ -44,6 +85,7 @@ class LeaveService:
             {"_id": ObjectId(leave_type_id)},
             {"$set": update_data}
         )
+        self._leave_types_changed()
         return result.modified_count > 0
     
     async def delete_leave_type(self, leave_type_id: str) -> bool:
@@ -52,6 +94,7 @@ class LeaveService:
             {"_id": ObjectId(leave_type_id)},
             {"$set": {"is_active": False, "updated_at": datetime.now()}}
         )
+        self._leave_types_changed()
         return result.modified_count > 0
     
     # ==================== PUBLIC HOLIDAY OPERATIONS ====================
@@ -70,26 +113,61 @@ class LeaveService:
         
         result = await self.public_holidays_collection.insert_one(holiday_data)
         holiday_data["_id"] = result.inserted_id
+        self._holidays_changed(holiday_data["date"].year)
         return holiday_data
     
-    async def import_holidays_from_country(self, country: str, year: int, admin_id: str) -> int:
-        """Import holidays for a country using holidays library"""
-        try:
-            country_holidays = holidays.country_holidays(country, years=year)
-            imported_count = 0
-            
-            for holiday_date, holiday_name in country_holidays.items():
-                # Convert date to datetime
+    async def import_holidays(self, imports: List[Tuple[str, int]], admin_id: str) -> Dict[str, dict]:
+        """
+        Import holidays for many (country, year) pairs in one pass.
+        
+        Holiday sets are computed off the event loop (one holidays-library call
+        per country), existing entries are read with one query, and everything
+        is written with a single unordered bulk_write of upserts keyed on
+        (date, country). Existing holidays are never modified, so admin edits
+        survive a re-import.
+        
+        Returns a diff per country: holidays added, already present, stale
+        (imported earlier but no longer in the calendar; left in place) or the
+        error if the country isn't supported.
+        """
+        years_by_country: Dict[str, set] = {}
+        for country, year in imports:
+            years_by_country.setdefault(country, set()).add(year)
+        
+        diff = {}
+        calendars = {}
+        for country, years in years_by_country.items():
+            diff[country] = {"years": sorted(years), "added": [], "already_present": 0, "stale": []}
+            try:
+                calendars[country] = await cpu_executor.run(
+                    holidays.country_holidays, country, years=sorted(years)
+                )
+            except (KeyError, NotImplementedError) as e:
+                diff[country]["error"] = f"Unsupported country: {e}"
+        
+        if not calendars:
+            return diff
+        
+        all_years = {year for country in calendars for year in years_by_country[country]}
+        existing_cursor = self.public_holidays_collection.find(
+            {
+                "country": {"$in": list(calendars)},
+                "date": {"$gte": datetime(min(all_years), 1, 1), "$lte": datetime(max(all_years), 12, 31, 23, 59, 59)}
+            },
+            projection={"date": 1, "country": 1, "name": 1, "imported": 1}
+        )
+        existing = {(h["country"], h["date"]): h async for h in existing_cursor}
+        
+        operations = []
+        operation_keys = []
+        for country, country_holidays in calendars.items():
+            wanted = set()
+            for holiday_date, holiday_name in sorted(country_holidays.items()):
                 holiday_datetime = datetime.combine(holiday_date, datetime.min.time())
-                
-                # Check if already exists
-                exists = await self.public_holidays_collection.find_one({
-                    "date": holiday_datetime,
-                    "country": country
-                })
-                
-                if not exists:
-                    holiday_data = {
+                wanted.add(holiday_datetime)
+                operations.append(UpdateOne(
+                    {"date": holiday_datetime, "country": country},
+                    {"$setOnInsert": {
                         "name": holiday_name,
                         "date": holiday_datetime,
                         "country": country,
@@ -100,26 +178,77 @@ class LeaveService:
                         "created_by": admin_id,
                         "created_at": datetime.now(),
                         "updated_at": None
-                    }
-                    await self.public_holidays_collection.insert_one(holiday_data)
-                    imported_count += 1
+                    }},
+                    upsert=True
+                ))
+                operation_keys.append((country, holiday_datetime, holiday_name))
             
-            return imported_count
+            for (holiday_country, holiday_datetime), holiday in existing.items():
+                if (holiday_country == country and holiday.get("imported")
+                        and holiday_datetime.year in years_by_country[country] and holiday_datetime not in wanted):
+                    diff[country]["stale"].append({"date": holiday_datetime.date().isoformat(), "name": holiday["name"]})
+        
+        upserted = {}
+        if operations:
+            try:
+                result = await self.public_holidays_collection.bulk_write(operations, ordered=False)
+                upserted = result.upserted_ids
+            except BulkWriteError as e:
+                # A concurrent import inserted some of the same holidays first; the
+                # unique country_date_imported_unique index rejected ours, so those
+                # count as already present
+                if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                    raise
+                upserted = {entry["index"]: entry["_id"] for entry in e.details.get("upserted", [])}
+        
+        changed_years = set()
+        for index, (country, holiday_datetime, holiday_name) in enumerate(operation_keys):
+            if index in upserted:
+                diff[country]["added"].append({"date": holiday_datetime.date().isoformat(), "name": holiday_name})
+                changed_years.add(holiday_datetime.year)
+            else:
+                diff[country]["already_present"] += 1
+        
+        for year in changed_years:
+            self._holidays_changed(year)
+        return diff
+    
+    async def import_holidays_from_country(self, country: str, year: int, admin_id: str) -> int:
+        """Import holidays for a country using holidays library"""
+        try:
+            diff = await self.import_holidays([(country, year)], admin_id)
         except Exception as e:
             print(f"Error importing holidays: {e}")
             return 0
+        if "error" in diff[country]:
+            print(f"Error importing holidays: {diff[country]['error']}")
+        return len(diff[country]["added"])
     
     async def get_holidays_by_year(self, year: int) -> List[dict]:
-        """Get all holidays for a specific year"""
-        start_date = datetime(year, 1, 1)
-        end_date = datetime(year, 12, 31, 23, 59, 59)
-        
-        cursor = self.public_holidays_collection.find({
-            "date": {"$gte": start_date, "$lte": end_date},
-            "is_active": True
-        }).sort("date", 1)
-        
-        return await cursor.to_list(length=None)
+        """Get all holidays for a specific year (cached)"""
+        holidays_list = leave_reference_cache.get("holidays", year)
+        if holidays_list is MISSING:
+            start_date = datetime(year, 1, 1)
+            end_date = datetime(year, 12, 31, 23, 59, 59)
+            
+            cursor = self.public_holidays_collection.find({
+                "date": {"$gte": start_date, "$lte": end_date},
+                "is_active": True
+            }).sort("date", 1)
+            
+            holidays_list = await cursor.to_list(length=None)
+            leave_reference_cache.set("holidays", year, holidays_list)
+        return [dict(holiday) for holiday in holidays_list]
+    
+    async def get_holidays_between(self, start_date: date, end_date: date) -> List[dict]:
+        """Active holidays in [start_date, end_date], from the cached per-year lists"""
+        holidays_list = []
+        for year in range(start_date.year, end_date.year + 1):
+            for holiday in await self.get_holidays_by_year(year):
+                holiday_date = holiday["date"].date() if isinstance(holiday["date"], datetime) else holiday["date"]
+                if start_date <= holiday_date <= end_date:
+                    holidays_list.append(holiday)
+        return holidays_list
     
     async def get_holiday_dates(self, year: int) -> List[date]:
         """Get list of holiday dates for calculations"""
@@ -138,6 +267,8 @@ class LeaveService:
             {"_id": ObjectId(holiday_id)},
             {"$set": update_data}
         )
+        # The date may have moved between years
+        self._holidays_changed()
         return result.modified_count > 0
     
     async def delete_holiday(self, holiday_id: str) -> bool:
@@ -145,6 +276,7 @@ class LeaveService:
         result = await self.public_holidays_collection.delete_one(
             {"_id": ObjectId(holiday_id)}
         )
+        self._holidays_changed()
         return result.deleted_count > 0
     
     # ==================== LEAVE POLICY OPERATIONS ====================
@@ -162,6 +294,7 @@ class LeaveService:
                 {"$set": policy_data}
             )
             existing.update(policy_data)
+            self._policy_changed(year)
             return existing
         else:
             # Create new
@@ -173,11 +306,18 @@ class LeaveService:
             
             result = await self.leave_policies_collection.insert_one(policy_data)
             policy_data["_id"] = result.inserted_id
+            self._policy_changed(year)
             return policy_data
     
     async def get_policy_by_year(self, year: int) -> Optional[dict]:
-        """Get leave policy for a specific year"""
-        return await self.leave_policies_collection.find_one({"year": year, "is_active": True})
+        """Get leave policy for a specific year (cached once found)"""
+        policy = leave_reference_cache.get("policy", year)
+        if policy is MISSING:
+            policy = await self.leave_policies_collection.find_one({"year": year, "is_active": True})
+            if policy is None:
+                return None
+            leave_reference_cache.set("policy", year, policy)
+        return dict(policy)
     
     async def get_current_policy(self) -> Optional[dict]:
         """Get current year's policy"""
@@ -283,16 +423,83 @@ class LeaveService:
         if not policy:
             return
         
-        # Find role allocations
-        for role_allocation in policy.get("role_allocations", []):
-            if role_allocation["role"] == role:
-                for allocation in role_allocation["allocations"]:
-                    await self.allocate_leaves(
-                        user_id=user_id,
-                        year=year,
-                        leave_type_code=allocation["leave_type_code"],
-                        days=allocation["days"]
-                    )
+        leave_types = {lt["code"]: lt for lt in await self.get_leave_types(active_only=True)}
+        previous = await self.leave_balances_collection.find(
+            {"user_id": user_id, "year": year - 1}
+        ).to_list(length=None)
+        balances = self.build_year_balances(user_id, role, year, policy, leave_types, previous)
+        await self.write_new_balances(balances)
+    
+    @staticmethod
+    def build_year_balances(
+        user_id: str,
+        role: str,
+        year: int,
+        policy: dict,
+        leave_types: Dict[str, dict],
+        previous_balances: List[dict]
+    ) -> List[dict]:
+        """
+        Balance documents for one user's year from the policy's role allocations
+        (no I/O). Unused days from last year's balances are carried forward up
+        to the leave type's limit when the policy and leave type allow it.
+        """
+        allocations = next(
+            (ra["allocations"] for ra in policy.get("role_allocations", []) if ra["role"] == role),
+            []
+        )
+        previous_by_type = {b["leave_type_code"]: b for b in previous_balances}
+        
+        expires_on = None
+        if policy.get("carry_forward_enabled"):
+            month = policy.get("carry_forward_expiry_month", 3)
+            day = min(policy.get("carry_forward_expiry_day", 31), monthrange(year, month)[1])
+            expires_on = datetime(year, month, day)
+        
+        balances = []
+        for allocation in allocations:
+            code = allocation["leave_type_code"]
+            leave_type = leave_types.get(code, {})
+            
+            carried_forward = 0
+            previous = previous_by_type.get(code)
+            if expires_on and previous and leave_type.get("can_carry_forward"):
+                carried_forward = max(0, min(previous.get("available", 0), leave_type.get("carry_forward_limit", 0)))
+            
+            total = allocation["days"] + carried_forward
+            balances.append({
+                "user_id": user_id,
+                "year": year,
+                "leave_type_code": code,
+                "allocated": allocation["days"],
+                "carried_forward": carried_forward,
+                "total_available": total,
+                "used": 0,
+                "pending": 0,
+                "available": total,
+                "carry_forward_expires_on": expires_on if carried_forward else None,
+                "last_updated": datetime.now()
+            })
+        return balances
+    
+    async def write_new_balances(self, balances: List[dict]) -> Tuple[int, int]:
+        """
+        Insert balance documents that don't exist yet, in one unordered bulk
+        write keyed on (user, year, leave type). Existing balances are left
+        untouched, so re-running is safe. Returns (created, already_present).
+        """
+        if not balances:
+            return (0, 0)
+        operations = [
+            UpdateOne(
+                {"user_id": b["user_id"], "year": b["year"], "leave_type_code": b["leave_type_code"]},
+                {"$setOnInsert": b},
+                upsert=True
+            )
+            for b in balances
+        ]
+        result = await self.leave_balances_collection.bulk_write(operations, ordered=False)
+        return (result.upserted_count, len(balances) - result.upserted_count)
     
     async def get_user_balances(self, user_id: str, year: int) -> List[dict]:
         """Get all leave balances for a user"""
@@ -367,63 +574,82 @@ class LeaveService:
     
     # ==================== LEAVE CALCULATION ====================
     
-    def calculate_leave_days(
+    async def get_working_day_calendar(self, year: int, weekend_days: List[str], exclude_holidays: bool) -> WorkingDayCalendar:
+        """Cached working-day calendar for a year; built from the active holidays on a miss"""
+        key = working_day_calendars.key(year, weekend_weekdays(weekend_days), exclude_holidays)
+        calendar = working_day_calendars.get(key)
+        if calendar is None:
+            holiday_dates = await self.get_holiday_dates(year) if exclude_holidays else []
+            calendar = working_day_calendars.build(key, holiday_dates)
+        return calendar
+    
+    async def calculate_leave_days(
         self,
         start_date: date,
         end_date: date,
         is_half_day: bool,
         exclude_weekends: bool,
         exclude_holidays: bool,
-        weekend_days: List[str],
-        holiday_dates: List[date]
+        weekend_days: List[str]
     ) -> Tuple[float, List[str]]:
         """
         Calculate actual leave days excluding weekends and holidays
         Returns: (total_days, excluded_dates)
+        
+        Uses the per-year working-day calendars, so the cost doesn't grow with
+        the length of the range or the number of holidays. A range crossing a
+        year boundary uses each year's holidays.
         """
         if is_half_day:
             return (0.5, [])
         
+        if isinstance(start_date, datetime):
+            start_date = start_date.date()
+        if isinstance(end_date, datetime):
+            end_date = end_date.date()
+        
         total_days = 0
         excluded_dates = []
-        current_date = start_date
-        
-        # Map weekend days to Python weekday numbers
-        weekday_map = {
-            "monday": 0, "tuesday": 1, "wednesday": 2,
-            "thursday": 3, "friday": 4, "saturday": 5, "sunday": 6
-        }
-        excluded_weekdays = [weekday_map[day.lower()] for day in weekend_days] if exclude_weekends else []
         
-        while current_date <= end_date:
-            is_excluded = False
-            
-            # Check if weekend
-            if exclude_weekends and current_date.weekday() in excluded_weekdays:
-                excluded_dates.append(current_date.isoformat())
-                is_excluded = True
-            
-            # Check if public holiday
-            if exclude_holidays and current_date in holiday_dates:
-                excluded_dates.append(current_date.isoformat())
-                is_excluded = True
-            
-            if not is_excluded:
-                total_days += 1
-            
-            current_date += timedelta(days=1)
+        for year in range(start_date.year, end_date.year + 1):
+            calendar = await self.get_working_day_calendar(
+                year,
+                weekend_days if exclude_weekends else [],
+                exclude_holidays
+            )
+            total_days += calendar.working_days(start_date, end_date)
+            excluded_dates.extend(day.isoformat() for day in calendar.excluded_dates(start_date, end_date))
         
         return (float(total_days), excluded_dates)
     
     # ==================== LEAVE REQUEST OPERATIONS ====================
     
+    async def _last_request_sequence(self, year: int) -> int:
+        """
+        Highest sequence number already used in the year's request numbers.
+        Compared numerically: past 99999 the suffix is wider than its zfill(5)
+        padding, so a string sort would no longer find the maximum.
+        """
+        prefix = f"LR-{year}-"
+        cursor = self.leave_requests_collection.aggregate([
+            {"$match": {"request_number": {"$regex": f"^{prefix}[0-9]+$"}}},
+            {"$group": {
+                "_id": None,
+                "last": {"$max": {"$toLong": {"$substrCP": [
+                    "$request_number", len(prefix), {"$strLenCP": "$request_number"}
+                ]}}}
+            }}
+        ])
+        result = await cursor.to_list(length=1)
+        return int(result[0]["last"]) if result and result[0]["last"] is not None else 0
+    
     async def generate_request_number(self, year: int) -> str:
         """Generate unique request number: LR-2024-00001"""
-        # Count requests for this year
-        count = await self.leave_requests_collection.count_documents({
-            "request_number": {"$regex": f"^LR-{year}-"}
-        })
-        return f"LR-{year}-{str(count + 1).zfill(5)}"
+        sequence = await CounterService(self.db).next_sequence(
+            f"leave_request_number:{year}",
+            seed=lambda: self._last_request_sequence(year)
+        )
+        return f"LR-{year}-{str(sequence).zfill(5)}"
     
     async def create_leave_request(self, request_data: dict, user: dict) -> dict:
         """Create a new leave request"""
@@ -438,18 +664,14 @@ class LeaveService:
         if not leave_type:
             raise ValueError("Invalid leave type")
         
-        # Get holiday dates
-        holiday_dates = await self.get_holiday_dates(year)
-        
         # Calculate leave days
-        total_days, excluded_dates = self.calculate_leave_days(
+        total_days, excluded_dates = await self.calculate_leave_days(
             start_date=request_data["start_date"],
             end_date=request_data["end_date"],
             is_half_day=request_data.get("is_half_day", False),
             exclude_weekends=policy["exclude_weekends"],
             exclude_holidays=policy["exclude_public_holidays"],
-            weekend_days=policy["weekend_days"],
-            holiday_dates=holiday_dates
+            weekend_days=policy["weekend_days"]
         )
         
         # Check balance
@@ -460,6 +682,7 @@ class LeaveService:
                 raise ValueError(f"Insufficient leave balance. Available: {balance['available']}, Required: {total_days}")
         
         # Get team lead info
+        team = None
         team_lead_id = None
         team_lead_name = None
         if user.get("team_id"):
@@ -467,10 +690,26 @@ class LeaveService:
             if team:
                 team_lead_id = team.get("team_lead_id")
                 if team_lead_id:
-                    tl = await self.users_collection.find_one({"_id": ObjectId(team_lead_id)})
+                    tl = await user_cache.get(str(team_lead_id))
+                    if tl is None:
+                        tl = await self.users_collection.find_one({"_id": ObjectId(team_lead_id)})
+                        if tl:
+                            await user_cache.set(str(team_lead_id), tl)
                     if tl:
                         team_lead_name = tl.get("full_name")
         
+        # Flag working days on which this leave would take the team below its minimum staffing
+        capacity_breach_dates = []
+        if team and settings.TEAM_CAPACITY_CHECK_ENABLED:
+            # Imported here: team_capacity imports this module (it builds on LeaveService)
+            from app.services.team_capacity import TeamCapacityService
+            capacity_breach_dates = await TeamCapacityService(self.db).check_request(team, {
+                "user_id": str(user["_id"]),
+                "start_date": request_data["start_date"],
+                "end_date": request_data["end_date"],
+                "is_half_day": request_data.get("is_half_day", False)
+            })
+        
         # Generate request number
         request_number = await self.generate_request_number(year)
         
@@ -500,6 +739,7 @@ class LeaveService:
             "half_day_period": request_data.get("half_day_period"),
             "total_days": total_days,
             "excluded_dates": excluded_dates,
+            "capacity_breach_dates": capacity_breach_dates,
             "reason": request_data["reason"],
             "attachment_url": request_data.get("attachment_url"),
             "status": "pending",
@@ -519,6 +759,7 @@ class LeaveService:
         
         result = await self.leave_requests_collection.insert_one(leave_request)
         leave_request["_id"] = result.inserted_id
+        self._requests_changed()
         
         # Update balance
         await self.update_balance_on_request(
@@ -555,6 +796,8 @@ class LeaveService:
             {"_id": ObjectId(request_id)},
             {"$set": update_data}
         )
+        self._requests_changed()
+        await LeaveAbsenceIndexService(self.db).add_request(leave_request)
         
         # Update balance (from pending to used)
         # Extract year from start_date (which is now datetime)
@@ -596,6 +839,7 @@ class LeaveService:
             {"_id": ObjectId(request_id)},
             {"$set": update_data}
         )
+        self._requests_changed()
         
         # Return balance
         # Extract year from start_date (which is now datetime)
@@ -637,6 +881,9 @@ class LeaveService:
             {"_id": ObjectId(request_id)},
             {"$set": update_data}
         )
+        self._requests_changed()
+        if leave_request["status"] == "approved":
+            await LeaveAbsenceIndexService(self.db).remove_request(leave_request)
         
         # Return balance
         # Extract year from start_date (which is now datetime)
@@ -686,47 +933,94 @@ class LeaveService:
         return await self.get_leave_requests({"status": "pending"})
     
     async def get_leave_stats(self) -> dict:
-        """Get leave statistics for HR dashboard"""
+        """
+        Get leave statistics for HR dashboard
+        
+        One aggregation: the $facet branches share a single pass over the
+        requests. Cached for LEAVE_STATS_CACHE_TTL_SECONDS and dropped whenever
+        a request is created, approved, rejected or cancelled.
+        """
         today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         
-        # Pending approvals
-        pending_count = await self.leave_requests_collection.count_documents({"status": "pending"})
+        stats = leave_reference_cache.get("leave_stats", today)
+        if stats is not MISSING:
+            return dict(stats)
         
-        # Approved today
         tomorrow = today + timedelta(days=1)
-        approved_today_count = await self.leave_requests_collection.count_documents({
-            "status": "approved",
-            "hr_action_at": {
-                "$gte": today,
-                "$lt": tomorrow
-            }
-        })
-        
-        # On leave today
-        on_leave_today_count = await self.leave_requests_collection.count_documents({
-            "status": "approved",
-            "start_date": {"$lte": today},
-            "end_date": {"$gte": today}
-        })
-        
-        # Total requests
-        total_requests = await self.leave_requests_collection.count_documents({})
-        
-        return {
-            "pending_count": pending_count,
-            "approved_today_count": approved_today_count,
-            "on_leave_today_count": on_leave_today_count,
-            "total_requests": total_requests
+        pipeline = [
+            {"$project": {"status": 1, "leave_type_code": 1, "hr_action_at": 1, "start_date": 1, "end_date": 1}},
+            {"$facet": {
+                # Requests missing the field are counted under "unknown" (a null key
+                # would fail the Dict[str, int] response model)
+                "by_status": [{"$group": {"_id": {"$ifNull": ["$status", "unknown"]}, "count": {"$sum": 1}}}],
+                "by_type": [{"$group": {"_id": {"$ifNull": ["$leave_type_code", "unknown"]}, "count": {"$sum": 1}}}],
+                # Approved today
+                "approved_today": [
+                    {"$match": {"status": "approved", "hr_action_at": {"$gte": today, "$lt": tomorrow}}},
+                    {"$count": "count"}
+                ],
+                # On leave today
+                "on_leave_today": [
+                    {"$match": {"status": "approved", "start_date": {"$lte": today}, "end_date": {"$gte": today}}},
+                    {"$count": "count"}
+                ]
+            }}
+        ]
+        result = (await self.leave_requests_collection.aggregate(pipeline).to_list(length=1))[0]
+        
+        by_status = {row["_id"]: row["count"] for row in result["by_status"]}
+        stats = {
+            "pending_count": by_status.get("pending", 0),
+            "approved_today_count": result["approved_today"][0]["count"] if result["approved_today"] else 0,
+            "on_leave_today_count": result["on_leave_today"][0]["count"] if result["on_leave_today"] else 0,
+            "total_requests": sum(by_status.values()),
+            "by_status": by_status,
+            "by_type": {row["_id"]: row["count"] for row in result["by_type"]}
         }
+        leave_reference_cache.set("leave_stats", today, stats, ttl_seconds=settings.LEAVE_STATS_CACHE_TTL_SECONDS)
+        return dict(stats)
+    
+    async def get_approved_leaves_between(
+        self,
+        start_date: date,
+        end_date: date,
+        team_lead_id: Optional[str] = None,
+        user_id: Optional[str] = None
+    ) -> List[dict]:
+        """
+        Approved leave requests overlapping [start_date, end_date], oldest first.
+        With team_lead_id and/or user_id, only that team's and/or that user's.
+        
+        With LEAVE_ABSENCE_INDEX_ENABLED the matching requests come from the
+        per-day absence index (one document per day in range) and are then
+        fetched by _id; otherwise the requests are range-scanned.
+        """
+        if settings.LEAVE_ABSENCE_INDEX_ENABLED:
+            days = await LeaveAbsenceIndexService(self.db).absences_between(
+                start_date, end_date, team_lead_id=team_lead_id, user_id=user_id
+            )
+            request_ids = {absence["request_id"] for absences in days.values() for absence in absences}
+            if not request_ids:
+                return []
+            query = {"_id": {"$in": [ObjectId(request_id) for request_id in request_ids]}}
+        else:
+            query = {
+                "status": "approved",
+                "start_date": {"$lte": datetime.combine(end_date, datetime.max.time())},
+                "end_date": {"$gte": datetime.combine(start_date, datetime.min.time())}
+            }
+            scope = []
+            if team_lead_id:
+                scope.append({"team_lead_id": team_lead_id})
+            if user_id:
+                scope.append({"user_id": user_id})
+            if scope:
+                query["$or"] = scope
+        
+        cursor = self.leave_requests_collection.find(query).sort("start_date", 1)
+        return await cursor.to_list(length=None)
     
     async def get_employees_on_leave_today(self) -> List[dict]:
         """Get list of employees on leave today"""
-        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        cursor = self.leave_requests_collection.find({
-            "status": "approved",
-            "start_date": {"$lte": today},
-            "end_date": {"$gte": today}
-        })
-        
-        return await cursor.to_list(length=None)
\ No newline at end of file
+        today = date.today()
+        return await self.get_approved_leaves_between(today, today)
@@ -1,18 +1,96 @@
 # backend/app/services/smart_classifier.py
 
 import os
-from typing import Dict, Optional
+import re
+import time
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
+from bson import Binary
+from app.core.config import settings
+from app.services.activity_model import ActivityModel, count_batch, merge_counts, fit_from_counts
 
 logger = logging.getLogger(__name__)
 
+# Document id of the trained fallback model in `ml_models`
+MODEL_ID = "activity_classifier"
+
+# Activities per counting task sent to the training process pool
+TRAINING_BATCH_SIZE = 2000
+
+# Categories the rules can emit that aren't in self.categories
+EXTRA_CATEGORY_WEIGHTS = {'learning': 0.9}
+
+class PatternMatcher:
+    """
+    All substring patterns compiled into one regex; search() returns the labels
+    of every pattern found anywhere in the text in a single pass.
+
+    The patterns are merged into a character trie so shared prefixes are only
+    tried once. The lookahead lets matches overlap, and greedy optional tails
+    make the regex report the longest pattern starting at each position;
+    shorter patterns that are prefixes of it are credited via `implied`.
+    """
+    
+    def __init__(self, patterns: Dict[str, List[str]]):
+        # pattern -> labels (a pattern can belong to several categories)
+        self.labels: Dict[str, set] = {}
+        for label, words in patterns.items():
+            for word in words:
+                self.labels.setdefault(word.lower(), set()).add(label)
+        
+        self.implied: Dict[str, FrozenSet[str]] = {
+            word: frozenset().union(*(labels for other, labels in self.labels.items() if word.startswith(other)))
+            for word in self.labels
+        }
+        
+        trie: Dict = {}
+        for word in self.labels:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[""] = True
+        self.regex = re.compile("(?=(" + self._trie_pattern(trie) + "))") if trie else None
+    
+    @classmethod
+    def _trie_pattern(cls, node: Dict) -> str:
+        """
+        Regex for a character trie, e.g. {docs, documentation} -> doc(?:s|umentation).
+        Shared prefixes are matched once, and optional tails are greedy so the
+        longest pattern at a position wins.
+        """
+        terminal = "" in node
+        branches = [re.escape(char) + cls._trie_pattern(child) for char, child in sorted(node.items()) if char]
+        
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            return ("(?:" + body + ")?") if len(branches) == 1 else body + "?"
+        return body
+    
+    def search(self, text: str) -> FrozenSet[str]:
+        if not text or self.regex is None:
+            return frozenset()
+        found = set()
+        for match in self.regex.finditer(text):
+            found |= self.implied[match.group(1)]
+        return frozenset(found)
+
+
 class SmartProductivityClassifier:
     """
     Smart classifier for productivity tracking
     Uses rule-based classification (AI optional)
     """
     
+    # Distinct (app, title, url) combinations remembered by classify()
+    CACHE_SIZE = 10000
+    
     def __init__(self):
         self.categories = {
             'development': {
@@ -52,6 +130,24 @@ class SmartProductivityClassifier:
                 'weight': 0.6
             }
         }
+        self.compile_rules()
+        
+        # (model, memoized predict) swapped as one tuple so readers never see a mix
+        self._predictor: Optional[Tuple[ActivityModel, object]] = None
+        self._model_checked_at = 0.0
+        self.ml_predictions = 0
+        self.ml_skipped = 0
+    
+    def compile_rules(self):
+        """(Re)build the matchers from self.categories; call after editing the rules"""
+        self._category_order = list(self.categories)
+        self._app_matcher = PatternMatcher(
+            {category: config['apps'] for category, config in self.categories.items()}
+        )
+        self._keyword_matcher = PatternMatcher(
+            {category: config['keywords'] for category, config in self.categories.items()}
+        )
+        self._classify_cached = lru_cache(maxsize=self.CACHE_SIZE)(self._classify_rules)
     
     async def classify(
         self,
@@ -65,20 +161,83 @@ class SmartProductivityClassifier:
         db = None
     ) -> Dict:
         """
-        Classify activity using rule-based approach
+        Classify activity using rule-based approach, falling back to the trained
+        model when no rule matches. Results are memoized per (app, title, url);
+        the activity metrics don't affect the category.
+        """
+        return (await self.classify_batch([
+            {"app_name": app_name, "window_title": window_title, "url": url}
+        ]))[0]
+    
+    async def classify_batch(self, activities: List[Dict]) -> List[Dict]:
+        """
+        Classify many activities at once (bulk reclassification).
+        Each item needs `app_name` and may have `window_title` and `url`.
+        
+        Model inference only runs for activities no rule matched, and stops once
+        the batch has used ML_INFERENCE_BUDGET_US per record; the rest keep their
+        rule-based result.
         """
+        keys = [
+            (item.get("app_name") or "", item.get("window_title") or "", item.get("url") or "")
+            for item in activities
+        ]
+        results = [dict(self._classify_cached(*key)) for key in keys]
+        
+        predictor = self._predictor
+        if predictor is None:
+            return results
+        
+        model, predict = predictor
+        budget_seconds = settings.ML_INFERENCE_BUDGET_US * len(keys) / 1_000_000
+        started = time.perf_counter()
+        for result, key in zip(results, keys):
+            if result['category'] != 'other':
+                continue
+            if time.perf_counter() - started > budget_seconds:
+                self.ml_skipped += 1
+                continue
+            
+            category, confidence = predict(*key)
+            self.ml_predictions += 1
+            if confidence >= settings.ML_MIN_CONFIDENCE:
+                result.update({
+                    'category': category,
+                    'subcategory': 'predicted',
+                    'productivity_weight': self._category_weight(category),
+                    'confidence': round(confidence, 3),
+                    'method': 'ml',
+                    'reasoning': f'Model prediction ({model.version})'
+                })
+        
+        return results
+    
+    def _category_weight(self, category: str) -> float:
+        if category in self.categories:
+            return self.categories[category]['weight']
+        return EXTRA_CATEGORY_WEIGHTS.get(category, 0.5)
+    
+    def cache_info(self):
+        return self._classify_cached.cache_info()
+    
+    def _classify_rules(self, app_name: str, window_title: str, url: str) -> Dict:
         app_lower = app_name.lower()
         title_lower = window_title.lower()
-        url_lower = (url or '').lower()
+        url_lower = url.lower()
         
         # Special handling for YouTube
         if 'youtube' in app_lower or 'youtube.com' in url_lower:
             return self._classify_youtube(title_lower, url_lower)
         
-        # Check each category
-        for category, config in self.categories.items():
-            # Check app name
-            if any(app in app_lower for app in config['apps']):
+        app_hits = self._app_matcher.search(app_lower)
+        keyword_hits = self._keyword_matcher.search(title_lower) | self._keyword_matcher.search(url_lower)
+        
+        # Categories are checked in declaration order; within a category an
+        # app-name match beats a keyword match
+        for category in self._category_order:
+            config = self.categories[category]
+            
+            if category in app_hits:
                 return {
                     'category': category,
                     'subcategory': 'general',
@@ -88,8 +247,7 @@ class SmartProductivityClassifier:
                     'reasoning': f'Matched {category} app pattern'
                 }
             
-            # Check keywords
-            if any(kw in title_lower or kw in url_lower for kw in config['keywords']):
+            if category in keyword_hits:
                 return {
                     'category': category,
                     'subcategory': 'general',
@@ -172,10 +330,117 @@ class SmartProductivityClassifier:
         
         return round(min(total_score, 100), 2)
     
+    # ==================== TRAINED FALLBACK MODEL ====================
+    
+    def swap_model(self, model: ActivityModel):
+        """Atomically replace the model used for inference"""
+        self._predictor = (model, lru_cache(maxsize=self.CACHE_SIZE)(model.predict))
+        logger.info(f"🧠 Activity model {model.version} active ({model.samples} samples)")
+    
     async def train_models(self, db, min_samples: int = 100):
-        """Placeholder for ML training (not implemented yet)"""
-        logger.info("ML training not implemented yet. Using rule-based classification only.")
-        return False
+        """
+        Train the fallback model on rule-labelled activities and hot-swap it in.
+        
+        Activities are streamed through a projection cursor; each batch is
+        tokenized and counted in a process pool while the next batch is read,
+        then the merged counts are fitted and the model is saved to `ml_models`
+        so other workers pick it up.
+        """
+        # Only rule-based labels: training on the model's own ("ml") predictions
+        # would reinforce its mistakes on every retrain
+        cursor = db.activities.find(
+            {"classification.method": "rule_based", "classification.category": {"$exists": True, "$ne": "other"}},
+            projection={"_id": 0, "application": 1, "window_title": 1, "url": 1, "classification.category": 1}
+        ).sort("_id", -1).limit(settings.ML_TRAINING_MAX_SAMPLES).batch_size(TRAINING_BATCH_SIZE)
+        
+        loop = asyncio.get_running_loop()
+        totals = ({}, {})
+        samples = 0
+        max_pending = settings.ML_TRAINING_WORKERS * 2
+        
+        with ProcessPoolExecutor(
+            max_workers=settings.ML_TRAINING_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            pending = set()
+            
+            async def drain(until: int):
+                nonlocal pending
+                while len(pending) > until:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for future in done:
+                        merge_counts(totals, future.result())
+            
+            batch = []
+            async for doc in cursor:
+                batch.append((
+                    doc.get("application") or "",
+                    doc.get("window_title") or "",
+                    doc.get("url") or "",
+                    doc["classification"]["category"]
+                ))
+                if len(batch) >= TRAINING_BATCH_SIZE:
+                    pending.add(loop.run_in_executor(pool, count_batch, batch))
+                    samples += len(batch)
+                    batch = []
+                    await drain(max_pending - 1)
+            
+            if batch:
+                pending.add(loop.run_in_executor(pool, count_batch, batch))
+                samples += len(batch)
+            await drain(0)
+            
+            class_counts, feature_counts = totals
+            if samples < min_samples or len(class_counts) < 2:
+                logger.info(f"Not enough labelled activities to train ({samples} samples, {len(class_counts)} classes)")
+                return False
+            
+            params = await loop.run_in_executor(pool, fit_from_counts, class_counts, feature_counts)
+        
+        version = datetime.now().strftime("%Y%m%d%H%M%S")
+        await db.ml_models.update_one(
+            {"_id": MODEL_ID},
+            {"$set": {
+                "version": version,
+                "trained_at": datetime.now(),
+                "samples": samples,
+                "classes": sorted(class_counts),
+                "blob": Binary(ActivityModel.dumps(params))
+            }},
+            upsert=True
+        )
+        self.swap_model(ActivityModel(params, version=version))
+        return True
+    
+    async def refresh_model(self, db, force: bool = False):
+        """
+        Load the stored model if it is newer than the active one. Checks at most
+        every ML_MODEL_REFRESH_SECONDS unless forced.
+        """
+        now = time.monotonic()
+        if not force and now - self._model_checked_at < settings.ML_MODEL_REFRESH_SECONDS:
+            return
+        self._model_checked_at = now
+        
+        stored = await db.ml_models.find_one({"_id": MODEL_ID}, projection={"version": 1})
+        if not stored:
+            return
+        active_version = self._predictor[0].version if self._predictor else None
+        if stored["version"] == active_version:
+            return
+        
+        doc = await db.ml_models.find_one({"_id": MODEL_ID})
+        self.swap_model(ActivityModel.loads(doc["blob"], version=doc["version"]))
+    
+    def model_stats(self) -> Dict:
+        model = self._predictor[0] if self._predictor else None
+        return {
+            "model_version": model.version if model else None,
+            "model_samples": model.samples if model else 0,
+            "ml_predictions": self.ml_predictions,
+            "ml_skipped_over_budget": self.ml_skipped,
+            "rule_cache": self.cache_info()._asdict()
+        }
 
 # Global instance
 smart_classifier = SmartProductivityClassifier()
\ No newline at end of file
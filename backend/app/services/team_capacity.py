@@ -0,0 +1,212 @@
+# backend/app/services/team_capacity.py
+
+from datetime import datetime, date, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+
+from app.core.config import settings
+from app.services.leave_absence_index import LeaveAbsenceIndexService
+from app.services.leave_service import LeaveService
+
+# Longest range one capacity query may cover
+MAX_RANGE_DAYS = 366
+
+
+def _as_date(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def compute_capacity(
+    start_date: date,
+    end_date: date,
+    members: Iterable[str],
+    leaves: Iterable[dict],
+    non_working: Set[date],
+    min_available_ratio: float
+) -> dict:
+    """
+    Per-day headcount for one team (no I/O).
+
+    `leaves` are approved/pending requests of the members overlapping the
+    range. A member counts once per day even with overlapping requests
+    (approved wins over pending, a full day over a half day). Cost is
+    O(days + leave-days), so a year for a few hundred people stays in the
+    low milliseconds.
+    """
+    members = set(members)
+    headcount = len(members)
+    day_count = (end_date - start_date).days + 1
+
+    # Per member: day offset -> (weight, is_pending); max() keeps full over half, approved over pending
+    absences: Dict[str, Dict[int, tuple]] = {}
+    for leave in leaves:
+        if leave["user_id"] not in members:
+            continue
+        first = max((_as_date(leave["start_date"]) - start_date).days, 0)
+        last = min((_as_date(leave["end_date"]) - start_date).days, day_count - 1)
+        weight = 0.5 if leave.get("is_half_day") else 1.0
+        pending = leave["status"] == "pending"
+        member_days = absences.setdefault(leave["user_id"], {})
+        for offset in range(first, last + 1):
+            current = member_days.get(offset)
+            if current is None or (weight, not pending) > (current[0], not current[1]):
+                member_days[offset] = (weight, pending)
+
+    approved_out = [0.0] * day_count
+    pending_out = [0.0] * day_count
+    for member_days in absences.values():
+        for offset, (weight, pending) in member_days.items():
+            (pending_out if pending else approved_out)[offset] += weight
+
+    out = [a + p for a, p in zip(approved_out, pending_out)]
+    dates = [start_date + timedelta(days=offset) for offset in range(day_count)]
+    working = [day not in non_working for day in dates]
+    keys = [day.isoformat() for day in dates]
+
+    days = [
+        {
+            "date": key,
+            "working": is_working,
+            "headcount": headcount,
+            "on_leave": on_leave,
+            "pending": pending,
+            "available": headcount - absent
+        }
+        for key, is_working, on_leave, pending, absent in zip(keys, working, approved_out, pending_out, out)
+    ]
+
+    working_out = [absent for absent, is_working in zip(out, working) if is_working]
+    max_concurrent = max(working_out, default=0.0)
+    min_available = headcount - max_concurrent
+    minimum = headcount * min_available_ratio
+    breaches = [
+        key for key, is_working, absent in zip(keys, working, out)
+        if is_working and headcount and headcount - absent < minimum
+    ]
+
+    return {
+        "headcount": headcount,
+        "max_concurrent_absences": max_concurrent,
+        "min_available": min_available,
+        "min_available_ratio": min_available_ratio,
+        "breached_dates": breaches,
+        "days": days
+    }
+
+
+class TeamCapacityService:
+    """
+    Available headcount per team and day, from team membership, approved and
+    pending leave, weekends and public holidays. Used by the capacity
+    endpoints and to flag understaffing when a leave request is submitted.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.leave_service = LeaveService(db)
+
+    async def non_working_days(self, start_date: date, end_date: date) -> Set[date]:
+        """Weekend days and holidays in range, per each year's policy (none if a year has no policy)"""
+        days = set()
+        for year in range(start_date.year, end_date.year + 1):
+            policy = await self.leave_service.get_policy_by_year(year)
+            if not policy:
+                continue
+            calendar = await self.leave_service.get_working_day_calendar(
+                year,
+                policy["weekend_days"] if policy.get("exclude_weekends", True) else [],
+                policy.get("exclude_public_holidays", True)
+            )
+            days.update(calendar.excluded_dates(start_date, end_date))
+        return days
+
+    async def member_leaves(self, member_ids: List[str], start_date: date, end_date: date) -> Dict[str, List[dict]]:
+        """
+        Approved and pending leave of the given users overlapping the range,
+        grouped by user_id, in one query per source.
+
+        With LEAVE_ABSENCE_INDEX_ENABLED approved leave comes from the per-day
+        absence index (one entry per user and day) and only pending requests
+        are range-scanned; otherwise both are read from leave_requests.
+        """
+        if not member_ids:
+            return {}
+
+        statuses = ["approved", "pending"]
+        leaves = []
+        if settings.LEAVE_ABSENCE_INDEX_ENABLED:
+            statuses = ["pending"]
+            members = set(member_ids)
+            days = await LeaveAbsenceIndexService(self.db).absences_between(start_date, end_date)
+            for day_key, absences in days.items():
+                day = date.fromisoformat(day_key)
+                leaves.extend(
+                    {"user_id": a["user_id"], "status": "approved", "start_date": day, "end_date": day, "is_half_day": a["is_half_day"]}
+                    for a in absences if a["user_id"] in members
+                )
+
+        cursor = self.db.leave_requests.find(
+            {
+                "user_id": {"$in": member_ids},
+                "status": {"$in": statuses},
+                "start_date": {"$lte": datetime.combine(end_date, datetime.max.time())},
+                "end_date": {"$gte": datetime.combine(start_date, datetime.min.time())}
+            },
+            projection={"user_id": 1, "status": 1, "start_date": 1, "end_date": 1, "is_half_day": 1}
+        )
+        leaves.extend(await cursor.to_list(length=None))
+
+        by_member: Dict[str, List[dict]] = {}
+        for leave in leaves:
+            by_member.setdefault(leave["user_id"], []).append(leave)
+        return by_member
+
+    @staticmethod
+    def _members(team: dict) -> List[str]:
+        return [str(member_id) for member_id in team.get("members", [])]
+
+    def _team_capacity(
+        self,
+        team: dict,
+        start_date: date,
+        end_date: date,
+        non_working: Set[date],
+        leaves_by_member: Dict[str, List[dict]],
+        extra_leaves: Iterable[dict] = ()
+    ) -> dict:
+        members = self._members(team)
+        leaves = [leave for member in members for leave in leaves_by_member.get(member, [])]
+        capacity = compute_capacity(
+            start_date, end_date, members, [*leaves, *extra_leaves], non_working,
+            team.get("min_available_ratio", settings.TEAM_MIN_AVAILABLE_RATIO)
+        )
+        return {"team_id": str(team["_id"]), "team_name": team.get("team_name"), **capacity}
+
+    async def team_capacity(
+        self,
+        team: dict,
+        start_date: date,
+        end_date: date,
+        extra_leaves: Iterable[dict] = ()
+    ) -> dict:
+        """Capacity of one team over the range; `extra_leaves` are counted as well (e.g. a request being submitted)"""
+        non_working = await self.non_working_days(start_date, end_date)
+        leaves_by_member = await self.member_leaves(self._members(team), start_date, end_date)
+        return self._team_capacity(team, start_date, end_date, non_working, leaves_by_member, extra_leaves)
+
+    async def teams_capacity(self, teams: List[dict], start_date: date, end_date: date) -> List[dict]:
+        """Capacity of several teams; every member's leave is read at once and split per team in memory"""
+        non_working = await self.non_working_days(start_date, end_date)
+        member_ids = sorted({member for team in teams for member in self._members(team)})
+        leaves_by_member = await self.member_leaves(member_ids, start_date, end_date)
+        return [
+            self._team_capacity(team, start_date, end_date, non_working, leaves_by_member)
+            for team in teams
+        ]
+
+    async def check_request(self, team: dict, leave_request: dict) -> List[str]:
+        """Working days on which the team would drop below its minimum if this request were granted"""
+        start_date = _as_date(leave_request["start_date"])
+        end_date = _as_date(leave_request["end_date"])
+        candidate = {**leave_request, "status": "pending"}
+        capacity = await self.team_capacity(team, start_date, end_date, extra_leaves=[candidate])
+        return capacity["breached_dates"]
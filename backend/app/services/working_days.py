@@ -0,0 +1,122 @@
+# backend/app/services/working_days.py
+
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+
+WEEKDAY_NUMBERS = {
+    "monday": 0, "tuesday": 1, "wednesday": 2,
+    "thursday": 3, "friday": 4, "saturday": 5, "sunday": 6
+}
+
+
+def weekend_weekdays(weekend_days: Iterable[str]) -> FrozenSet[int]:
+    """Policy weekend day names -> Python weekday numbers"""
+    return frozenset(WEEKDAY_NUMBERS[day.lower()] for day in weekend_days)
+
+
+class WorkingDayCalendar:
+    """
+    Working-day bitmap and prefix sums for one calendar year.
+
+    Built once per (year, weekend days, holidays); afterwards counting the
+    working days in a range is O(1) and listing its non-working dates is
+    O(log n + k) for k excluded dates.
+    """
+
+    def __init__(self, year: int, weekend: FrozenSet[int], holiday_dates: Iterable[date]):
+        self.year = year
+        self.first_day = date(year, 1, 1)
+        self.last_day = date(year, 12, 31)
+        days = (self.last_day - self.first_day).days + 1
+
+        excluded = bytearray(days)
+        first_weekday = self.first_day.weekday()
+        for offset in range(days):
+            if (first_weekday + offset) % 7 in weekend:
+                excluded[offset] = 1
+        for holiday in holiday_dates:
+            if holiday.year == year:
+                excluded[(holiday - self.first_day).days] = 1
+
+        # _working_before[i] = working days in [first_day, first_day + i)
+        self._working_before = [0] * (days + 1)
+        for offset in range(days):
+            self._working_before[offset + 1] = self._working_before[offset] + (not excluded[offset])
+        self._excluded_offsets = [offset for offset in range(days) if excluded[offset]]
+
+    def _clip(self, start_date: date, end_date: date) -> Optional[Tuple[int, int]]:
+        start = max(start_date, self.first_day)
+        end = min(end_date, self.last_day)
+        if start > end:
+            return None
+        return (start - self.first_day).days, (end - self.first_day).days
+
+    def working_days(self, start_date: date, end_date: date) -> int:
+        """Working days in [start_date, end_date], counting only days inside this year"""
+        span = self._clip(start_date, end_date)
+        if span is None:
+            return 0
+        start, end = span
+        return self._working_before[end + 1] - self._working_before[start]
+
+    def excluded_dates(self, start_date: date, end_date: date) -> List[date]:
+        """Weekend days and holidays in [start_date, end_date] that fall inside this year"""
+        span = self._clip(start_date, end_date)
+        if span is None:
+            return []
+        start, end = span
+        offsets = self._excluded_offsets[bisect_left(self._excluded_offsets, start):bisect_right(self._excluded_offsets, end)]
+        return [self.first_day + timedelta(days=offset) for offset in offsets]
+
+
+class WorkingDayCalendars:
+    """
+    Per-process cache of WorkingDayCalendar objects.
+
+    Keyed by year plus the policy settings that shape the bitmap, so a policy
+    change that alters the weekend simply misses. LeaveService calls
+    invalidate() whenever holidays or policies change; entries also expire
+    after `ttl_seconds` so other worker processes pick up those changes.
+    """
+
+    def __init__(self, ttl_seconds: int = 60):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[tuple, Tuple[float, WorkingDayCalendar]] = {}
+        self.builds = 0
+
+    @staticmethod
+    def key(year: int, weekend: FrozenSet[int], exclude_holidays: bool) -> tuple:
+        return (year, tuple(sorted(weekend)), exclude_holidays)
+
+    def get(self, key: tuple) -> Optional[WorkingDayCalendar]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, calendar = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        return calendar
+
+    def build(self, key: tuple, holiday_dates: Iterable[date]) -> WorkingDayCalendar:
+        year, weekend, exclude_holidays = key
+        calendar = WorkingDayCalendar(year, frozenset(weekend), holiday_dates if exclude_holidays else [])
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, calendar)
+        self.builds += 1
+        return calendar
+
+    def invalidate(self, year: Optional[int] = None):
+        """Drop cached calendars for one year, or all of them"""
+        if year is None:
+            self._entries.clear()
+            return
+        for key in [key for key in self._entries if key[0] == year]:
+            del self._entries[key]
+
+
+# Global instance
+working_day_calendars = WorkingDayCalendars(ttl_seconds=settings.LEAVE_CACHE_TTL_SECONDS)
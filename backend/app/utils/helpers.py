@@ -0,0 +1,78 @@
+import hashlib
+import re
+
+
+def app_field_key(application: str) -> str:
+    """
+    Stable MongoDB field name for an application.
+    App names may contain '.' or '$', which are not allowed in update paths.
+    """
+    return hashlib.md5(application.encode("utf-8")).hexdigest()
+
+
+def extract_site_name(application: str, url: str) -> str:
+    """
+    Extracts a meaningful site name from browser applications.
+    For non-browser apps, returns the application name.
+    
+    Args:
+        application: e.g., "chrome.exe (google.com)" or "Code.exe"
+        url: e.g., "Browser: facebook.com" or ""
+        
+    Returns:
+        Cleaned name like "Chrome - google.com" or "VS Code"
+    """
+    # List of browser identifiers
+    browsers = ["chrome", "edge", "firefox", "safari", "opera", "brave", "msedge"]
+    
+    # Check if it's a browser
+    is_browser = any(browser in application.lower() for browser in browsers)
+    
+    if is_browser:
+        # Try to extract domain from the application field first
+        # e.g., "chrome.exe (google.com)" -> "google.com"
+        match = re.search(r'\(([^)]+)\)', application)
+        if match:
+            site = match.group(1)
+            # Clean up "Browser: " prefix if present
+            site = site.replace("Browser: ", "").strip()
+            
+            # Get browser name
+            browser_name = "Browser"
+            if "chrome" in application.lower():
+                browser_name = "Chrome"
+            elif "edge" in application.lower() or "msedge" in application.lower():
+                browser_name = "Edge"
+            elif "firefox" in application.lower():
+                browser_name = "Firefox"
+            elif "safari" in application.lower():
+                browser_name = "Safari"
+            
+            return f"{browser_name} - {site}"
+        
+        # If no match in application, try URL field
+        if url and url.strip():
+            site = url.replace("Browser: ", "").strip()
+            return f"Browser - {site}"
+        
+        # Fallback
+        return "Browser - Unknown Site"
+    
+    # For non-browser apps, clean up the application name
+    # e.g., "Code.exe" -> "VS Code"
+    app_name = application.split(".exe")[0].strip()
+    
+    # Friendly names mapping
+    friendly_names = {
+        "Code": "VS Code",
+        "WINWORD": "Microsoft Word",
+        "EXCEL": "Microsoft Excel",
+        "POWERPNT": "Microsoft PowerPoint",
+        "Spotify": "Spotify",
+        "slack": "Slack",
+        "Teams": "Microsoft Teams",
+        "WhatsApp": "WhatsApp",
+        "Telegram": "Telegram"
+    }
+    
+    return friendly_names.get(app_name, app_name)
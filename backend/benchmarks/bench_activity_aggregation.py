@@ -0,0 +1,135 @@
+"""
+Benchmark: ActivityTrackerService app aggregation, Python loop vs aggregation pipeline.
+
+Seeds a synthetic `activities` dataset into a scratch database (<DATABASE_NAME>_bench)
+and times both implementations over one employee's month.
+
+Run from backend/ against a disposable MongoDB:
+    python -m benchmarks.bench_activity_aggregation --activities 1000000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.services.activity_tracker import ActivityTrackerService, get_session_applications
+from app.utils.helpers import extract_site_name
+
+APPS = ["Code.exe", "slack.exe", "Teams.exe", "WINWORD.EXE", "EXCEL.EXE", "Spotify.exe", "explorer.exe"]
+SITES = ["github.com", "stackoverflow.com", "youtube.com", "google.com", "facebook.com", "linkedin.com"]
+
+
+def make_apps(rng: random.Random, count: int) -> list:
+    apps = []
+    for _ in range(count):
+        if rng.random() < 0.5:
+            site = rng.choice(SITES)
+            application, url = f"chrome.exe ({site})", site
+        else:
+            application, url = rng.choice(APPS), ""
+        apps.append({
+            "application": application,
+            "window_title": f"{application} - window {rng.randint(1, 50)}",
+            "url": url,
+            "display_name": extract_site_name(application, url),
+            "mouse_movements": rng.randint(0, 500),
+            "key_presses": rng.randint(0, 300),
+            "time_spent_seconds": rng.randint(1, 600)
+        })
+    return apps
+
+
+async def seed(db, total: int, employees: int, apps_per_session: int):
+    rng = random.Random(42)
+    month_start = datetime.combine(date.today().replace(day=1), datetime.min.time())
+    batch = []
+    for i in range(total):
+        recorded_at = month_start + timedelta(seconds=rng.randint(0, 27 * 86400))
+        batch.append({
+            "user_id": f"bench-user-{i % employees}",
+            "employee_email": f"bench{i % employees}@company.com",
+            "session_number": i // employees,
+            "date": recorded_at.strftime("%Y-%m-%d"),
+            "recorded_at": recorded_at,
+            "productivity_score": rng.randint(0, 100),
+            "applications": make_apps(rng, apps_per_session)
+        })
+        if len(batch) == 10000:
+            await db.activities.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await db.activities.insert_many(batch, ordered=False)
+    await db.activities.create_index([("employee_email", 1), ("recorded_at", 1)])
+
+
+async def python_breakdown(db, email: str, start: date, end: date) -> dict:
+    """The original implementation: fetch full documents and sum in Python"""
+    activities = await db.activities.find({
+        "employee_email": email,
+        "recorded_at": {
+            "$gte": datetime.combine(start, datetime.min.time()),
+            "$lte": datetime.combine(end, datetime.max.time())
+        }
+    }).to_list(length=None)
+    totals = {}
+    for activity in activities:
+        for app in get_session_applications(activity):
+            name = extract_site_name(app.get("application", "Unknown"), app.get("url", ""))
+            totals[name] = totals.get(name, 0) + app.get("time_spent_seconds", 0)
+    return totals
+
+
+async def timed(label: str, coro_factory, runs: int):
+    timings = []
+    result = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = await coro_factory()
+        timings.append(time.perf_counter() - started)
+    print(f"{label:<28} best {min(timings) * 1000:9.1f} ms | mean {sum(timings) / runs * 1000:9.1f} ms")
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--activities", type=int, default=1_000_000)
+    parser.add_argument("--employees", type=int, default=200)
+    parser.add_argument("--apps-per-session", type=int, default=15)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch database afterwards")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db_name = f"{settings.DATABASE_NAME}_bench"
+    db = client[db_name]
+
+    if await db.activities.estimated_document_count() != args.activities:
+        await client.drop_database(db_name)
+        print(f"Seeding {args.activities:,} activities into {db_name}...")
+        started = time.perf_counter()
+        await seed(db, args.activities, args.employees, args.apps_per_session)
+        print(f"Seeded in {time.perf_counter() - started:.1f}s\n")
+
+    email = "bench0@company.com"
+    start = date.today().replace(day=1)
+    end = start + timedelta(days=27)
+    service = ActivityTrackerService(db)
+
+    legacy = await timed("python loop (full docs)", lambda: python_breakdown(db, email, start, end), args.runs)
+    pipeline = await timed("aggregation pipeline", lambda: service.get_app_activity_breakdown(email, start, end), args.runs)
+
+    pipeline_totals = {row["app_name"]: row["total_duration_seconds"] for row in pipeline}
+    print(f"\nResults match: {pipeline_totals == legacy} ({len(legacy)} apps)")
+
+    if not args.keep:
+        await client.drop_database(db_name)
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+"""
+Benchmark: SmartProductivityClassifier.classify per-call cost vs rule count.
+
+Compares the compiled matcher (cold: every input new, warm: memo cache hits)
+with the previous per-category `any(pattern in text)` scan, using the built-in
+rules padded with synthetic app/keyword patterns to realistic rule counts.
+
+Run from backend/ (no database needed):
+    python -m benchmarks.bench_classifier --rule-counts 45 200 1000 --calls 20000
+"""
+
+import argparse
+import asyncio
+import copy
+import random
+import time
+
+from app.services.smart_classifier import SmartProductivityClassifier
+
+APPS = ["Code.exe", "chrome.exe (github.com)", "slack.exe", "WINWORD.EXE", "Spotify.exe",
+        "explorer.exe", "Teams.exe", "chrome.exe (Browser: quarterly report)", "tool.exe"]
+TITLES = ["main.py - project", "Pull request #12", "Weekly meeting", "Settings", "", "lofi beats playlist"]
+
+
+def naive_classify(categories, app_name, window_title, url):
+    """The pre-compilation algorithm, for comparison"""
+    app_lower = app_name.lower()
+    title_lower = window_title.lower()
+    url_lower = (url or "").lower()
+    for category, config in categories.items():
+        if any(app in app_lower for app in config["apps"]):
+            return category
+        if any(kw in title_lower or kw in url_lower for kw in config["keywords"]):
+            return category
+    return "other"
+
+
+def padded_classifier(rule_count: int) -> SmartProductivityClassifier:
+    classifier = SmartProductivityClassifier()
+    categories = copy.deepcopy(classifier.categories)
+    base = sum(len(c["apps"]) + len(c["keywords"]) for c in categories.values())
+    names = list(categories)
+    for i in range(max(0, rule_count - base)):
+        config = categories[names[i % len(names)]]
+        (config["apps"] if i % 2 else config["keywords"]).append(f"synthrule{i}x")
+    classifier.categories = categories
+    classifier.compile_rules()
+    return classifier
+
+
+def make_inputs(calls: int, unique: bool):
+    random.seed(7)
+    inputs = []
+    for i in range(calls):
+        app = random.choice(APPS)
+        title = random.choice(TITLES)
+        if unique:
+            title = f"{title} {i}"
+        inputs.append((app, title, ""))
+    return inputs
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rule-counts", type=int, nargs="+", default=[45, 200, 1000])
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'rules':>6} {'naive us':>9} {'cold us':>9} {'warm us':>9} {'batch us':>9}")
+    for rule_count in args.rule_counts:
+        classifier = padded_classifier(rule_count)
+        cold_inputs = make_inputs(args.calls, unique=True)
+        warm_inputs = make_inputs(args.calls, unique=False)
+
+        started = time.perf_counter()
+        for app, title, url in cold_inputs:
+            naive_classify(classifier.categories, app, title, url)
+        naive_us = (time.perf_counter() - started) / args.calls * 1e6
+
+        started = time.perf_counter()
+        for app, title, url in cold_inputs:
+            await classifier.classify(app, title, url)
+        cold_us = (time.perf_counter() - started) / args.calls * 1e6
+
+        started = time.perf_counter()
+        for app, title, url in warm_inputs:
+            await classifier.classify(app, title, url)
+        warm_us = (time.perf_counter() - started) / args.calls * 1e6
+
+        batch = [{"app_name": app, "window_title": title, "url": url} for app, title, url in warm_inputs]
+        started = time.perf_counter()
+        await classifier.classify_batch(batch)
+        batch_us = (time.perf_counter() - started) / args.calls * 1e6
+
+        # Same answers as the old algorithm
+        for app, title, url in cold_inputs[:1000]:
+            expected = naive_classify(classifier.categories, app, title, url)
+            actual = (await classifier.classify(app, title, url))["category"]
+            assert expected == actual or "youtube" in (app + url).lower(), (app, title, expected, actual)
+
+        print(f"{rule_count:>6} {naive_us:>9.2f} {cold_us:>9.2f} {warm_us:>9.2f} {batch_us:>9.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
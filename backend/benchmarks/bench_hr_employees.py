@@ -0,0 +1,134 @@
+"""
+Benchmark: GET /api/hr/employees query count and latency vs headcount.
+
+Seeds users/attendance/activities for growing headcounts into a scratch database
+(<DATABASE_NAME>_bench), calls the route handler directly with a command listener
+attached, and checks that the number of queries stays constant.
+
+Run from backend/ against a disposable MongoDB:
+    python -m benchmarks.bench_hr_employees --headcounts 10 100 1000
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+from app.core.config import settings
+from app.api.routes.hr import get_employees
+
+# getMore only pages through a cursor that is already open, so it is not a new query
+QUERY_COMMANDS = {"find", "aggregate", "count", "countDocuments", "distinct"}
+
+
+class QueryCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.queries = 0
+        self.round_trips = 0
+
+    def started(self, event):
+        if event.command_name in QUERY_COMMANDS:
+            self.queries += 1
+        if event.command_name in QUERY_COMMANDS or event.command_name == "getMore":
+            self.round_trips += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def reset(self):
+        self.queries = 0
+        self.round_trips = 0
+
+
+async def seed(db, headcount: int):
+    await db.users.delete_many({})
+    await db.attendance.delete_many({})
+    await db.activities.delete_many({})
+
+    now = datetime.now()
+    today = now.strftime("%Y-%m-%d")
+    users = [
+        {
+            "email": f"bench{i}@company.com",
+            "full_name": f"Bench Employee {i}",
+            "role": "employee",
+            "is_active": True
+        }
+        for i in range(headcount)
+    ]
+    result = await db.users.insert_many(users)
+    user_ids = [str(user_id) for user_id in result.inserted_ids]
+
+    attendance = []
+    activities = []
+    for i, user_id in enumerate(user_ids):
+        for days_ago in range(1, 7):
+            login_time = now - timedelta(days=days_ago, hours=8)
+            attendance.append({
+                "user_id": user_id,
+                "date": login_time.strftime("%Y-%m-%d"),
+                "login_time": login_time,
+                "logout_time": login_time + timedelta(hours=8),
+                "total_hours": 8.0,
+                "status": "completed"
+            })
+        attendance.append({
+            "user_id": user_id,
+            "date": today,
+            "login_time": now - timedelta(hours=2),
+            "logout_time": None,
+            "total_hours": None,
+            "status": "active" if i % 2 else "completed"
+        })
+        activities.append({
+            "user_id": user_id,
+            "date": today,
+            "session_number": 1,
+            "recorded_at": now,
+            "productivity_score": i % 100
+        })
+    await db.attendance.insert_many(attendance)
+    await db.activities.insert_many(activities)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--headcounts", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    counter = QueryCounter()
+    client = AsyncIOMotorClient(settings.MONGODB_URL, event_listeners=[counter])
+    db_name = f"{settings.DATABASE_NAME}_bench"
+    db = client[db_name]
+    hr_user = {"_id": "bench-hr", "role": "hr", "email": "hr@company.com"}
+
+    query_counts = set()
+    for headcount in args.headcounts:
+        await seed(db, headcount)
+        counter.reset()
+
+        started = time.perf_counter()
+        employees = await get_employees(current_user=hr_user, db=db)
+        elapsed = (time.perf_counter() - started) * 1000
+
+        query_counts.add(counter.queries)
+        print(
+            f"headcount {headcount:>6} | employees {len(employees):>6} | "
+            f"queries {counter.queries:>3} | round trips {counter.round_trips:>4} | {elapsed:8.1f} ms"
+        )
+
+    await client.drop_database(db_name)
+    client.close()
+
+    assert len(query_counts) == 1, f"Query count grows with headcount: {sorted(query_counts)}"
+    print("\nQuery count is constant across headcounts")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
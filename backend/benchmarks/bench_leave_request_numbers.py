@@ -0,0 +1,118 @@
+"""
+Concurrency check: leave request numbers stay unique under parallel submissions.
+
+Seeds a policy, a leave type and users with balances into a scratch database
+(<DATABASE_NAME>_bench), then fires --concurrency LeaveService.create_leave_request
+calls at once and reports duplicate request numbers and submission latency.
+The previous count-based generator is run the same way for comparison.
+Exits non-zero if the current generator hands out a duplicate.
+
+Run from backend/ against a disposable MongoDB:
+    python -m benchmarks.bench_leave_request_numbers --concurrency 500
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import statistics
+import sys
+import time
+from collections import Counter
+from datetime import date
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.core.indexes import ensure_indexes
+from app.services.leave_service import LeaveService
+
+YEAR = date.today().year
+
+
+async def legacy_request_number(db, year: int) -> str:
+    """The previous generator (count, then insert), for comparison; uses its own collection"""
+    count = await db.legacy_leave_requests.count_documents({"request_number": {"$regex": f"^LR-{year}-"}})
+    request_number = f"LR-{year}-{str(count + 1).zfill(5)}"
+    await db.legacy_leave_requests.insert_one({"request_number": request_number})
+    return request_number
+
+
+async def seed(db, users: int):
+    for name in ("users", "leave_requests", "legacy_leave_requests", "leave_balances", "leave_policies", "leave_types", "counters"):
+        await db[name].drop()
+
+    await db.leave_policies.insert_one({
+        "year": YEAR, "is_active": True, "exclude_weekends": True,
+        "exclude_public_holidays": True, "weekend_days": ["saturday", "sunday"]
+    })
+    await db.leave_types.insert_one({"code": "CASUAL", "name": "Casual Leave", "color": "#3b82f6", "is_active": True})
+
+    result = await db.users.insert_many([
+        {"full_name": f"User {i}", "email": f"user{i}@bench.local", "role": "employee"} for i in range(users)
+    ])
+    await db.leave_balances.insert_many([
+        {"user_id": str(user_id), "year": YEAR, "leave_type_code": "CASUAL",
+         "allocated": 10000, "used": 0, "pending": 0, "available": 10000}
+        for user_id in result.inserted_ids
+    ])
+    return await db.users.find().to_list(length=None)
+
+
+async def timed(coroutine):
+    started = time.perf_counter()
+    result = await coroutine
+    return result, (time.perf_counter() - started) * 1000
+
+
+def report(label: str, numbers, latencies_ms) -> int:
+    duplicates = sum(count - 1 for count in Counter(numbers).values() if count > 1)
+    latencies_ms = sorted(latencies_ms)
+    p95 = latencies_ms[int(len(latencies_ms) * 0.95) - 1]
+    print(f"{label:10} {len(numbers):>6} {duplicates:>10} {statistics.median(latencies_ms):>8.1f} {p95:>8.1f}")
+    return duplicates
+
+
+async def main(args) -> int:
+    client = AsyncIOMotorClient(settings.MONGODB_URL, maxPoolSize=args.pool_size)
+    db = client[f"{settings.DATABASE_NAME}_bench"]
+    users = await seed(db, args.users)
+    service = LeaveService(db)
+    request = {
+        "leave_type_code": "CASUAL",
+        "start_date": date(YEAR, 1, 6),
+        "end_date": date(YEAR, 1, 6),
+        "reason": "benchmark"
+    }
+
+    print(f"{'generator':10} {'calls':>6} {'duplicates':>10} {'p50 ms':>8} {'p95 ms':>8}")
+
+    legacy = await asyncio.gather(*(timed(legacy_request_number(db, YEAR)) for _ in range(args.concurrency)))
+    report("count", [number for number, _ in legacy], [ms for _, ms in legacy])
+
+    # Unique index on request_number, as in production, so duplicates would also fail inserts
+    await ensure_indexes(db)
+    with contextlib.redirect_stdout(io.StringIO()):  # create_leave_request logs every balance update
+        results = await asyncio.gather(
+            *(timed(service.create_leave_request(dict(request), users[i % len(users)])) for i in range(args.concurrency)),
+            return_exceptions=True
+        )
+    failures = [result for result in results if isinstance(result, Exception)]
+    succeeded = [result for result in results if not isinstance(result, Exception)]
+    duplicates = report("counter", [doc["request_number"] for doc, _ in succeeded], [ms for _, ms in succeeded])
+    for failure in failures[:5]:
+        print(f"FAILED  {failure!r}")
+
+    stored = await db.leave_requests.count_documents({})
+    print(f"stored requests: {stored} (expected {args.concurrency})")
+
+    client.close()
+    return 1 if duplicates or failures or stored != args.concurrency else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--pool-size", type=int, default=100)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,115 @@
+"""
+Benchmark: LeaveService.get_leave_stats, four count_documents vs one $facet.
+
+Seeds --requests leave requests (mixed statuses, types and dates) into a
+scratch database (<DATABASE_NAME>_bench) with the registry indexes, then
+times the previous four-count implementation, the $facet aggregation with
+the cache cleared, and a cached call. Checks that both give the same counts.
+
+Run from backend/ against a disposable MongoDB:
+    python -m benchmarks.bench_leave_stats --requests 500000 --rounds 5
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.core.indexes import ensure_indexes
+from app.services.leave_cache import leave_reference_cache
+from app.services.leave_service import LeaveService
+
+STATUSES = ["pending", "approved", "approved", "approved", "rejected", "cancelled"]
+TYPES = ["CASUAL", "SICK", "EARNED", "UNPAID", "EMERGENCY"]
+
+
+async def seed(db, count: int):
+    await db.leave_requests.drop()
+    await ensure_indexes(db)
+
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    batch = []
+    for i in range(count):
+        start = today + timedelta(days=random.randint(-700, 60))
+        status = random.choice(STATUSES)
+        batch.append({
+            "request_number": f"LR-BENCH-{i:07d}",
+            "user_id": str(random.randrange(5000)),
+            "leave_type_code": random.choice(TYPES),
+            "status": status,
+            "start_date": start,
+            "end_date": start + timedelta(days=random.randint(0, 5)),
+            "hr_action_at": start - timedelta(days=random.randint(0, 14), hours=random.randint(0, 23)) if status != "pending" else None,
+            "requested_at": start - timedelta(days=random.randint(1, 30)),
+            "reason": "benchmark"
+        })
+        if len(batch) == 10000:
+            await db.leave_requests.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await db.leave_requests.insert_many(batch, ordered=False)
+
+
+async def legacy_stats(collection) -> dict:
+    """The previous implementation, for comparison"""
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    tomorrow = today + timedelta(days=1)
+    return {
+        "pending_count": await collection.count_documents({"status": "pending"}),
+        "approved_today_count": await collection.count_documents({
+            "status": "approved", "hr_action_at": {"$gte": today, "$lt": tomorrow}
+        }),
+        "on_leave_today_count": await collection.count_documents({
+            "status": "approved", "start_date": {"$lte": today}, "end_date": {"$gte": today}
+        }),
+        "total_requests": await collection.count_documents({})
+    }
+
+
+async def time_calls(label: str, make_call, rounds: int, before=None):
+    timings = []
+    result = None
+    for _ in range(rounds):
+        if before:
+            before()
+        started = time.perf_counter()
+        result = await make_call()
+        timings.append((time.perf_counter() - started) * 1000)
+    print(f"{label:18} {statistics.median(timings):>10.2f} {min(timings):>10.2f}")
+    return result
+
+
+async def main(args):
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db = client[f"{settings.DATABASE_NAME}_bench"]
+    service = LeaveService(db)
+
+    random.seed(7)
+    started = time.perf_counter()
+    await seed(db, args.requests)
+    print(f"seeded {args.requests} leave requests in {time.perf_counter() - started:.1f}s\n")
+
+    print(f"{'implementation':18} {'median ms':>10} {'best ms':>10}")
+    legacy = await time_calls("4x count_documents", lambda: legacy_stats(db.leave_requests), args.rounds)
+    facet = await time_calls(
+        "$facet (uncached)", service.get_leave_stats, args.rounds,
+        before=lambda: leave_reference_cache.invalidate("leave_stats")
+    )
+    await time_calls("$facet (cached)", service.get_leave_stats, args.rounds)
+
+    mismatched = [key for key in legacy if legacy[key] != facet[key]]
+    print(f"\ncounts match: {not mismatched} {mismatched or ''}")
+    print(f"by_status: {facet['by_status']}")
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500000)
+    parser.add_argument("--rounds", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
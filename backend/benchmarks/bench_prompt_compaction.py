@@ -0,0 +1,69 @@
+"""
+Benchmark: AI productivity prompt size vs number of distinct apps.
+
+Generates synthetic monthly app data dominated by browser pages (the shape that
+used to blow up the prompt), formats it with format_raw_app_data_for_llm and
+checks the estimated token count never exceeds AI_PROMPT_TOKEN_BUDGET.
+
+Run from backend/ (no database or API key needed):
+    python -m benchmarks.bench_prompt_compaction --app-counts 10 100 1000 5000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from app.core.config import settings
+from app.services.ai_productivity_service import ai_productivity_service, estimate_tokens
+
+SITES = ["github.com", "stackoverflow.com", "youtube.com", "facebook.com", "google.com", "linkedin.com"]
+DESKTOP_APPS = ["Code.exe", "slack.exe", "Teams.exe", "WINWORD.EXE", "Spotify.exe", "explorer.exe"]
+
+
+def make_raw_apps(count: int):
+    apps = []
+    for i in range(count):
+        roll = i % 10
+        if roll < 6:
+            application = f"chrome.exe (Browser: untitled page {i})"
+        elif roll < 8:
+            application = f"chrome.exe ({SITES[i % len(SITES)]})"
+        else:
+            application = DESKTOP_APPS[i % len(DESKTOP_APPS)] if i < 2 * len(DESKTOP_APPS) else f"tool{i}.exe"
+        apps.append({
+            "application": application,
+            "total_time_spent_seconds": random.randint(5, 7200),
+            "total_mouse_movements": random.randint(0, 50000),
+            "total_key_presses": random.randint(0, 20000),
+            "last_window_title": "",
+            "last_url": ""
+        })
+    apps.sort(key=lambda app: app["total_time_spent_seconds"], reverse=True)
+    return apps
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--app-counts", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    args = parser.parse_args()
+
+    budget = settings.AI_PROMPT_TOKEN_BUDGET
+    print(f"Token budget: {budget}, top apps: {settings.AI_PROMPT_TOP_APPS}\n")
+    print(f"{'apps':>6} {'lines':>6} {'tokens':>7} {'ms':>8}")
+
+    for count in args.app_counts:
+        raw_apps = make_raw_apps(count)
+        started = time.perf_counter()
+        categories = await ai_productivity_service.categorize_apps(raw_apps)
+        prompt = ai_productivity_service.format_raw_app_data_for_llm(raw_apps, "Bench Employee", "January 2025", categories)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        tokens = estimate_tokens(prompt)
+        lines = sum(1 for line in prompt.splitlines() if line[:1].isdigit())
+        print(f"{count:>6} {lines:>6} {tokens:>7} {elapsed_ms:>8.1f}")
+        assert tokens <= budget, f"{count} apps produced ~{tokens} tokens (budget {budget})"
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
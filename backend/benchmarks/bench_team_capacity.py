@@ -0,0 +1,78 @@
+"""
+Benchmark: team capacity computation for one organisation over a year.
+
+Builds --people members split into teams of --team-size, gives each member
+a handful of approved/pending (some half-day) leaves across the year, and
+times compute_capacity for every team over the full year. No database: this
+measures the in-memory part that runs for the capacity endpoints and on
+each leave submission.
+
+Run from backend/:
+    python -m benchmarks.bench_team_capacity --people 500 --rounds 20
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from app.services.team_capacity import compute_capacity
+
+
+def build_org(people: int, team_size: int, year: int):
+    start = date(year, 1, 1)
+    teams = []
+    leaves = []
+    for first in range(0, people, team_size):
+        members = [str(i) for i in range(first, min(first + team_size, people))]
+        teams.append(members)
+        for member in members:
+            for _ in range(random.randint(3, 8)):
+                leave_start = start + timedelta(days=random.randint(0, 360))
+                half_day = random.random() < 0.2
+                leaves.append({
+                    "user_id": member,
+                    "status": random.choice(["approved", "approved", "pending"]),
+                    "start_date": leave_start,
+                    "end_date": leave_start if half_day else leave_start + timedelta(days=random.randint(0, 4)),
+                    "is_half_day": half_day
+                })
+    return teams, leaves
+
+
+def main(args):
+    random.seed(7)
+    start = date(args.year, 1, 1)
+    end = date(args.year, 12, 31)
+    teams, leaves = build_org(args.people, args.team_size, args.year)
+    non_working = {start + timedelta(days=d) for d in range((end - start).days + 1) if (start + timedelta(days=d)).weekday() >= 5}
+
+    leaves_by_member = {}
+    for leave in leaves:
+        leaves_by_member.setdefault(leave["user_id"], []).append(leave)
+    team_leaves = [[leave for member in members for leave in leaves_by_member.get(member, [])] for members in teams]
+
+    timings = []
+    results = None
+    for _ in range(args.rounds):
+        started = time.perf_counter()
+        results = [
+            compute_capacity(start, end, members, member_leaves, non_working, 0.5)
+            for members, member_leaves in zip(teams, team_leaves)
+        ]
+        timings.append((time.perf_counter() - started) * 1000)
+
+    print(f"{args.people} people, {len(teams)} teams, {len(leaves)} leaves, {(end - start).days + 1} days")
+    print(f"whole org: median {statistics.median(timings):.2f} ms, best {min(timings):.2f} ms")
+    print(f"max concurrent absences (any team): {max(r['max_concurrent_absences'] for r in results)}")
+    print(f"understaffed team-days: {sum(len(r['breached_dates']) for r in results)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--people", type=int, default=500)
+    parser.add_argument("--team-size", type=int, default=10)
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--rounds", type=int, default=20)
+    main(parser.parse_args())
@@ -0,0 +1,80 @@
+"""
+Benchmark: leave-day calculation, day-by-day walk vs WorkingDayCalendar.
+
+The walk is the previous LeaveService.calculate_leave_days loop (membership
+test against a list of holiday dates for every day in the range). The
+calendar is built once per year and then answers each range from prefix sums.
+Results of the two are compared on every range.
+
+Run from backend/ (no database needed):
+    python -m benchmarks.bench_working_days --ranges 20000 --holidays 15 60
+"""
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from app.services.working_days import WorkingDayCalendar, weekend_weekdays
+
+YEAR = 2025
+WEEKEND = ["saturday", "sunday"]
+
+
+def walk_leave_days(start_date, end_date, weekend_days, holiday_dates):
+    """The previous algorithm, for comparison (each excluded date listed once)"""
+    excluded_weekdays = weekend_weekdays(weekend_days)
+    total_days = 0
+    excluded_dates = []
+    current_date = start_date
+    while current_date <= end_date:
+        if current_date.weekday() in excluded_weekdays or current_date in holiday_dates:
+            excluded_dates.append(current_date)
+        else:
+            total_days += 1
+        current_date += timedelta(days=1)
+    return total_days, excluded_dates
+
+
+def random_ranges(count: int, max_length: int):
+    first = date(YEAR, 1, 1)
+    ranges = []
+    for _ in range(count):
+        start = first + timedelta(days=random.randrange(365))
+        end = min(start + timedelta(days=random.randrange(max_length)), date(YEAR, 12, 31))
+        ranges.append((start, end))
+    return ranges
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ranges", type=int, default=20000)
+    parser.add_argument("--max-length", type=int, default=30, help="longest leave in days")
+    parser.add_argument("--holidays", type=int, nargs="+", default=[15, 60])
+    args = parser.parse_args()
+
+    random.seed(42)
+    ranges = random_ranges(args.ranges, args.max_length)
+
+    print(f"{'holidays':>9} {'walk us':>9} {'build ms':>9} {'calendar us':>12} {'speedup':>8}")
+    for holiday_count in args.holidays:
+        holiday_dates = sorted({date(YEAR, 1, 1) + timedelta(days=random.randrange(365)) for _ in range(holiday_count)})
+
+        started = time.perf_counter()
+        expected = [walk_leave_days(start, end, WEEKEND, holiday_dates) for start, end in ranges]
+        walk_us = (time.perf_counter() - started) / len(ranges) * 1e6
+
+        started = time.perf_counter()
+        calendar = WorkingDayCalendar(YEAR, weekend_weekdays(WEEKEND), holiday_dates)
+        build_ms = (time.perf_counter() - started) * 1e3
+
+        started = time.perf_counter()
+        actual = [(calendar.working_days(start, end), calendar.excluded_dates(start, end)) for start, end in ranges]
+        calendar_us = (time.perf_counter() - started) / len(ranges) * 1e6
+
+        assert actual == expected, "calendar and walk disagree"
+        print(f"{holiday_count:>9} {walk_us:>9.1f} {build_ms:>9.2f} {calendar_us:>12.2f} {walk_us / calendar_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
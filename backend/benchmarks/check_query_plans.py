@@ -0,0 +1,45 @@
+"""
+Check: every query in app.core.indexes.HOT_QUERIES is served by an index.
+
+Builds the registry indexes in a scratch database (<DATABASE_NAME>_bench),
+inserts one document per collection so the planner has something to plan
+against, explains each hot query and exits non-zero if any winning plan is a
+COLLSCAN. Run after changing a hot query or the registry.
+
+Run from backend/ against a disposable MongoDB:
+    python -m benchmarks.check_query_plans
+"""
+
+import asyncio
+import sys
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.core.indexes import INDEX_REGISTRY, HOT_QUERIES, ensure_indexes, explain_hot_queries
+
+
+async def main() -> int:
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db = client[f"{settings.DATABASE_NAME}_bench"]
+
+    for collection_name in INDEX_REGISTRY:
+        await db[collection_name].drop()
+    for collection_name in {query["collection"] for query in HOT_QUERIES}:
+        await db[collection_name].insert_one({"_seed": True})
+
+    report = await ensure_indexes(db)
+    for failure in report["failed"]:
+        print(f"FAILED  {failure}")
+
+    plans = await explain_hot_queries(db)
+    for plan in plans:
+        status = "COLLSCAN" if plan["collscan"] else "ok"
+        print(f"{status:8} {plan['collection']:16} {plan['name']:40} {' > '.join(plan['stages'])}")
+
+    client.close()
+    return 1 if report["failed"] or any(plan["collscan"] for plan in plans) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,91 @@
+"""
+Local stand-in for the Groq chat-completions API.
+
+Answers every POST .../chat/completions with a fixed productivity JSON after an
+artificial delay, so the AI analysis job queue (concurrency limit, coalescing,
+polling) can be exercised without network access or an API key.
+
+Run from backend/:
+    python -m benchmarks.stub_llm_server --port 8765 --delay 2
+then start the API with GROQ_BASE_URL=http://127.0.0.1:8765 and GROQ_API_KEY=stub.
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+    calls = 0
+    in_flight = 0
+    peak_in_flight = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        if not self.path.endswith("/chat/completions"):
+            self.send_error(404)
+            return
+
+        cls = type(self)
+        with cls.lock:
+            cls.calls += 1
+            cls.in_flight += 1
+            cls.peak_in_flight = max(cls.peak_in_flight, cls.in_flight)
+        try:
+            time.sleep(cls.delay)
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+        content = json.dumps({
+            "productivity_score": 75,
+            "summary": "Stub analysis. Mostly productive applications with steady input activity."
+        })
+        response = {
+            "id": f"stub-{cls.calls}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        }
+        payload = json.dumps(response).encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        print(f"call #{cls.calls} (peak concurrent: {cls.peak_in_flight})")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=2.0, help="seconds per completion")
+    args = parser.parse_args()
+
+    StubLLMHandler.delay = args.delay
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), StubLLMHandler)
+    print(f"Stub LLM listening on http://127.0.0.1:{args.port} (delay {args.delay}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
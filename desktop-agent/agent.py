@@ -1,12 +1,33 @@
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import os
+import gzip
+import json
+import random
+import sqlite3
 import signal
 import sys
 import atexit  # ADD THIS LINE
 from datetime import datetime
 from activity_tracker import ActivityTracker
 from config import Config
+from spool import ActivitySpool
+
+try:
+    import msgpack
+except ImportError:  # listed in requirements.txt; fall back to gzip JSON without it
+    msgpack = None
+
+# Server-side limit is 500 records per batch upload
+MAX_SPOOL_DRAIN_BATCH = 200
+
+# Outcomes of a batch upload
+SEND_OK = "ok"
+SEND_RETRY = "retry"        # network error, 5xx, 429, 401/408: try the same batch later
+SEND_REJECTED = "rejected"  # any other 4xx: the server will never accept this batch as is
+
+RETRYABLE_STATUS_CODES = {401, 408, 429}
 
 class MonitoringAgent:
     def __init__(self):
@@ -17,6 +38,10 @@ class MonitoringAgent:
         self.is_running = False
         self.session_number = None
         self.cleanup_completed = False
+        self.spool = ActivitySpool(self.config.SPOOL_PATH)  # Unsent intervals (survives crashes)
+        self.retry_delay = 0
+        self.next_retry_at = 0
+        self.http = self._create_http_session()  # Pooled keep-alive connections to the API
     
         # ===== ADD THIS: Cleanup any leftover signal files =====
         signal_file = os.path.join(os.path.dirname(__file__), '.clockout_signal')
@@ -68,7 +93,7 @@ class MonitoringAgent:
             final_data["session_completed"] = True
             final_data["session_number"] = self.session_number
 
-            success = self.send_activity_data(final_data)
+            success = self.send_final_activity_data(final_data)
             if success:
                 print("[OK] Final session data saved")
             else:
@@ -82,6 +107,25 @@ class MonitoringAgent:
     
         # ... rest of the methods stay the same ...
     
+    def _create_http_session(self):
+        """
+        One requests.Session for all API calls, so the TCP/TLS connection is
+        kept alive and reused across intervals instead of re-handshaking each time.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.config.HTTP_POOL_SIZE)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({"Connection": "keep-alive"})
+        return session
+
+    def _endpoint(self, path):
+        """Build an API URL, avoiding a double /api prefix"""
+        api_url = self.config.API_URL.rstrip('/')
+        if not api_url.endswith('/api'):
+            return f"{api_url}/api{path}"
+        return f"{api_url}{path}"
+
     def authenticate(self):
         """
         Authenticate using token from environment (Electron) or credentials (standalone)
@@ -94,13 +138,14 @@ class MonitoringAgent:
             print(f"\n[*] Using token from Electron for: {env_email}")
             self.token = env_token
             self.employee_email = env_email
+            self.http.headers["Authorization"] = f"Bearer {self.token}"
             return True
         
         # Fallback: Login with credentials (standalone mode)
         print(f"\n[*] Logging in as: {self.config.EMPLOYEE_EMAIL}")
         try:
-            response = requests.post(
-                f"{self.config.API_URL}/api/auth/login",
+            response = self.http.post(
+                self._endpoint("/auth/login"),
                 json={
                     "email": self.config.EMPLOYEE_EMAIL,
                     "password": self.config.EMPLOYEE_PASSWORD
@@ -114,6 +159,7 @@ class MonitoringAgent:
                 data = response.json()
                 self.token = data["access_token"]
                 self.employee_email = data["user"]["email"]
+                self.http.headers["Authorization"] = f"Bearer {self.token}"
                 print(f"[OK] Login successful!")
                 return True
             else:
@@ -127,21 +173,12 @@ class MonitoringAgent:
     def get_session_number(self):
         """Get session number by counting attendance records for this employee"""
         try:
-            headers = {
-                "Authorization": f"Bearer {self.token}",
-                "Content-Type": "application/json"
-            }
-            
             # Clean API URL
-            api_url = self.config.API_URL.rstrip('/')
-            if not api_url.endswith('/api'):
-                endpoint = f"{api_url}/api/employee/session-count"
-            else:
-                endpoint = f"{api_url}/employee/session-count"
+            endpoint = self._endpoint("/employee/session-count")
             
             print(f"[*] Getting session number from: {endpoint}")
             
-            response = requests.get(endpoint, headers=headers, timeout=10)
+            response = self.http.get(endpoint, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -156,35 +193,37 @@ class MonitoringAgent:
             print(f"[WARN] Session number error: {str(e)}, defaulting to 1")
             return 1
 
+    def _prepare_activity_record(self, activity_data):
+        """Stamp employee/session info on an interval record before upload"""
+        activity_data["employee_email"] = self.employee_email
+        
+        # Add session number instead of session_time_seconds
+        activity_data["session_number"] = self.session_number
+        
+        # Day the interval was captured; the server files the record under it,
+        # so intervals spooled yesterday never land in today's session
+        if "capture_date" not in activity_data:
+            captured_at = activity_data.get("timestamp") or datetime.now().isoformat()
+            activity_data["capture_date"] = captured_at[:10]
+        
+        # Remove session_time_seconds if present
+        if "session_time_seconds" in activity_data:
+            del activity_data["session_time_seconds"]
+        
+        return activity_data
+
     def send_activity_data(self, activity_data):
         try:
-            headers = {
-                "Authorization": f"Bearer {self.token}",
-                "Content-Type": "application/json"
-            }
-            
-            activity_data["employee_email"] = self.employee_email
-            
-            # Add session number instead of session_time_seconds
-            activity_data["session_number"] = self.session_number
-            
-            # Remove session_time_seconds if present
-            if "session_time_seconds" in activity_data:
-                del activity_data["session_time_seconds"]
+            self._prepare_activity_record(activity_data)
             
             # Ensure API URL doesn't have double /api
-            api_url = self.config.API_URL.rstrip('/')
-            if not api_url.endswith('/api'):
-                endpoint = f"{api_url}/api/employee/activity"
-            else:
-                endpoint = f"{api_url}/employee/activity"
+            endpoint = self._endpoint("/employee/activity")
             
             print(f"[*] Sending to: {endpoint}")
             print(f"[*] Session: {self.session_number}")
             
-            response = requests.post(
+            response = self.http.post(
                 endpoint,
-                headers=headers,
                 json=activity_data,
                 timeout=10
             )
@@ -207,6 +246,141 @@ class MonitoringAgent:
             traceback.print_exc()
             return False
     
+    def deliver_activity_data(self, activity_data):
+        """
+        Hand an interval record to the upload pipeline.
+        With an empty spool (and batching off) it is sent directly; otherwise it is
+        spooled to disk and drained in order, so cumulative totals never go backwards.
+        Returns True once the record is either sent or safely spooled.
+        """
+        record = self._prepare_activity_record(activity_data)
+        batch_mode = self.config.ACTIVITY_BATCH_SIZE > 1
+        
+        try:
+            if not batch_mode and self.spool.count(self.employee_email) == 0:
+                if self.send_activity_data(record):
+                    return True
+                self.spool.append(self.employee_email, record)
+                self._schedule_retry()
+                print(f"[SPOOL] Interval saved to disk, next retry in {self.next_retry_at - time.time():.0f}s")
+                return True
+            
+            self.spool.append(self.employee_email, record)
+            pending = self.spool.count(self.employee_email)
+            
+            if batch_mode and pending < self.config.ACTIVITY_BATCH_SIZE:
+                print(f"[*] Queued interval {pending}/{self.config.ACTIVITY_BATCH_SIZE}")
+                return True
+            
+            self.drain_spool()
+            return True
+        except sqlite3.Error as e:
+            print(f"[ERROR] Spool error: {str(e)}")
+            return False
+
+    def _schedule_retry(self):
+        """Exponential backoff with full jitter, so agents don't retry in lockstep"""
+        self.retry_delay = min(
+            self.config.RETRY_MAX_SECONDS,
+            max(self.config.RETRY_BASE_SECONDS, self.retry_delay * 2)
+        )
+        self.next_retry_at = time.time() + random.uniform(0, self.retry_delay)
+
+    def drain_spool(self, force=False):
+        """
+        Upload spooled records oldest-first in bulk batches.
+        Respects the retry backoff unless force=True (startup / clock-out).
+        A batch the server rejects is halved until the offending record is
+        isolated; that record is quarantined so it can't block the spool.
+        Returns True when the spool is empty.
+        """
+        if not force and time.time() < self.next_retry_at:
+            pending = self.spool.count(self.employee_email)
+            print(f"[SPOOL] {pending} interval(s) waiting, next retry in {self.next_retry_at - time.time():.0f}s")
+            return False
+        
+        batch_size = MAX_SPOOL_DRAIN_BATCH
+        while True:
+            spooled = self.spool.peek(self.employee_email, batch_size)
+            if not spooled:
+                self.retry_delay = 0
+                self.next_retry_at = 0
+                return True
+            
+            outcome = self.send_activity_batch([record for _, record in spooled])
+            
+            if outcome == SEND_RETRY:
+                self._schedule_retry()
+                print(f"[SPOOL] Upload failed, next retry in {self.next_retry_at - time.time():.0f}s")
+                return False
+            
+            if outcome == SEND_REJECTED:
+                if len(spooled) > 1:
+                    batch_size = len(spooled) // 2
+                    print(f"[SPOOL] Batch rejected, retrying the oldest {batch_size} interval(s) to isolate the bad one")
+                    continue
+                self.spool.quarantine([row_id for row_id, _ in spooled])
+                print("[SPOOL] Interval rejected by the server, moved to quarantine")
+                batch_size = MAX_SPOOL_DRAIN_BATCH
+                continue
+            
+            self.spool.delete([row_id for row_id, _ in spooled])
+
+    def send_activity_batch(self, records):
+        """Upload interval records in one compressed request; returns SEND_OK, SEND_RETRY or SEND_REJECTED"""
+        if not records:
+            return SEND_OK
+        
+        try:
+            headers = {}
+            payload = {"records": records}
+            
+            if self.config.ACTIVITY_BATCH_ENCODING == "msgpack" and msgpack is not None:
+                body = msgpack.packb(payload, use_bin_type=True)
+                headers["Content-Type"] = "application/msgpack"
+            else:
+                body = gzip.compress(json.dumps(payload).encode("utf-8"))
+                headers["Content-Type"] = "application/json"
+                headers["Content-Encoding"] = "gzip"
+            
+            endpoint = self._endpoint("/employee/activity/batch")
+            
+            print(f"[*] Sending batch of {len(records)} interval(s) to: {endpoint} ({len(body):,} bytes)")
+            
+            response = self.http.post(
+                endpoint,
+                headers=headers,
+                data=body,
+                timeout=10
+            )
+            
+            if response.status_code == 200:
+                result = response.json()
+                print(f"[OK] Batch logged: {result.get('message', 'Success')}")
+                self.display_activity_summary(records[-1])
+                return SEND_OK
+            else:
+                print(f"[ERROR] Batch failed: {response.status_code}")
+                print(f"[ERROR] Response: {response.text}")
+                if response.status_code >= 500 or response.status_code in RETRYABLE_STATUS_CODES:
+                    return SEND_RETRY
+                return SEND_REJECTED
+        except requests.exceptions.RequestException as e:
+            print(f"[ERROR] Network error: {str(e)}")
+            return SEND_RETRY
+        except Exception as e:
+            # e.g. a record that can't be serialized; sending it again won't help
+            print(f"[ERROR] Unexpected error: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return SEND_REJECTED
+
+    def send_final_activity_data(self, final_data):
+        """Send the clock-out record and flush the spool (unsent data stays on disk)"""
+        if not self.deliver_activity_data(final_data):
+            return False
+        return self.drain_spool(force=True)
+
     def display_activity_summary(self, activity_data):
         status = "[IDLE]" if activity_data["is_idle"] else "[ACTIVE]"
         current = activity_data.get("current_application", "Unknown")
@@ -236,18 +410,9 @@ class MonitoringAgent:
     def check_clock_status(self):
         """Check if employee is still clocked in"""
         try:
-            headers = {
-                "Authorization": f"Bearer {self.token}",
-                "Content-Type": "application/json"
-            }
+            endpoint = self._endpoint("/employee/status")
             
-            api_url = self.config.API_URL.rstrip('/')
-            if not api_url.endswith('/api'):
-                endpoint = f"{api_url}/api/employee/status"
-            else:
-                endpoint = f"{api_url}/employee/status"
-            
-            response = requests.get(endpoint, headers=headers, timeout=5)
+            response = self.http.get(endpoint, timeout=5)
             
             if response.status_code == 200:
                 data = response.json()
@@ -265,6 +430,12 @@ class MonitoringAgent:
             print("\n[ERROR] Cannot start monitoring - authentication failed")
             return
     
+        # Upload anything left in the spool from a previous run
+        pending = self.spool.count(self.employee_email)
+        if pending:
+            print(f"[SPOOL] Found {pending} unsent interval(s) from a previous run, uploading...")
+            self.drain_spool(force=True)
+    
         # Get session number
         self.session_number = self.get_session_number()
         
@@ -278,6 +449,8 @@ class MonitoringAgent:
         print(f"[*] Employee: {self.employee_email}")
         print(f"[*] Session Number: {self.session_number}")
         print(f"[*] Updates every {self.config.ACTIVITY_CHECK_INTERVAL} seconds")
+        if self.config.ACTIVITY_BATCH_SIZE > 1:
+            print(f"[*] Batch mode: uploading every {self.config.ACTIVITY_BATCH_SIZE} intervals ({self.config.ACTIVITY_BATCH_ENCODING})")
         print(f"[*] Idle threshold: {self.config.IDLE_THRESHOLD} seconds")
         print("\nPress Ctrl+C to stop\n")   
 
@@ -304,7 +477,7 @@ class MonitoringAgent:
                         activity_data = self.tracker.get_activity_data()
                         activity_data["session_completed"] = True
                         activity_data["session_number"] = self.session_number
-                        self.send_activity_data(activity_data)
+                        self.send_final_activity_data(activity_data)
 
                         # Reset session data for next time
                         self.tracker.reset_session_data()
@@ -323,12 +496,12 @@ class MonitoringAgent:
                 activity_data["session_completed"] = False  # Not final
                 activity_data["session_number"] = self.session_number
             
-                success = self.send_activity_data(activity_data)
+                success = self.deliver_activity_data(activity_data)
             
                 if success:
                     # ✅ Reset interval data (but keep session totals)
                     self.tracker.reset_app_interval_data()
-                    print(f"[OK] Data sent, continuing monitoring...")
+                    print(f"[OK] Data recorded, continuing monitoring...")
                 else:
                     print(f"[WARN] Failed to send data, will retry next interval")
             
@@ -355,25 +528,17 @@ class MonitoringAgent:
             self._handle_clock_out()
             self.tracker.stop()
             self.tracker.display_summary()
+        self.http.close()
         print("\n[OK] Agent stopped!")
 
     def get_lifetime_totals(self):
         """Fetch lifetime cumulative totals for this user (only for TODAY)"""
         try:
-            headers = {
-                "Authorization": f"Bearer {self.token}",
-                "Content-Type": "application/json"
-            }
-    
-            api_url = self.config.API_URL.rstrip('/')
-            if not api_url.endswith('/api'):
-                endpoint = f"{api_url}/api/employee/last-lifetime-totals"
-            else:
-                endpoint = f"{api_url}/employee/last-lifetime-totals"
+            endpoint = self._endpoint("/employee/last-lifetime-totals")
     
             print(f"[*] Fetching lifetime totals for TODAY...")
     
-            response = requests.get(endpoint, headers=headers, timeout=10)
+            response = self.http.get(endpoint, timeout=10)
     
             if response.status_code == 200:
                 data = response.json()
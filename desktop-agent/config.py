@@ -19,6 +19,12 @@ class Config:
                 self.TRACK_MOUSE = config.get('track_mouse', True)
                 self.TRACK_KEYBOARD = config.get('track_keyboard', True)
                 self.TRACK_APPLICATIONS = config.get('track_applications', True)
+                self.ACTIVITY_BATCH_SIZE = config.get('activity_batch_size', 1)
+                self.ACTIVITY_BATCH_ENCODING = config.get('activity_batch_encoding', 'gzip')
+                self.SPOOL_PATH = config.get('spool_path', str(Path(__file__).parent / '.activity_spool.db'))
+                self.RETRY_BASE_SECONDS = config.get('retry_base_seconds', 10)
+                self.RETRY_MAX_SECONDS = config.get('retry_max_seconds', 600)
+                self.HTTP_POOL_SIZE = config.get('http_pool_size', 2)
                 print(f"[OK] Config loaded: {self.API_URL}")  # Changed from emoji
         else:
             # Fallback to environment variables or defaults
@@ -30,4 +36,10 @@ class Config:
             self.TRACK_MOUSE = os.getenv('TRACK_MOUSE', 'True').lower() == 'true'
             self.TRACK_KEYBOARD = os.getenv('TRACK_KEYBOARD', 'True').lower() == 'true'
             self.TRACK_APPLICATIONS = os.getenv('TRACK_APPLICATIONS', 'True').lower() == 'true'
+            self.ACTIVITY_BATCH_SIZE = int(os.getenv('ACTIVITY_BATCH_SIZE', '1'))
+            self.ACTIVITY_BATCH_ENCODING = os.getenv('ACTIVITY_BATCH_ENCODING', 'gzip')
+            self.SPOOL_PATH = os.getenv('SPOOL_PATH', str(Path(__file__).parent / '.activity_spool.db'))
+            self.RETRY_BASE_SECONDS = int(os.getenv('RETRY_BASE_SECONDS', '10'))
+            self.RETRY_MAX_SECONDS = int(os.getenv('RETRY_MAX_SECONDS', '600'))
+            self.HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '2'))
             print("[WARN] config.json not found, using defaults")
\ No newline at end of file
@@ -0,0 +1,82 @@
+# desktop-agent/spool.py
+import json
+import sqlite3
+import time
+
+
+class ActivitySpool:
+    """
+    Append-only on-disk queue of interval records waiting to be uploaded.
+    Records survive crashes/restarts and are drained in insertion order.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS spool (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                employee_email TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                payload TEXT NOT NULL
+            )
+        """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_spool_employee ON spool (employee_email, id)"
+        )
+        # Records the server rejected (4xx), kept for inspection instead of blocking the queue
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS quarantine (
+                id INTEGER PRIMARY KEY,
+                employee_email TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                quarantined_at REAL NOT NULL,
+                payload TEXT NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def append(self, employee_email, record):
+        """Persist one interval record for later upload"""
+        self.conn.execute(
+            "INSERT INTO spool (employee_email, created_at, payload) VALUES (?, ?, ?)",
+            (employee_email, time.time(), json.dumps(record))
+        )
+        self.conn.commit()
+
+    def peek(self, employee_email, limit):
+        """Oldest spooled records for an employee as a list of (id, record)"""
+        rows = self.conn.execute(
+            "SELECT id, payload FROM spool WHERE employee_email = ? ORDER BY id LIMIT ?",
+            (employee_email, limit)
+        ).fetchall()
+        return [(row_id, json.loads(payload)) for row_id, payload in rows]
+
+    def delete(self, ids):
+        """Remove records once the server has acknowledged them"""
+        if not ids:
+            return
+        self.conn.executemany("DELETE FROM spool WHERE id = ?", [(row_id,) for row_id in ids])
+        self.conn.commit()
+
+    def quarantine(self, ids):
+        """Move records the server rejected out of the queue"""
+        if not ids:
+            return
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO quarantine (id, employee_email, created_at, quarantined_at, payload) "
+                "SELECT id, employee_email, created_at, ?, payload FROM spool WHERE id = ?",
+                [(now, row_id) for row_id in ids]
+            )
+            self.conn.executemany("DELETE FROM spool WHERE id = ?", [(row_id,) for row_id in ids])
+
+    def count(self, employee_email):
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM spool WHERE employee_email = ?", (employee_email,)
+        ).fetchone()[0]
+
+    def close(self):
+        self.conn.close()